@@ -35,6 +35,101 @@ from src.common import (
     write_json_results,
 )
 
+from .cte_analysis import (
+    CTE_CHARGERS,
+    CTE_CALL_BUDGET,
+    CTE_ESTIMATES,
+    CteCallTimer,
+    CteEstimateRecorder,
+    analyze_cte_estimates,
+    charge_sessions,
+    cte_events,
+    cte_report,
+    format_cte_report,
+    session_counts,
+)
+from .cte_benchmark import (
+    accuracy_table,
+    find_cte_logs,
+    replay_cte_log,
+    run_cte_benchmark,
+    throughput_table,
+)
+from .cte_sweep import (
+    CTE_SWEEP_INPUTS,
+    diff_sweeps,
+    evaluate_cte_points,
+    load_sweep,
+    run_cte_sweep,
+    save_sweep,
+    sweep_cube,
+    sweep_grid,
+    sweep_latin_hypercube,
+)
+from .event_log import EVENT_FIELDS, EVENT_LOG_FORMAT_ENV, DiagnosticsLog
+from .lib_pool import LibraryPool, close_isolated_lib, lib_workers, locate_library, open_isolated_lib
+from .lib_snapshot import DatFileSnapshot, LibrarySnapshot, exported_globals, snapshots_enabled
+from .log_cache import LogDataset, clear_log_cache, load_log_arrays, read_csv_columns
+from .log_convert import convert_log_dataset, convert_log_file
+from .log_decode import (
+    LOG_CHUNK_ROWS,
+    column_group_positions,
+    decode_list_column,
+    decode_nullable_column,
+    iter_chunks,
+    iter_column_blocks,
+    iter_list_columns,
+    iter_wide_rows,
+    open_table,
+)
+from .log_index import (
+    build_session_index,
+    find_sessions,
+    iter_session_rows,
+    load_session_index,
+    select_session,
+    session_rows,
+)
+from .log_schema import (
+    LOG_SCHEMAS,
+    LogSchemaDecoder,
+    compile_log_decoder,
+    decode_with_schema,
+    log_field,
+    register_log_schema,
+)
+from .replay import (
+    AfcCallContext,
+    afc_call_context,
+    alloc_replay_outputs,
+    ctype_dtype,
+    fast_forward_enabled,
+    global_layout,
+    idle_runs,
+    global_view,
+    lib_array_view,
+    replay_block,
+)
+from .replay_checkpoint import ReplayCheckpoints, checkpoint_path, load_checkpoint
+from .replay_engine import (
+    BEHAVIORAL_INPUTS,
+    BEHAVIORAL_OUTPUTS,
+    QNOVO_AFC_1000MS_ARGS,
+    QNOVO_AFC_ARGS,
+    REPLAY_SPECS,
+    ReplayEngine,
+    behavioral_results,
+    compare_fast_forward,
+    compare_replay_paths,
+    compile_replay,
+    global_path_view,
+    register_replay_spec,
+    replay_spec,
+)
+from .result_recorder import ResultRecorder, write_results_csv
+from .sim_clock import AFC_TICK_MS, CTE_TICK_MS, REPLAY_REALTIME_ENV, VirtualClock
+from .xdist_worker import dat_files_dir, worker_id, worker_path
+
 MAKE_HTML = True  # Set true to allow html report generation.
 
 ffi = cffi.FFI()
@@ -63,17 +158,52 @@ warning_map = {
     14: "Warn_AFC_ExtremeAging",
 }
 
+# Library state after the first full setup_parameters run, by id of the library: (lib, snapshot, NVM .dat files,
+# random state).
+_SETUP_SNAPSHOTS = {}
+
+
 @fixture(scope="function")
 def setup_parameters(lib) -> None:
     """This fixture initializes the global variables in the specified library module at the beginning of each test
     function. These variables are reset to their initial values for every standard and parametrized test case, ensuring
     consistent test conditions.
 
+    The full initialization in initialize_parameters runs once per loaded library. Later tests get the resulting memory
+    image of all library globals back from a LibrarySnapshot, together with the state of the seeded random module. The
+    NVM .dat files written by the initialization are deleted after every test like before, so their content is recorded
+    in a DatFileSnapshot as well and written back before each test. Set AFC_SETUP_SNAPSHOT_DISABLE to run the full
+    initialization for every test.
+
     Args:
         lib (module): The shared library module, either a .dll (Windows) or .so (Unix/Linux) file, containing the global
          variables to be initialized.
     """
 
+    setup = _SETUP_SNAPSHOTS.get(id(lib)) if snapshots_enabled() else None
+    if setup is not None and setup[0] is lib:
+        _, snapshot, dat_files, random_state = setup
+        snapshot.restore()
+        dat_files.restore()
+        random.setstate(random_state)
+    else:
+        initialize_parameters(lib)
+        if snapshots_enabled():
+            dat_files = DatFileSnapshot(dat_files_dir(PROJECT_PATH))
+            _SETUP_SNAPSHOTS[id(lib)] = (lib, LibrarySnapshot(lib), dat_files, random.getstate())
+
+    yield
+
+    clean_dat_files(dat_files_dir(PROJECT_PATH))
+
+
+def initialize_parameters(lib) -> None:
+    """Assigns the initial values of the library globals and runs the NVM initialization, see setup_parameters.
+
+    Args:
+        lib (module): The loaded shared library.
+    """
+
     # Data Ready Signals
     # ------------------------------------------------
     lib.VeAPI_b_PackCurr_DR = 1
@@ -91,37 +221,7 @@ def setup_parameters(lib) -> None:
     lib.VeAPI_b_EVSEChgStatus = 1
     lib.VeAPI_I_PackCurr = 1
 
-    lib.fs_API_SetInputsAFC(
-        lib.VaAPI_Cmp_NVMRegion,
-        lib.VaAPI_Cmp_NVMLoggingRegion,
-        lib.VeAPI_I_PackCurr,
-        lib.VeAPI_b_PackCurr_DR,
-        lib.VaAPI_U_CellVolts,
-        lib.VaAPI_b_CellVolts_DR,
-        lib.VaAPI_T_TempSnsrs,
-        lib.VaAPI_b_TempSnsrs_DR,
-        lib.VeAPI_T_MinTempSnsr,
-        lib.VeAPI_b_MinTempSnsr_DR,
-        lib.VeAPI_T_MaxTempSnsr,
-        lib.VeAPI_b_MaxTempSnsr_DR,
-        lib.VeAPI_Cap_ChgPackCapcty,
-        lib.VeAPI_b_ChgPackCapcty_DR,
-        lib.VeAPI_Pct_PackSOC,
-        lib.VeAPI_b_PackSOC_DR,
-        lib.VeAPI_b_EVSEChgStatus,
-        ffi.addressof(lib, "VaAFC_Cmp_CTE_Info"),
-        ffi.addressof(lib, "VeAFC_e_ErrorFlags"),
-        ffi.addressof(lib, "VeAFC_I_ChgPackCurr"),
-        ffi.addressof(lib, "VeAFC_I_MaxReferenceCurr"),
-        ffi.addressof(lib, "VeAFC_I_MitigatedCurr"),
-        ffi.addressof(lib, "VeAFC_U_ChgPackVolt"),
-        ffi.addressof(lib, "VeAFC_b_ChgCompletionFlag"),
-        ffi.addressof(lib, "VeAFC_b_ExtremeAgingFlag"),
-        ffi.addressof(lib, "VeAFC_b_AbnormalAgingFlag"),
-        ffi.addressof(lib, "VeAFC_b_EarlyWarningAgingFlag"),
-        ffi.addressof(lib, "VeAFC_b_EOLFlag"),
-        ffi.addressof(lib, "VeAFC_b_SOCImbalanceFlag"),
-    )
+    afc_call_context(lib).set_inputs()
 
     lib.f_AFC_NVMInit()
     lib.AFC_NVMLoggingInit()
@@ -307,11 +407,8 @@ def setup_parameters(lib) -> None:
 
     # NVM
     # ------------------------------------------------
-    size_row, size_col = size(lib.s_AFC_Track.NtAFC_Cnt_CPVCorrIdx)
-    lib.s_AFC_Track.NtAFC_Cnt_CPVCorrIdx = [[0] * size_col for _ in range(size_row)]
-
-    size_row, size_col = size(lib.s_AFC_Track.NtAFC_U_RefCellVolt)
-    lib.s_AFC_Track.NtAFC_U_RefCellVolt = [[0] * size_col for _ in range(size_row)]
+    lib_array_view(lib.s_AFC_Track.NtAFC_Cnt_CPVCorrIdx)[...] = 0
+    lib_array_view(lib.s_AFC_Track.NtAFC_U_RefCellVolt)[...] = 0
 
     lib.s_AFC_Calc.VaAFC_Cnt_CPVCorrIdx = [0] * size(
         lib.s_AFC_Calc.VaAFC_Cnt_CPVCorrIdx
@@ -502,9 +599,6 @@ def setup_parameters(lib) -> None:
     # lib.VeAPI_T_MaxTempSnsr = 4200
     # lib.adc_VOLT_MIN = 3000
 
-    yield
-
-    clean_dat_files(PROJECT_PATH)
 
 def get_num_elements_from_buffer(lib):
     obj = ffi.addressof(lib.AFC_LoggingTrack[0], "Ne_Afc_Logging_Circ_Buff_Handle")
@@ -607,25 +701,50 @@ def process_log_buffer(lib, extn=1, write_to_file=False):
         #(log_data, log_data_fname)
     return result
 
-def iter_file(file_path):
-    """Works for .csv and Excel files (.xlsx, .xls, .xlsb, .ods)"""
-
-    if file_path.endswith(".csv"):
-        with open(file_path, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                yield row
-    elif file_path.endswith((".xlsx", ".xls", ".xlsb", ".ods")):
-        workbook = CalamineWorkbook.from_path(file_path)
-        rows = iter(workbook.get_sheet_by_index(0).to_python())
-        headers = list(map(str, next(rows)))
-        for row in rows:
-            yield dict(zip(headers, row))
-        workbook.close()
-    else:
-        raise ValueError(
-            f"Unsupported file format: {file_path}. Supported formats: .csv, .xlsx, .xls, .xlsb, .ods"
-        )
+def iter_file(file_path, sheet_name=None, groups=None, columns=None, filters=None):
+    """Works for .csv, .csv.gz, .csv.zst, .parquet and Excel files (.xlsx, .xls, .xlsb, .ods)
+
+    Pass ``groups`` for wide-layout logs, e.g. ``{"CellVolts": "cell_", "TempSnsrs": "temp_"}``. The group column
+    positions are then resolved once and each row carries one int32 array per group instead of the separate columns.
+
+    ``columns`` keeps only the listed columns. For Parquet files only those columns are read from disk, and
+    ``filters`` (``pyarrow.parquet`` DNF form, e.g. ``[("EVSEChgStatus", "==", 1)]``) skips rows while reading.
+    """
+
+    with open_table(file_path, sheet_name, columns, filters) as (headers, rows):
+        if groups:
+            yield from iter_wide_rows(headers, rows, groups)
+        else:
+            for row in rows:
+                yield dict(zip(headers, row))
+
+
+def iter_file_blocks(
+    file_path, columns=None, dtypes=None, sheet_name=None, block_size=LOG_CHUNK_ROWS, filters=None
+):
+    """Reads a log file in fixed-size blocks of column arrays.
+
+    Only ``block_size`` rows are held at a time, and only the requested columns are kept, so large input and reference
+    workbooks are read at roughly constant memory.
+
+    Args:
+        file_path: Path to the .csv, .csv.gz, .csv.zst, .parquet or Excel file.
+        columns: Columns to keep, in output order. Defaults to all columns. Parquet only reads these from disk.
+        dtypes: Mapping of column name to dtype, e.g. ``{"PackCurr": np.int32}``. Other columns are object arrays.
+        sheet_name: Excel sheet to read. Defaults to the first sheet.
+        block_size: Number of rows per block.
+        filters: Parquet row filter in ``pyarrow.parquet`` DNF form.
+
+    Yields:
+        dict: Column name to 1-D array of the block's values.
+
+    Raises:
+        KeyError: If a requested column is not in the header.
+        ValueError: If the file format is not supported.
+    """
+
+    with open_table(file_path, sheet_name, columns, filters) as (headers, rows):
+        yield from iter_column_blocks(headers, rows, columns, dtypes, block_size)
 
 def write_output_to_csv(results, file_path, ap=False):
     mode = "w"
@@ -670,8 +789,13 @@ def write_output_to_excel(results, file_path):
     col = 0
     for key in results.keys():
         worksheet.write(0, row, key)
+        values = results[key]
+        if isinstance(values, np.ndarray) and values.ndim == 1:
+            values = values.tolist()
         n = 1
-        for item in results[key]:
+        for item in values:
+            if isinstance(item, np.ndarray):
+                item = item.tolist()
             if isinstance(item, list):
                 r = ""
                 for i in item:
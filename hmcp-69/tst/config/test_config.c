@@ -8,6 +8,7 @@
  * Include Header Files
  ************************************************/
 #include <math.h>
+#include <string.h>
 
 #include "test_config.h"
 #include "qnovo_afc_api.h"
@@ -82,6 +83,80 @@ t_float32 standard_expf(t_float32 x) {
     return expf(x);
 }
 
+/* Replays Le_n_Steps calls of Qnovo_AFC without returning to the caller between steps.
+ * Before each step, input i copies La_n_InputSize[i] bytes from La_Cmp_InputSrc[i] + step * size into the global
+ * at La_Cmp_InputDst[i]. After each step, output i copies La_n_OutputSize[i] bytes of the global at
+ * La_Cmp_OutputSrc[i] to La_Cmp_OutputDst[i] + step * size. Globals without an input keep their value.
+ * Between the call and the output copies, array j of La_Cmp_DeobfuscateDst is passed to LIB_Deobfuscate with its
+ * La_n_DeobfuscateCount[j] items and key La_Cmp_DeobfuscateKey[j], as the suites do before recording. */
+t_uint32 test_replay_block(t_uint32 Le_n_Steps,
+                           void **La_Cmp_InputDst,
+                           void **La_Cmp_InputSrc,
+                           t_uint32 *La_n_InputSize,
+                           t_uint32 Le_n_Inputs,
+                           void **La_Cmp_OutputSrc,
+                           void **La_Cmp_OutputDst,
+                           t_uint32 *La_n_OutputSize,
+                           t_uint32 Le_n_Outputs,
+                           void **La_Cmp_DeobfuscateDst,
+                           t_uint32 *La_n_DeobfuscateCount,
+                           t_uint8 *La_Cmp_DeobfuscateKey,
+                           t_uint32 Le_n_Deobfuscate) {
+    t_uint32 step;
+    t_uint32 i;
+
+    for (step = 0; step < Le_n_Steps; step++) {
+        for (i = 0; i < Le_n_Inputs; i++) {
+            memcpy(La_Cmp_InputDst[i],
+                   (t_uint8 *)La_Cmp_InputSrc[i] + (size_t)step * La_n_InputSize[i],
+                   La_n_InputSize[i]);
+        }
+
+        Qnovo_AFC(VaAPI_Cmp_NVMRegion,
+                  VaAPI_Cmp_NVMLoggingRegion,
+                  VeAPI_I_PackCurr,
+                  VeAPI_b_PackCurr_DR,
+                  VaAPI_U_CellVolts,
+                  VaAPI_b_CellVolts_DR,
+                  VaAPI_T_TempSnsrs,
+                  VaAPI_b_TempSnsrs_DR,
+                  VeAPI_T_MinTempSnsr,
+                  VeAPI_b_MinTempSnsr_DR,
+                  VeAPI_T_MaxTempSnsr,
+                  VeAPI_b_MaxTempSnsr_DR,
+                  VeAPI_Cap_ChgPackCapcty,
+                  VeAPI_b_ChgPackCapcty_DR,
+                  VeAPI_Pct_PackSOC,
+                  VeAPI_b_PackSOC_DR,
+                  VeAPI_b_EVSEChgStatus,
+                  VeAPI_e_EVSEChgLevel,
+                  VaAFC_Cmp_CTE_Info,
+                  &VeAFC_e_ErrorFlags,
+                  &VeAFC_I_ChgPackCurr,
+                  &VeAFC_I_MaxReferenceCurr,
+                  &VeAFC_I_MitigatedCurr,
+                  &VeAFC_U_ChgPackVolt,
+                  &VeAFC_b_ChgCompletionFlag,
+                  &VeAFC_b_ExtremeAgingFlag,
+                  &VeAFC_b_AbnormalAgingFlag,
+                  &VeAFC_b_EarlyWarningAgingFlag,
+                  &VeAFC_b_EOLFlag,
+                  &VeAFC_b_SOCImbalanceFlag);
+
+        for (i = 0; i < Le_n_Deobfuscate; i++) {
+            LIB_Deobfuscate(La_Cmp_DeobfuscateDst[i], La_n_DeobfuscateCount[i], La_Cmp_DeobfuscateKey[i]);
+        }
+
+        for (i = 0; i < Le_n_Outputs; i++) {
+            memcpy((t_uint8 *)La_Cmp_OutputDst[i] + (size_t)step * La_n_OutputSize[i],
+                   La_Cmp_OutputSrc[i],
+                   La_n_OutputSize[i]);
+        }
+    }
+
+    return step;
+}
+
 AFC_INFO_T afc_cte_info;
 
 int main(void) {
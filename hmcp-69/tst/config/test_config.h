@@ -75,6 +75,21 @@ extern t_uint32 VeAPI_Cmp_LogSrcArraySize;
 extern t_int32 VeAPI_Cmp_LogDstArray[GENERIC_LOG_ARRAY_SIZE];
 
 extern t_float32 standard_expf(t_float32 x);
+
+/* Batched replay of Qnovo_AFC, see test_config.c */
+t_uint32 test_replay_block(t_uint32 Le_n_Steps,
+                           void **La_Cmp_InputDst,
+                           void **La_Cmp_InputSrc,
+                           t_uint32 *La_n_InputSize,
+                           t_uint32 Le_n_Inputs,
+                           void **La_Cmp_OutputSrc,
+                           void **La_Cmp_OutputDst,
+                           t_uint32 *La_n_OutputSize,
+                           t_uint32 Le_n_Outputs,
+                           void **La_Cmp_DeobfuscateDst,
+                           t_uint32 *La_n_DeobfuscateCount,
+                           t_uint8 *La_Cmp_DeobfuscateKey,
+                           t_uint32 Le_n_Deobfuscate);
 extern t_U_millivolt_cell  cell_volts_temp[192];
 extern LIB_CircBuffHandle_t Input_CircBuffHandle_t;
 extern t_uint8*             ele_addr;
@@ -0,0 +1,401 @@
+"""Post-run analysis of the charge time estimates (CTE).
+
+``qnovo_cte`` publishes a ``time_80`` and a ``time_end_soc`` estimate, in minutes, for the current charger and for a
+fixed set of charger classes. :class:`CteEstimateRecorder` copies all of them into one ``(steps, chargers, 2)`` array
+during the replay, one NumPy copy per step. :func:`analyze_cte_estimates` then checks the whole run at once:
+
+- rises: an estimate larger than the one of the step before, within a charge session.
+- jumps: an estimate that moved by more than ``jump_minutes`` from the step before.
+- the step at which each estimate of a session reaches zero, and from it the actual charge time.
+- the deviation of the actual charge time from the estimate at the start of the session, against the accepted KPI.
+
+Two rules differ from the row-by-row checks the CTE suite used to run. An estimate is compared with the step before only
+while its own previous value is non-zero, where the loop gated every estimate on the previous ``charging.time_80``. And
+every plugged-in period of the log is a session of its own, with its own expected and actual charge time, where the loop
+took the first charging row with a ``time_80`` in the log as the only session start and compared all following rows,
+charging or not.
+
+:class:`CteCallTimer` records how many ``qnovo_cte`` calls each row needed to converge and how long they took.
+
+Adding a charger class is one more entry in :data:`CTE_CHARGERS`.
+"""
+
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .replay import ctype_dtype, ffi
+from .sim_clock import AFC_TICK_MS, CTE_TICK_MS
+
+# Members of CTE_ESTIMATES_T, one per charger class. "charging" is the charger currently plugged in.
+CTE_CHARGERS = (
+    "charging",
+    "charger_350_kw",
+    "charger_50_kw",
+    "charger_10_9_kw",
+    "charger_10_kw",
+    "charger_3_2_kw",
+    "charger_2_88_kw",
+    "charger_2_76_kw",
+    "charger_2_64_kw",
+    "charger_2_45_kw",
+)
+CTE_ESTIMATES = ("time_80", "time_end_soc")
+
+# One replay step is one AFC call.
+STEP_MINUTES = AFC_TICK_MS / 60000
+
+# CTE calls per AFC call: CTE runs every CTE_TICK_MS.
+CTE_CALL_BUDGET = AFC_TICK_MS // CTE_TICK_MS
+
+
+def _member_type(ctype, *names: str):
+    for name in names:
+        ctype = dict(ctype.fields)[name].type
+    return ctype
+
+
+class CteEstimateRecorder:
+    """Records the CTE estimates of every replay step into a preallocated array.
+
+    Args:
+        lib: The loaded shared library.
+        steps: Expected number of steps, the array grows if more are recorded.
+        chargers: Charger class members of the estimates struct, the second axis of :attr:`estimates`.
+        global_name: Name of the ``CTE_ESTIMATES_T`` global.
+    """
+
+    def __init__(
+        self, lib, steps: int, chargers: Sequence[str] = CTE_CHARGERS, global_name: str = "cte_estimates"
+    ) -> None:
+        self.chargers = tuple(chargers)
+        self.steps = 0
+        self._buffer = np.zeros((max(steps, 1), len(self.chargers), len(CTE_ESTIMATES)), dtype=np.int64)
+
+        struct = ffi.addressof(lib, global_name)
+        ctype = ffi.typeof(struct).item
+        members = [(charger, estimate) for charger in self.chargers for estimate in CTE_ESTIMATES]
+        dtypes = {ctype_dtype(_member_type(ctype, *member)) for member in members}
+        offsets = np.array([ffi.offsetof(ctype, *member) for member in members])
+
+        # The estimates share one type, so the struct is viewed as an array of it and a step is a single take.
+        dtype = dtypes.pop()
+        if dtypes or np.any(offsets % dtype.itemsize):
+            raise TypeError(f"The estimates of {global_name} do not share one aligned integer type")
+        self._flat = np.frombuffer(ffi.buffer(struct), dtype=dtype, count=ffi.sizeof(ctype) // dtype.itemsize)
+        self._index = (offsets // dtype.itemsize).reshape(len(self.chargers), len(CTE_ESTIMATES))
+
+    def record(self) -> None:
+        """Appends the current estimates as the next step."""
+
+        if self.steps == len(self._buffer):
+            self._buffer = np.concatenate([self._buffer, np.zeros_like(self._buffer)])
+        self._buffer[self.steps] = self._flat[self._index]
+        self.steps += 1
+
+    @property
+    def estimates(self) -> np.ndarray:
+        """The recorded estimates, shape ``(steps, chargers, 2)`` with ``time_80`` and ``time_end_soc`` last."""
+
+        return self._buffer[: self.steps]
+
+
+class CteCallTimer:
+    """Counts and times the ``qnovo_cte`` calls of every replay row.
+
+    On target CTE runs every 100 ms and gets at most ``budget`` calls per AFC second to reach ``cte_status == 0``. The
+    timer records, per row, how many calls were made and how long each took, measured around the cffi call with
+    ``perf_counter_ns``, so the times include the small constant cost of the call itself.
+
+    Args:
+        steps: Expected number of rows, the arrays grow if more are recorded.
+        budget: Calls available per row.
+    """
+
+    def __init__(self, steps: int, budget: int = CTE_CALL_BUDGET) -> None:
+        self.budget = budget
+        self.rows = 0
+        self._calls = np.zeros(max(steps, 1), dtype=np.int32)
+        self._converged = np.zeros(max(steps, 1), dtype=bool)
+        self._call_ns = np.zeros((max(steps, 1), budget), dtype=np.int64)
+        self._current = 0
+
+    def call(self, fn: Callable, *args):
+        """Calls ``fn(*args)`` as the next CTE call of the current row and returns its result."""
+
+        start = perf_counter_ns()
+        result = fn(*args)
+        elapsed = perf_counter_ns() - start
+        self._reserve_row()
+        if self._current < self.budget:
+            self._call_ns[self.rows, self._current] = elapsed
+        self._current += 1
+        return result
+
+    def _reserve_row(self) -> None:
+        if self.rows == len(self._calls):
+            self._calls = np.concatenate([self._calls, np.zeros_like(self._calls)])
+            self._converged = np.concatenate([self._converged, np.zeros_like(self._converged)])
+            self._call_ns = np.concatenate([self._call_ns, np.zeros_like(self._call_ns)])
+
+    def end_row(self, converged: bool) -> None:
+        """Closes the current row.
+
+        Args:
+            converged: ``cte_status`` reached 0 within the row's calls.
+        """
+
+        self._reserve_row()
+        self._calls[self.rows] = self._current
+        self._converged[self.rows] = converged
+        self.rows += 1
+        self._current = 0
+
+    @property
+    def calls(self) -> np.ndarray:
+        """Calls made per row."""
+
+        return self._calls[: self.rows]
+
+    @property
+    def call_us(self) -> np.ndarray:
+        """``(rows, budget)`` duration of each call in microseconds, 0 past the row's last call."""
+
+        return self._call_ns[: self.rows] / 1000
+
+    @property
+    def row_us(self) -> np.ndarray:
+        """Total time of the CTE calls of each row in microseconds."""
+
+        return self.call_us.sum(axis=1)
+
+    @property
+    def exhausted(self) -> np.ndarray:
+        """Per row, True if all ``budget`` calls were used without reaching ``cte_status == 0``."""
+
+        return ~self._converged[: self.rows] & (self.calls >= self.budget)
+
+    def summary(self) -> Dict[str, float]:
+        """Returns the worst case of the run: most calls, slowest call and row, and the number of exhausted rows."""
+
+        return {
+            "rows": self.rows,
+            "max_calls": int(self.calls.max()) if self.rows else 0,
+            "max_call_us": float(self.call_us.max()) if self.rows else 0.0,
+            "max_row_us": float(self.row_us.max()) if self.rows else 0.0,
+            "exhausted_rows": int(self.exhausted.sum()),
+        }
+
+    def histograms(self) -> Tuple[Dict[str, List], Dict[str, List]]:
+        """Returns the calls-per-row and call time distributions as tables for :func:`format_cte_report`."""
+
+        counts = np.bincount(self.calls, minlength=self.budget + 1)
+        exhausted = np.bincount(self.calls[self.exhausted], minlength=self.budget + 1)
+        calls_table = {
+            "Calls": list(range(len(counts))),
+            "Rows": counts.tolist(),
+            "Exhausted": exhausted.tolist(),
+        }
+
+        durations = self.call_us[self.call_us > 0]
+        top = max(float(durations.max()) if len(durations) else 1.0, 1.0)
+        edges = 2.0 ** np.arange(0, int(np.ceil(np.log2(top))) + 1)
+        edges = np.concatenate([[0.0], edges])
+        counts, _ = np.histogram(durations, bins=edges)
+        latency_table = {
+            "Call time (us)": [f"<= {edge:g}" for edge in edges[1:]],
+            "Calls": counts.tolist(),
+        }
+        return calls_table, latency_table
+
+
+def charge_sessions(charging: np.ndarray, started: Optional[np.ndarray] = None) -> np.ndarray:
+    """Finds the charge sessions of a replay.
+
+    A session starts at the first charging step of a plugged-in period that ``started`` allows and ends with the
+    period.
+
+    Args:
+        charging: Per step, True while the battery is charging.
+        started: Per step, True if a session may start there, e.g. the log had a charge time estimate. Any charging
+                 step by default.
+
+    Returns:
+        np.ndarray: ``(sessions, 2)`` array of first and one-past-last step.
+    """
+
+    charging = np.asarray(charging, dtype=bool)
+    eligible = charging if started is None else charging & np.asarray(started, dtype=bool)
+
+    # Plugged-in periods are the maximal runs of charging steps.
+    edges = np.diff(np.concatenate([[False], charging, [False]]).astype(np.int8))
+    period_starts = np.flatnonzero(edges == 1)
+    period_ends = np.flatnonzero(edges == -1)
+
+    # First eligible step at or after each period start.
+    eligible_steps = np.flatnonzero(eligible)
+    if not len(eligible_steps):
+        return np.zeros((0, 2), dtype=np.int64)
+    first = np.searchsorted(eligible_steps, period_starts)
+    found = first < len(eligible_steps)
+    starts = np.where(found, eligible_steps[np.minimum(first, len(eligible_steps) - 1)], period_ends)
+    keep = starts < period_ends
+    return np.stack([starts[keep], period_ends[keep]], axis=1)
+
+
+def analyze_cte_estimates(
+    estimates: np.ndarray,
+    charging: np.ndarray,
+    started: Optional[np.ndarray] = None,
+    accepted_deviation: float = 15,
+    jump_minutes: float = 5,
+    step_minutes: float = STEP_MINUTES,
+) -> Dict[str, np.ndarray]:
+    """Checks the recorded CTE estimates of a replay.
+
+    Args:
+        estimates: ``(steps, chargers, 2)`` estimates in minutes, see :class:`CteEstimateRecorder`.
+        charging: Per step, True while the battery is charging.
+        started: Per step, True if a session may start there, see :func:`charge_sessions`.
+        accepted_deviation: Largest accepted deviation of the actual from the estimated charge time, in percent.
+        jump_minutes: Largest accepted change of an estimate from one step to the next.
+        step_minutes: Length of a replay step in minutes.
+
+    Returns:
+        dict: Per step masks ``rises`` and ``jumps`` (``estimates``' shape, True at the later step), and per session
+        ``sessions`` (first and end step), ``expected`` (estimate at the first step), ``zero_step`` (first step with a
+        zero estimate, -1 if none), ``actual`` (minutes from the first to the zero step), ``deviation`` (percent, NaN
+        where expected or actual is zero) and ``above_kpi``, each ``(sessions, chargers, 2)``.
+    """
+
+    estimates = np.asarray(estimates, dtype=np.int64)
+    sessions = charge_sessions(charging, started)
+
+    # Step k is compared with step k - 1 if both belong to the same session and the earlier estimate was running.
+    session_of = np.full(len(estimates), -1)
+    for number, (start, end) in enumerate(sessions):
+        session_of[start:end] = number
+    paired = np.zeros(len(estimates), dtype=bool)
+    paired[1:] = (session_of[1:] >= 0) & (session_of[1:] == session_of[:-1])
+    previous = np.zeros_like(estimates)
+    previous[1:] = estimates[:-1]
+    running = paired[:, None, None] & (previous > 0)
+    rises = running & (estimates > previous)
+    jumps = running & (np.abs(estimates - previous) > jump_minutes)
+
+    shape = (len(sessions),) + estimates.shape[1:]
+    expected = np.zeros(shape, dtype=np.int64)
+    zero_step = np.full(shape, -1, dtype=np.int64)
+    for number, (start, end) in enumerate(sessions):
+        window = estimates[start:end] == 0
+        expected[number] = estimates[start]
+        zero_step[number] = np.where(window.any(axis=0), start + window.argmax(axis=0), -1)
+
+    actual = np.where(zero_step >= 0, (zero_step - sessions[:, :1, None]) * step_minutes, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = np.abs(actual - expected) / ((actual + expected) / 2) * 100
+    deviation[(expected == 0) | (actual == 0)] = np.nan
+
+    return {
+        "rises": rises,
+        "jumps": jumps,
+        "sessions": sessions,
+        "expected": expected,
+        "zero_step": zero_step,
+        "actual": actual,
+        "deviation": deviation,
+        "above_kpi": deviation > accepted_deviation,
+    }
+
+
+def session_counts(mask: np.ndarray, sessions: np.ndarray) -> np.ndarray:
+    """Counts the True steps of a per step mask of :func:`analyze_cte_estimates` within each session.
+
+    Returns:
+        np.ndarray: ``(sessions, chargers, 2)`` counts.
+    """
+
+    counts = np.zeros((len(sessions),) + mask.shape[1:], dtype=np.int64)
+    for number, (start, end) in enumerate(sessions):
+        counts[number] = mask[start:end].sum(axis=0)
+    return counts
+
+
+def cte_events(
+    analysis: Dict[str, np.ndarray], estimates: np.ndarray, chargers: Sequence[str] = CTE_CHARGERS
+) -> Iterator[Dict]:
+    """Yields the findings of an analysis as events for :class:`event_log.DiagnosticsLog`.
+
+    Args:
+        analysis: Output of :func:`analyze_cte_estimates`.
+        estimates: The analysed estimates.
+        chargers: Charger classes of the analysed estimates.
+
+    Yields:
+        dict: ``rise`` and ``jump`` events at the step of the new estimate, ``above_kpi`` events at the step the
+        estimate reached zero, with the actual and expected charge time.
+    """
+
+    for rule, mask in (("rise", analysis["rises"]), ("jump", analysis["jumps"])):
+        for step, j, k in np.argwhere(mask).tolist():
+            yield {
+                "step": step,
+                "charger": chargers[j],
+                "metric": CTE_ESTIMATES[k],
+                "value": int(estimates[step, j, k]),
+                "previous": int(estimates[step - 1, j, k]),
+                "rule": rule,
+            }
+
+    for session, j, k in np.argwhere(analysis["above_kpi"]).tolist():
+        yield {
+            "step": int(analysis["zero_step"][session, j, k]),
+            "charger": chargers[j],
+            "metric": CTE_ESTIMATES[k],
+            "value": float(analysis["actual"][session, j, k]),
+            "previous": int(analysis["expected"][session, j, k]),
+            "rule": "above_kpi",
+            "session": session,
+            "deviation": round(float(analysis["deviation"][session, j, k]), 2),
+        }
+
+
+def cte_report(analysis: Dict[str, np.ndarray], chargers: Sequence[str] = CTE_CHARGERS) -> Dict[str, List]:
+    """Tabulates an analysis, one row per session, charger class and estimate.
+
+    Args:
+        analysis: Output of :func:`analyze_cte_estimates`.
+        chargers: Charger classes of the analysed estimates.
+
+    Returns:
+        dict: Column name to values, ready for ``write_output_to_excel`` or :func:`format_cte_report`.
+    """
+
+    sessions = analysis["sessions"]
+    session, charger, estimate = np.indices(analysis["expected"].shape).reshape(3, -1)
+
+    return {
+        "Session": session.tolist(),
+        "Start step": sessions[session, 0].tolist(),
+        "Charger": [chargers[j] for j in charger],
+        "Estimate": [CTE_ESTIMATES[k] for k in estimate],
+        "Expected (min)": analysis["expected"].ravel().tolist(),
+        "Zero step": analysis["zero_step"].ravel().tolist(),
+        "Actual (min)": np.round(analysis["actual"].ravel(), 2).tolist(),
+        "Deviation (%)": np.round(analysis["deviation"].ravel(), 2).tolist(),
+        "Above KPI": analysis["above_kpi"].ravel().tolist(),
+        "Rises": session_counts(analysis["rises"], sessions).ravel().tolist(),
+        "Jumps": session_counts(analysis["jumps"], sessions).ravel().tolist(),
+    }
+
+
+def format_cte_report(report: Dict[str, List]) -> str:
+    """Formats a :func:`cte_report` table as aligned text, e.g. for the CTE test log."""
+
+    columns = list(report)
+    cells = [[str(value) for value in report[column]] for column in columns]
+    widths = [max([len(column)] + [len(cell) for cell in column_cells]) for column, column_cells in zip(columns, cells)]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines.extend("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in zip(*cells))
+    return "\n".join(lines)
@@ -0,0 +1,263 @@
+"""Accuracy and throughput benchmark of the CTE over all CTE logs of a folder.
+
+The CTE suite replays the one log named in its source. :func:`run_cte_benchmark` replays every log in a folder whose
+header has the ``cte_input_params`` columns, one log per :class:`lib_pool.LibraryPool` task, each on a fresh copy of the
+library. Every log gets the same treatment as in the suite: ``qnovo_cte`` up to :data:`cte_analysis.CTE_CALL_BUDGET`
+times per row, the estimates of all charger classes recorded and checked with
+:func:`cte_analysis.analyze_cte_estimates`. The consolidated report has two tables:
+
+- accuracy: per log, charger class and estimate, the deviation of the actual from the estimated charge time over the
+  log's charge sessions, the sessions above the KPI, and the rises and jumps of the estimate.
+- throughput: per log, the rows replayed, the replay time and rows per second, and the worst CTE convergence, plus the
+  wall time of the whole run.
+
+Usage::
+
+    python -m tst.cte_benchmark <folder> [--workers N] [--output report.json]
+
+The library is located through ``AFC_LIB_PATH`` and ``AFC_LIB_HEADERS``, see :mod:`lib_pool`.
+"""
+
+import argparse
+import json
+import os
+from os.path import basename, join
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cte_analysis import (
+    CTE_CHARGERS,
+    CTE_ESTIMATES,
+    CteCallTimer,
+    CteEstimateRecorder,
+    analyze_cte_estimates,
+    format_cte_report,
+    session_counts,
+)
+from .cte_sweep import AFC_CTE_INFO_MAGIC, CTE_SWEEP_INPUTS
+from .lib_pool import LibraryPool
+from .log_cache import load_log_arrays
+from .log_decode import LOG_FILE_SUFFIXES, open_table
+from .log_schema import compile_log_decoder
+from .replay import ffi
+
+_CTE_MARKER_COLUMN = "cte_input_params.soc_start"
+
+decode_cte_inputs = compile_log_decoder("cte_inputs")
+
+
+def find_cte_logs(folder_path: str) -> List[str]:
+    """Returns the logs of a folder that carry CTE inputs, sorted by name."""
+
+    found = []
+    for name in sorted(os.listdir(folder_path)):
+        file_path = join(folder_path, name)
+        if not os.path.isfile(file_path) or not name.endswith(LOG_FILE_SUFFIXES):
+            continue
+        with open_table(file_path) as (header, _):
+            if _CTE_MARKER_COLUMN in header:
+                found.append(file_path)
+    return found
+
+
+def replay_cte_log(
+    lib, file_path: str, setup: Optional[Callable] = None, accepted_deviation: float = 15
+) -> Dict:
+    """Replays the CTE inputs of one log and analyses the estimates.
+
+    Args:
+        lib: The loaded shared library.
+        file_path: CTE log, see :func:`find_cte_logs`.
+        setup: Optional ``fn(lib)`` run before the replay, e.g. ``initialize_parameters``.
+        accepted_deviation: Deviation KPI in percent, see :func:`cte_analysis.analyze_cte_estimates`.
+
+    Returns:
+        dict: ``log`` name, ``rows``, replay ``seconds``, the ``convergence`` summary of :class:`CteCallTimer` and the
+        per-session arrays of :func:`analyze_cte_estimates` with per-session ``rises`` and ``jumps`` counts.
+    """
+
+    if setup is not None:
+        setup(lib)
+    log = load_log_arrays(file_path, decode_cte_inputs)
+    points = np.stack([log[f"cte_input_params.{name}"] for name in CTE_SWEEP_INPUTS], axis=1).astype(np.int64)
+    charging_now = log["cte_input_params.charging_now"].astype(np.int64)
+
+    cte = lib.qnovo_cte
+    info = ffi.addressof(lib, "afc_cte_info")
+    estimates = ffi.addressof(lib, "cte_estimates")
+    status = ffi.cast("uint32_t *", ffi.addressof(lib, "cte_status"))
+    info_data = [0] * len(lib.afc_cte_info.data)
+    recorder = CteEstimateRecorder(lib, steps=len(points))
+    timer = CteCallTimer(steps=len(points))
+
+    start = perf_counter()
+    for point, charging in zip(points.tolist(), charging_now.tolist()):
+        lib.VeAPI_b_EVSEChgStatus = charging
+        lib.afc_cte_info.magic = AFC_CTE_INFO_MAGIC
+        lib.afc_cte_info.data = info_data
+        for _ in range(timer.budget):
+            timer.call(cte, *point, charging, info, estimates, status)
+            if status[0] == 0:
+                break
+        timer.end_row(converged=status[0] == 0)
+        recorder.record()
+    seconds = perf_counter() - start
+
+    analysis = analyze_cte_estimates(
+        recorder.estimates,
+        charging=charging_now == 1,
+        started=log["cte_result.charging.time_80"] > 0,
+        accepted_deviation=accepted_deviation,
+    )
+    return {
+        "log": basename(file_path),
+        "rows": len(points),
+        "seconds": seconds,
+        "convergence": timer.summary(),
+        "sessions": analysis["sessions"],
+        "expected": analysis["expected"],
+        "actual": analysis["actual"],
+        "deviation": analysis["deviation"],
+        "above_kpi": analysis["above_kpi"],
+        "rises": session_counts(analysis["rises"], analysis["sessions"]),
+        "jumps": session_counts(analysis["jumps"], analysis["sessions"]),
+    }
+
+
+def run_cte_benchmark(
+    file_paths: Sequence[str],
+    lib=None,
+    pool: Optional[LibraryPool] = None,
+    setup: Optional[Callable] = None,
+    accepted_deviation: float = 15,
+) -> Tuple[List[Dict], float]:
+    """Replays CTE logs, in parallel when a pool is given.
+
+    Args:
+        file_paths: CTE logs, see :func:`find_cte_logs`.
+        lib: Library for a serial run in this process, each log continues from the state the previous one left.
+        pool: Pool of library worker processes, used instead of ``lib``. Each log runs on a fresh library.
+        setup: Module-level ``fn(lib)`` run before each log.
+        accepted_deviation: Deviation KPI in percent.
+
+    Returns:
+        tuple: The results of :func:`replay_cte_log` in ``file_paths`` order, and the wall time of the run in seconds.
+
+    Raises:
+        ValueError: If neither ``lib`` nor ``pool`` is given.
+    """
+
+    start = perf_counter()
+    if pool is not None:
+        futures = [
+            pool.submit(replay_cte_log, file_path, setup=setup, accepted_deviation=accepted_deviation)
+            for file_path in file_paths
+        ]
+        results = [future.result() for future in futures]
+    elif lib is not None:
+        results = [
+            replay_cte_log(lib, file_path, setup=setup, accepted_deviation=accepted_deviation)
+            for file_path in file_paths
+        ]
+    else:
+        raise ValueError("A CTE benchmark needs a library or a LibraryPool")
+    return results, perf_counter() - start
+
+
+def accuracy_table(results: Sequence[Dict], chargers: Sequence[str] = CTE_CHARGERS) -> Dict[str, List]:
+    """Tabulates the estimate accuracy, one row per log, charger class and estimate.
+
+    Sessions where the estimate never reached zero, or started at zero, have no deviation and are not counted.
+    """
+
+    table: Dict[str, List] = {
+        column: []
+        for column in (
+            "Log",
+            "Charger",
+            "Estimate",
+            "Sessions",
+            "Mean deviation (%)",
+            "Max deviation (%)",
+            "Above KPI",
+            "Rises",
+            "Jumps",
+        )
+    }
+    for result in results:
+        deviation = result["deviation"]
+        measured = ~np.isnan(deviation)
+        count = measured.sum(axis=0)
+        with np.errstate(invalid="ignore"):
+            mean = np.where(count > 0, np.nansum(deviation, axis=0) / np.maximum(count, 1), np.nan)
+        worst = np.where(count > 0, np.nanmax(np.where(measured, deviation, -np.inf), axis=0), np.nan)
+        for j, charger in enumerate(chargers):
+            for k, estimate in enumerate(CTE_ESTIMATES):
+                table["Log"].append(result["log"])
+                table["Charger"].append(charger)
+                table["Estimate"].append(estimate)
+                table["Sessions"].append(int(count[j, k]))
+                table["Mean deviation (%)"].append(round(float(mean[j, k]), 2))
+                table["Max deviation (%)"].append(round(float(worst[j, k]), 2))
+                table["Above KPI"].append(int(result["above_kpi"][:, j, k].sum()))
+                table["Rises"].append(int(result["rises"][:, j, k].sum()))
+                table["Jumps"].append(int(result["jumps"][:, j, k].sum()))
+    return table
+
+
+def throughput_table(results: Sequence[Dict], wall_seconds: float) -> Dict[str, List]:
+    """Tabulates the replay speed and CTE convergence per log, with a total row for the whole run."""
+
+    table: Dict[str, List] = {
+        column: []
+        for column in ("Log", "Rows", "Replay (s)", "Rows/s", "Max calls", "Max call (us)", "Exhausted rows")
+    }
+
+    def add(log: str, rows: int, seconds: float, convergence: Dict) -> None:
+        table["Log"].append(log)
+        table["Rows"].append(rows)
+        table["Replay (s)"].append(round(seconds, 3))
+        table["Rows/s"].append(round(rows / seconds, 1) if seconds > 0 else 0.0)
+        table["Max calls"].append(convergence["max_calls"])
+        table["Max call (us)"].append(round(convergence["max_call_us"], 1))
+        table["Exhausted rows"].append(convergence["exhausted_rows"])
+
+    for result in results:
+        add(result["log"], result["rows"], result["seconds"], result["convergence"])
+    worst = {
+        key: max((result["convergence"][key] for result in results), default=0)
+        for key in ("max_calls", "max_call_us")
+    }
+    worst["exhausted_rows"] = sum(result["convergence"]["exhausted_rows"] for result in results)
+    add("TOTAL (wall time)", sum(result["rows"] for result in results), wall_seconds, worst)
+    return table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("folder", help="folder of CTE logs, e.g. tst/test_data/time_based/input_data")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to AFC_LIB_WORKERS")
+    parser.add_argument("--output", help="write both tables to this JSON file")
+    args = parser.parse_args()
+
+    # Same library state as the CTE suite's setup_parameters fixture.
+    from .__main__ import initialize_parameters
+
+    file_paths = find_cte_logs(args.folder)
+    with LibraryPool(max_workers=args.workers) as pool:
+        results, wall_seconds = run_cte_benchmark(file_paths, pool=pool, setup=initialize_parameters)
+
+    tables = {"accuracy": accuracy_table(results), "throughput": throughput_table(results, wall_seconds)}
+    for name, table in tables.items():
+        print(f"{name}:")
+        print(format_cte_report(table))
+        print()
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(tables, file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
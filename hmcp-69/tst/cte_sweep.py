@@ -0,0 +1,227 @@
+"""Sweeps of ``qnovo_cte`` over its input space.
+
+The CTE suite only drives ``qnovo_cte`` along recorded logs. A sweep evaluates it on generated input points instead, a
+full grid (:func:`sweep_grid`) or a Latin hypercube sample (:func:`sweep_latin_hypercube`) over the inputs in
+:data:`CTE_SWEEP_INPUTS`. Every point starts from the same library state, restored from a
+:class:`lib_snapshot.LibrarySnapshot`, and ``qnovo_cte`` is called until it reports ``cte_status == 0`` or gives up
+after ``max_calls`` calls. :func:`run_cte_sweep` splits the points into chunks and runs them on a
+:class:`lib_pool.LibraryPool`, each worker process on its own copy of the library.
+
+The result is one ``(points, chargers, 2)`` array of estimates with the status and number of calls per point, saved
+with :func:`save_sweep` as a compressed ``.npz``. A grid sweep reshapes into a cube with one axis per input for heatmaps
+(:func:`sweep_cube`), and :func:`diff_sweeps` lists the points where two builds disagree.
+"""
+
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cte_analysis import CTE_CHARGERS, CTE_ESTIMATES, CteEstimateRecorder
+from .lib_pool import LibraryPool
+from .lib_snapshot import LibrarySnapshot
+from .replay import ffi
+
+# Inputs of qnovo_cte in argument order, as named in the cte_input_params log columns.
+CTE_SWEEP_INPUTS = ("soc_start", "soc_end", "tb_min", "tb_max", "ambient_temp", "pwr_chg", "battcap_mah")
+
+# Value of afc_cte_info.magic for valid AFC data, as set by the CTE suite.
+AFC_CTE_INFO_MAGIC = 0x6C47
+
+_SWEEP_VERSION = 1
+
+
+def sweep_grid(axes: Dict[str, Sequence[int]]) -> Tuple[np.ndarray, Tuple[int, ...]]:
+    """Returns every combination of the given input values.
+
+    Args:
+        axes: Values of each input of :data:`CTE_SWEEP_INPUTS`. An input with a single value is held constant.
+
+    Returns:
+        tuple: ``(points, shape)``, the ``(N, 7)`` points with the last input varying fastest, and the grid shape for
+        :func:`sweep_cube`.
+
+    Raises:
+        KeyError: If an input has no values.
+    """
+
+    values = [np.asarray(axes[name], dtype=np.int64).ravel() for name in CTE_SWEEP_INPUTS]
+    mesh = np.meshgrid(*values, indexing="ij")
+    return np.stack([axis.ravel() for axis in mesh], axis=1), tuple(len(axis) for axis in values)
+
+
+def sweep_latin_hypercube(bounds: Dict[str, Tuple[int, int]], points: int, seed: int = 0) -> np.ndarray:
+    """Samples input points so that every input covers its range evenly.
+
+    Each input range is cut into ``points`` strata, each stratum is sampled once, and the strata of the inputs are
+    paired by independent random permutations.
+
+    Args:
+        bounds: Inclusive ``(low, high)`` range of each input of :data:`CTE_SWEEP_INPUTS`.
+        points: Number of points.
+        seed: Seed of the sample, the same seed gives the same points.
+
+    Returns:
+        np.ndarray: ``(points, 7)`` integer points.
+    """
+
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in CTE_SWEEP_INPUTS:
+        low, high = bounds[name]
+        unit = (rng.permutation(points) + rng.random(points)) / points
+        columns.append(np.floor(low + unit * (high - low + 1)).astype(np.int64).clip(low, high))
+    return np.stack(columns, axis=1)
+
+
+def evaluate_cte_points(
+    lib, points: np.ndarray, max_calls: int = 100, charging_now: int = 1, setup: Optional[Callable] = None
+) -> Dict[str, np.ndarray]:
+    """Runs ``qnovo_cte`` to convergence for each input point.
+
+    Args:
+        lib: The loaded shared library.
+        points: ``(N, 7)`` inputs in :data:`CTE_SWEEP_INPUTS` order.
+        max_calls: Calls per point before giving up on ``cte_status == 0``.
+        charging_now: Value of the charging flag argument.
+        setup: Optional ``fn(lib)`` bringing a fresh library into the state every point starts from.
+
+    Returns:
+        dict: ``estimates`` ``(N, chargers, 2)``, ``status`` (``cte_status`` after the last call, 0 if converged) and
+        ``calls`` per point.
+    """
+
+    if setup is not None:
+        setup(lib)
+    lib.afc_cte_info.magic = AFC_CTE_INFO_MAGIC
+    lib.afc_cte_info.data = [0] * len(lib.afc_cte_info.data)
+    snapshot = LibrarySnapshot(lib)
+
+    cte = lib.qnovo_cte
+    info = ffi.addressof(lib, "afc_cte_info")
+    estimates = ffi.addressof(lib, "cte_estimates")
+    status = ffi.cast("uint32_t *", ffi.addressof(lib, "cte_status"))
+    recorder = CteEstimateRecorder(lib, steps=len(points))
+    final_status = np.zeros(len(points), dtype=np.uint32)
+    calls = np.zeros(len(points), dtype=np.int32)
+
+    for i, point in enumerate(points.tolist()):
+        snapshot.restore()
+        count = 0
+        while count < max_calls:
+            cte(*point, charging_now, info, estimates, status)
+            count += 1
+            if status[0] == 0:
+                break
+        recorder.record()
+        final_status[i] = status[0]
+        calls[i] = count
+
+    return {"estimates": recorder.estimates, "status": final_status, "calls": calls}
+
+
+def run_cte_sweep(
+    points: np.ndarray,
+    lib=None,
+    pool: Optional[LibraryPool] = None,
+    chunk_size: int = 20000,
+    max_calls: int = 100,
+    setup: Optional[Callable] = None,
+) -> Dict[str, np.ndarray]:
+    """Evaluates all points, in parallel when a pool is given.
+
+    Args:
+        points: ``(N, 7)`` inputs in :data:`CTE_SWEEP_INPUTS` order.
+        lib: Library for a serial sweep in this process. Its globals are restored after every point but keep the state
+             of the last point afterwards.
+        pool: Pool of library worker processes, used instead of ``lib``.
+        chunk_size: Points per pool task.
+        max_calls: Calls per point before giving up, see :func:`evaluate_cte_points`.
+        setup: Module-level ``fn(lib)`` run on each worker library before its chunk, e.g. ``initialize_parameters``.
+
+    Returns:
+        dict: ``points`` and the arrays of :func:`evaluate_cte_points` for all points, in input order.
+
+    Raises:
+        ValueError: If neither ``lib`` nor ``pool`` is given.
+    """
+
+    points = np.asarray(points, dtype=np.int64)
+    if pool is None:
+        if lib is None:
+            raise ValueError("A CTE sweep needs a library or a LibraryPool")
+        result = evaluate_cte_points(lib, points, max_calls=max_calls, setup=setup)
+    else:
+        futures = [
+            pool.submit(evaluate_cte_points, points[start : start + chunk_size], max_calls=max_calls, setup=setup)
+            for start in range(0, len(points), chunk_size)
+        ]
+        chunks = [future.result() for future in futures]
+        result = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in ("estimates", "status", "calls")}
+    return {"points": points, **result}
+
+
+def save_sweep(file_path: str, result: Dict[str, np.ndarray], grid_shape: Optional[Tuple[int, ...]] = None) -> None:
+    """Writes a sweep result to a compressed ``.npz`` file, see :func:`load_sweep`."""
+
+    np.savez_compressed(
+        file_path,
+        version=_SWEEP_VERSION,
+        inputs=np.array(CTE_SWEEP_INPUTS),
+        chargers=np.array(CTE_CHARGERS),
+        estimate_names=np.array(CTE_ESTIMATES),
+        grid_shape=np.array(grid_shape or (), dtype=np.int64),
+        **result,
+    )
+
+
+def load_sweep(file_path: str) -> Dict[str, np.ndarray]:
+    """Reads a sweep result written by :func:`save_sweep`.
+
+    Raises:
+        ValueError: If the file was written by an incompatible version of this module.
+    """
+
+    with np.load(file_path) as data:
+        result = {key: data[key] for key in data.files}
+    if int(result.pop("version")) != _SWEEP_VERSION:
+        raise ValueError(f"{file_path} is not a CTE sweep of version {_SWEEP_VERSION}")
+    return result
+
+
+def sweep_cube(result: Dict[str, np.ndarray], grid_shape: Tuple[int, ...]) -> np.ndarray:
+    """Reshapes the estimates of a grid sweep to ``(*grid_shape, chargers, 2)``, one axis per input."""
+
+    estimates = result["estimates"]
+    return estimates.reshape(tuple(grid_shape) + estimates.shape[1:])
+
+
+def diff_sweeps(
+    baseline: Dict[str, np.ndarray], candidate: Dict[str, np.ndarray], tolerance: int = 0
+) -> Dict[str, np.ndarray]:
+    """Compares two sweeps over the same points, e.g. of two library builds.
+
+    Args:
+        baseline: Reference sweep result.
+        candidate: Sweep result to check.
+        tolerance: Largest accepted difference of an estimate, in minutes.
+
+    Returns:
+        dict: ``index`` of the differing points, their ``points``, the ``delta`` of their estimates (candidate minus
+        baseline) and whether their ``status`` changed.
+
+    Raises:
+        ValueError: If the sweeps were run over different points.
+    """
+
+    if not np.array_equal(baseline["points"], candidate["points"]):
+        raise ValueError("The sweeps were run over different points")
+
+    delta = candidate["estimates"].astype(np.int64) - baseline["estimates"].astype(np.int64)
+    status_changed = candidate["status"] != baseline["status"]
+    index = np.flatnonzero((np.abs(delta) > tolerance).any(axis=(1, 2)) | status_changed)
+    return {
+        "index": index,
+        "points": baseline["points"][index],
+        "delta": delta[index],
+        "status_changed": status_changed[index],
+    }
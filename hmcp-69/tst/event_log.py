@@ -0,0 +1,192 @@
+"""Buffered, structured diagnostics of a replay.
+
+The time-based suites used to report findings by opening a text log in append mode, writing one formatted line and
+closing it again, for every finding. :class:`DiagnosticsLog` collects findings as events instead, dicts with at least
+``step``, ``charger``, ``metric``, ``value``, ``previous`` and ``rule``, and writes them once when the replay is done:
+
+- ``<path>.jsonl`` (default) or ``<path>.parquet``, one record per event, for querying with pandas, DuckDB or ``jq``.
+- ``<path>.txt``, a short summary: the number of events per rule and metric, followed by free-text notes.
+
+With ``background=True`` JSONL events are handed to a writer thread as they are added, so a long replay neither holds
+them all in memory nor waits for the disk. ``AFC_EVENT_LOG_FORMAT`` selects the format when the caller does not.
+"""
+
+import json
+import os
+import queue
+import threading
+from collections import Counter
+from os.path import splitext
+from typing import Dict, Iterable, List, Optional
+
+EVENT_LOG_FORMAT_ENV = "AFC_EVENT_LOG_FORMAT"
+EVENT_LOG_FORMATS = ("jsonl", "parquet")
+
+EVENT_FIELDS = ("step", "charger", "metric", "value", "previous", "rule")
+
+_STOP = object()
+
+
+def _json_default(value):
+    # NumPy scalars, e.g. from indexing a recorded array.
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class DiagnosticsLog:
+    """Collects the diagnostic events of one replay and writes them in one go.
+
+    Args:
+        path: Output path without extension, e.g. ``processed_CTE_cte_test_log_1``. A given extension is dropped.
+        fmt: ``"jsonl"`` or ``"parquet"``. Defaults to ``AFC_EVENT_LOG_FORMAT``, then to ``"jsonl"``.
+        background: Write JSONL events from a writer thread while the replay runs.
+
+    Raises:
+        ValueError: If the format is not supported, or ``background`` is requested for Parquet.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, background: bool = False) -> None:
+        self.fmt = fmt or os.environ.get(EVENT_LOG_FORMAT_ENV) or "jsonl"
+        if self.fmt not in EVENT_LOG_FORMATS:
+            raise ValueError(f"Unsupported event log format {self.fmt!r}, use one of {', '.join(EVENT_LOG_FORMATS)}")
+        if background and self.fmt != "jsonl":
+            raise ValueError("Only JSONL event logs can be written in the background")
+
+        self.path = splitext(path)[0]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._events: List[Dict] = []
+        self._notes: List[str] = []
+        self._counts: Counter = Counter()
+        self._flushed = False
+
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._writer: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._write_queued, name="diagnostics-log", daemon=True)
+            self._writer.start()
+
+    @property
+    def events_path(self) -> str:
+        """File the events are written to."""
+
+        return f"{self.path}.{self.fmt}"
+
+    @property
+    def summary_path(self) -> str:
+        """File the text summary is written to."""
+
+        return f"{self.path}.txt"
+
+    @property
+    def count(self) -> int:
+        """Number of events added so far."""
+
+        return sum(self._counts.values())
+
+    def event(
+        self,
+        step: int,
+        charger: Optional[str],
+        metric: str,
+        value,
+        previous=None,
+        rule: str = "",
+        **fields,
+    ) -> None:
+        """Adds one event.
+
+        Args:
+            step: Replay step the event belongs to.
+            charger: Charger class, None if the event is not specific to one.
+            metric: Checked quantity, e.g. ``"time_80"``.
+            value: Value at ``step``.
+            previous: Value it was compared with, if any.
+            rule: Name of the violated rule, e.g. ``"rise"``.
+            **fields: Further JSON-serializable fields of the event.
+        """
+
+        record = {
+            "step": step,
+            "charger": charger,
+            "metric": metric,
+            "value": value,
+            "previous": previous,
+            "rule": rule,
+            **fields,
+        }
+        self._counts[(rule, metric)] += 1
+        if self._queue is not None:
+            self._queue.put(record)
+        else:
+            self._events.append(record)
+
+    def extend(self, events: Iterable[Dict]) -> None:
+        """Adds events given as dicts with the :data:`EVENT_FIELDS` keys."""
+
+        for record in events:
+            self.event(**record)
+
+    def note(self, text: str) -> None:
+        """Adds free text to the summary, e.g. a formatted result table."""
+
+        self._notes.append(text)
+
+    def summary(self) -> str:
+        """Returns the text summary: event counts per rule and metric, then the notes."""
+
+        lines = [f"{self.count} events, see {os.path.basename(self.events_path)}"]
+        lines.extend(f"  {rule or '-'} {metric}: {count}" for (rule, metric), count in sorted(self._counts.items()))
+        return "\n".join(lines + [""] + self._notes)
+
+    def _write_queued(self) -> None:
+        with open(self.events_path, "w") as file:
+            while True:
+                record = self._queue.get()
+                if record is _STOP:
+                    break
+                file.write(json.dumps(record, default=_json_default))
+                file.write("\n")
+
+    def flush(self) -> None:
+        """Writes the events and the summary. Later calls do nothing.
+
+        Raises:
+            ImportError: If Parquet output is requested and ``pyarrow`` is not installed.
+        """
+
+        if self._flushed:
+            return
+        self._flushed = True
+
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+        elif self.fmt == "jsonl":
+            with open(self.events_path, "w") as file:
+                for record in self._events:
+                    file.write(json.dumps(record, default=_json_default))
+                    file.write("\n")
+        else:
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError as error:
+                raise ImportError("Writing .parquet event logs needs the 'pyarrow' package") from error
+            records = [json.loads(json.dumps(record, default=_json_default)) for record in self._events]
+            # from_pylist takes its columns from the first record, so every record gets every key, None where absent.
+            keys = list(dict.fromkeys(key for record in records for key in record))
+            table = pyarrow.Table.from_pylist([{key: record.get(key) for key in keys} for record in records])
+            pyarrow.parquet.write_table(table, self.events_path, compression="zstd")
+
+        with open(self.summary_path, "w") as file:
+            file.write(self.summary())
+            file.write("\n")
+        self._events = []
+
+    def __enter__(self) -> "DiagnosticsLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
@@ -0,0 +1,214 @@
+"""Independent instances of the AFC library for parallel replays.
+
+The library keeps all of its state in globals (``s_AFC_Calc``, ``s_AFC_Track``, ``AFC_VM_VoltageImbalance``, the NVM
+regions, the circular log buffer), and ``ffi.dlopen`` returns the same handle for the same file, so every test shares
+one instance. Loading a private copy of the shared library gives an instance with its own globals, freshly
+initialised from the library image.
+
+:func:`open_isolated_lib` loads such a copy in the calling process. Calls into the library release the GIL, so copies
+can be driven from threads, e.g. with :func:`replay.replay_block`. :class:`LibraryPool` runs each task in a worker
+process on a fresh copy and in a private working directory, so the time-based suites can spread their log files over
+all cores.
+
+The library build is located through two environment variables: ``AFC_LIB_PATH`` points at the ``.so``/``.dll`` and
+``AFC_LIB_HEADERS`` at the directory of the headers the cffi declarations are extracted from. ``AFC_LIB_WORKERS`` sets
+the number of worker processes the suites use, 0 (the default) keeps the serial replay on the shared ``lib`` fixture.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from os.path import basename, dirname, exists, join, splitext
+from typing import Callable, Dict, Optional, Tuple
+
+import cffi
+
+from .xdist_worker import worker_dir
+
+LIB_PATH_ENV = "AFC_LIB_PATH"
+LIB_HEADERS_ENV = "AFC_LIB_HEADERS"
+LIB_WORKERS_ENV = "AFC_LIB_WORKERS"
+
+# One FFI per set of declarations and process, parsing the headers is the slow part of loading a library.
+_FFIS: Dict[str, cffi.FFI] = {}
+# Library copies loaded by this process, by id of the loaded library: (lib, copy path, temporary dir or None).
+_COPIES: Dict[int, Tuple[object, str, Optional[str]]] = {}
+_instance_count = 0
+
+
+def lib_workers() -> int:
+    """Returns the number of library worker processes requested through ``AFC_LIB_WORKERS``, 0 if unset."""
+
+    return int(os.environ.get(LIB_WORKERS_ENV) or 0)
+
+
+def library_declarations(header_dir: str) -> str:
+    """Extracts the cffi declarations of the library from its headers.
+
+    Mirrors the TAF loader: headers in include-dependency order with ``qnovo_types.h`` first.
+
+    Args:
+        header_dir: Directory holding the library and test harness headers.
+
+    Returns:
+        str: Declarations for ``ffi.cdef``.
+    """
+
+    from src.common.utils import HeaderDependencyOrder, HeaderExtractDeclarations
+
+    header_files = HeaderDependencyOrder(header_dir).get_ordered_headers()
+    types_index = next((i for i, file in enumerate(header_files) if basename(file) == "qnovo_types.h"), None)
+    if types_index:
+        header_files[0], header_files[types_index] = header_files[types_index], header_files[0]
+    return HeaderExtractDeclarations().get_declarations(header_files)
+
+
+def locate_library() -> Tuple[str, str]:
+    """Returns the library path and its declarations from ``AFC_LIB_PATH`` and ``AFC_LIB_HEADERS``.
+
+    Raises:
+        FileNotFoundError: If a variable is unset or points at nothing.
+    """
+
+    lib_path = os.environ.get(LIB_PATH_ENV)
+    header_dir = os.environ.get(LIB_HEADERS_ENV)
+    if not lib_path or not exists(lib_path):
+        raise FileNotFoundError(f"Set {LIB_PATH_ENV} to the shared library to load, got {lib_path!r}")
+    if not header_dir or not os.path.isdir(header_dir):
+        raise FileNotFoundError(f"Set {LIB_HEADERS_ENV} to the library header directory, got {header_dir!r}")
+    return lib_path, library_declarations(header_dir)
+
+
+def _get_ffi(declarations: str) -> cffi.FFI:
+    key = hashlib.blake2b(declarations.encode("utf-8"), digest_size=16).hexdigest()
+    ffi = _FFIS.get(key)
+    if ffi is None:
+        ffi = _FFIS[key] = cffi.FFI()
+        ffi.cdef(declarations)
+    return ffi
+
+
+def open_isolated_lib(lib_path: str, declarations: str, copy_dir: Optional[str] = None):
+    """Loads a private copy of the shared library, with globals independent of every other loaded instance.
+
+    The copy is deleted again by :func:`close_isolated_lib`.
+
+    Args:
+        lib_path: Path to the built ``.so``/``.dll``.
+        declarations: cffi declarations of the library, see :func:`library_declarations`.
+        copy_dir: Directory for the copy, a new temporary directory by default.
+
+    Returns:
+        The loaded library.
+    """
+
+    global _instance_count
+    _instance_count += 1
+
+    stem, suffix = splitext(basename(lib_path))
+    tmp_dir = None if copy_dir else tempfile.mkdtemp(prefix="afc_lib_")
+    copy_path = join(copy_dir or tmp_dir, f"{stem}_{os.getpid()}_{_instance_count}{suffix}")
+    shutil.copy2(lib_path, copy_path)
+
+    lib = _get_ffi(declarations).dlopen(copy_path)
+    _COPIES[id(lib)] = (lib, copy_path, tmp_dir)
+    return lib
+
+
+def close_isolated_lib(lib, declarations: str) -> None:
+    """Unloads a library loaded by :func:`open_isolated_lib` and deletes its copy."""
+
+    _, copy_path, tmp_dir = _COPIES.pop(id(lib))
+    _get_ffi(declarations).dlclose(lib)
+    try:
+        os.remove(copy_path)
+        if tmp_dir:
+            os.rmdir(tmp_dir)
+    except OSError:
+        # Windows keeps the file locked if the library is still referenced, the temp dir is cleaned up later.
+        pass
+
+
+def _run_isolated(lib_path: str, declarations: str, fn: Callable, args: tuple, kwargs: dict):
+    """Worker entry point: runs ``fn(lib, *args, **kwargs)`` on a fresh library instance.
+
+    The NVM emulation writes its ``.dat`` files to the working directory, which all workers share, so every task runs
+    in a private directory. Its ``.dat`` files are deleted afterwards, other files it wrote are moved back.
+    """
+
+    base_dir = os.getcwd()
+    task_dir = worker_dir(base_dir, f"pool{os.getpid()}")
+    os.chdir(task_dir)
+    lib = open_isolated_lib(lib_path, declarations)
+    try:
+        return fn(lib, *args, **kwargs)
+    finally:
+        close_isolated_lib(lib, declarations)
+        os.chdir(base_dir)
+        for entry in os.scandir(task_dir):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".dat"):
+                os.remove(entry.path)
+            else:
+                os.replace(entry.path, join(base_dir, entry.name))
+        for path in (task_dir, dirname(task_dir)):
+            try:
+                os.rmdir(path)
+            except OSError:
+                # Subdirectories written by the task, or the directories of tasks still running.
+                break
+
+
+class LibraryPool:
+    """Runs tasks in worker processes, each task on its own freshly loaded library instance.
+
+    Tasks start from the library's initial state, like the first test of a serial run, so their results do not depend
+    on which worker or in which order they ran.
+
+    Args:
+        max_workers: Number of worker processes. Defaults to ``AFC_LIB_WORKERS``, then to the number of CPUs.
+        lib_path: Path to the built library. Defaults to ``AFC_LIB_PATH``.
+        declarations: cffi declarations of the library. Defaults to the headers in ``AFC_LIB_HEADERS``.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        lib_path: Optional[str] = None,
+        declarations: Optional[str] = None,
+    ) -> None:
+        if lib_path is None or declarations is None:
+            located_path, located_declarations = locate_library()
+            lib_path = lib_path or located_path
+            declarations = declarations or located_declarations
+
+        self._lib_path = lib_path
+        self._declarations = declarations
+        self._executor = ProcessPoolExecutor(max_workers=max_workers or lib_workers() or None)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedules ``fn(lib, *args, **kwargs)`` on a fresh library instance.
+
+        Args:
+            fn: Module-level callable taking the library as first argument. It is pickled by name, so it cannot be a
+                lambda or a nested function.
+
+        Returns:
+            Future: Resolves to the return value of ``fn``, which must be picklable.
+        """
+
+        return self._executor.submit(_run_isolated, self._lib_path, self._declarations, fn, args, kwargs)
+
+    def close(self) -> None:
+        """Cancels the tasks that have not started and shuts the workers down."""
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "LibraryPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,266 @@
+"""Byte-level snapshots of the library state.
+
+``setup_parameters`` brings the library into a known state by assigning hundreds of globals from Python lists and
+running the NVM initialisation. The resulting state is the same for every test, so :class:`LibrarySnapshot` records the
+bytes of all exported globals once after the first setup and copies them back before the following tests. Globals are
+sorted by address and neighbours are merged into a few contiguous regions, a restore is a handful of ``memmove`` calls.
+
+Everything the library keeps in exported globals is covered: parameters, tracking and calculation structs, the NVM
+regions, the logging circular buffer. ``static`` variables inside the library are covered only where they sit between
+exported globals. :meth:`LibrarySnapshot.state` exports the recorded bytes so that a later run can load them again, see
+:mod:`replay_checkpoint`.
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import cffi
+
+ffi = cffi.FFI()
+
+SNAPSHOT_DISABLE_ENV = "AFC_SETUP_SNAPSHOT_DISABLE"
+
+# Regions are not merged across pages: a gap between two globals may hold read-only data of a neighbouring section.
+_PAGE_SIZE = 4096
+
+
+def snapshots_enabled() -> bool:
+    """Returns False if ``AFC_SETUP_SNAPSHOT_DISABLE`` is set, making ``setup_parameters`` run in full for every test."""
+
+    return not os.environ.get(SNAPSHOT_DISABLE_ENV)
+
+
+def exported_globals(lib) -> List[Tuple[str, int, int]]:
+    """Lists the global variables declared for a loaded library.
+
+    Functions, enum values and macro constants are skipped.
+
+    Args:
+        lib: The loaded shared library.
+
+    Returns:
+        list: ``(name, address, size)`` of every global variable, sorted by address.
+    """
+
+    found = []
+    for name in dir(lib):
+        try:
+            pointer = ffi.addressof(lib, name)
+        except (AttributeError, TypeError, ffi.error):
+            # Constants have no address.
+            continue
+        ctype = ffi.typeof(pointer)
+        if ctype.kind == "array":
+            # Array globals are returned as the array itself.
+            nbytes = ffi.sizeof(ctype)
+        elif ctype.kind == "pointer":
+            nbytes = ffi.sizeof(ctype.item)
+        else:
+            # Functions give function pointers.
+            continue
+        found.append((name, int(ffi.cast("uintptr_t", pointer)), nbytes))
+
+    return sorted(found, key=lambda item: item[1])
+
+
+def _pointer_offsets(ctype, offset: int = 0) -> List[int]:
+    """Returns the byte offsets of the pointers inside a value of type ``ctype``."""
+
+    if ctype.kind in ("pointer", "function"):
+        return [offset]
+    if ctype.kind == "array":
+        item_offsets = _pointer_offsets(ctype.item)
+        if not item_offsets:
+            return []
+        item_size = ffi.sizeof(ctype.item)
+        return [offset + index * item_size + item for index in range(ctype.length) for item in item_offsets]
+    if ctype.kind in ("struct", "union"):
+        return [
+            pointer
+            for _, field in ctype.fields or ()
+            if field.bitsize < 0
+            for pointer in _pointer_offsets(field.type, offset + field.offset)
+        ]
+    return []
+
+
+def _merge_regions(variables: List[Tuple[str, int, int]], max_gap: int) -> List[Tuple[int, int]]:
+    regions: List[List[int]] = []
+    for _, address, nbytes in variables:
+        if regions:
+            start, end = regions[-1]
+            same_page = (end - 1) // _PAGE_SIZE == address // _PAGE_SIZE
+            if address - end <= max_gap and same_page:
+                regions[-1][1] = max(end, address + nbytes)
+                continue
+        regions.append([address, address + nbytes])
+    return [(start, end - start) for start, end in regions]
+
+
+class LibrarySnapshot:
+    """Copy of the memory of a loaded library's globals, restorable in place.
+
+    Args:
+        lib: The loaded shared library.
+        names: Globals to include, all exported globals by default.
+        max_gap: Largest gap in bytes between two globals that is copied along to merge them into one region. Gaps are
+                 alignment padding and ``static`` variables of the library.
+    """
+
+    def __init__(self, lib, names: Optional[List[str]] = None, max_gap: int = 64) -> None:
+        variables = exported_globals(lib)
+        if names is not None:
+            missing = set(names).difference(name for name, _, _ in variables)
+            if missing:
+                raise AttributeError(f"Not a global variable of the library: {', '.join(sorted(missing))}")
+            variables = [variable for variable in variables if variable[0] in names]
+
+        self._lib = lib
+        self.names = [name for name, _, _ in variables]
+        regions = _merge_regions(variables, max_gap)
+        self._regions = [(ffi.cast("char *", address), nbytes) for address, nbytes in regions]
+        self._base = regions[0][0] if regions else 0
+        self._layout = [(name, address - self._base, nbytes) for name, address, nbytes in variables]
+
+        # Pointers stored in the globals, as (region, offset), relocated when a state from another process is loaded.
+        self._pointers: List[Tuple[int, int]] = []
+        region = 0
+        for name, address, _ in variables:
+            while address >= regions[region][0] + regions[region][1]:
+                region += 1
+            pointer = ffi.addressof(lib, name)
+            ctype = ffi.typeof(pointer) if ffi.typeof(pointer).kind == "array" else ffi.typeof(pointer).item
+            start = address - regions[region][0]
+            self._pointers.extend((region, start + offset) for offset in _pointer_offsets(ctype))
+
+        self._images: List[bytes] = []
+        self.capture()
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes held by the snapshot."""
+
+        return sum(nbytes for _, nbytes in self._regions)
+
+    def capture(self) -> None:
+        """Records the current state of the globals, replacing the previous one."""
+
+        self._images = [ffi.buffer(pointer, nbytes)[:] for pointer, nbytes in self._regions]
+
+    def restore(self) -> int:
+        """Writes the recorded state back into the library.
+
+        Regions that still hold the recorded bytes are not written, so globals the library placed in read-only memory
+        (its ``const`` tables, whose qualifier the cffi declarations drop) are never touched.
+
+        Returns:
+            int: Number of regions that had changed and were restored.
+        """
+
+        restored = 0
+        for (pointer, nbytes), image in zip(self._regions, self._images):
+            if ffi.buffer(pointer, nbytes)[:] != image:
+                ffi.memmove(pointer, image, nbytes)
+                restored += 1
+        return restored
+
+    def state(self) -> Dict:
+        """Returns the recorded state as a picklable dict, for :meth:`load_state` in this or a later process."""
+
+        return {"layout": self._layout, "base": self._base, "images": list(self._images)}
+
+    def load_state(self, state: Dict) -> int:
+        """Makes a state returned by :meth:`state` the recorded one and writes it into the library.
+
+        The state may come from another process that loaded the same library build at a different address. Pointers
+        held by the globals are then moved by the same distance as the library.
+
+        Args:
+            state: State returned by :meth:`state`.
+
+        Returns:
+            int: Number of regions that had changed and were restored.
+
+        Raises:
+            ValueError: If the state was recorded for a different library build or set of globals.
+        """
+
+        if [tuple(variable) for variable in state["layout"]] != self._layout:
+            raise ValueError("The state was recorded for a different library build or set of globals")
+
+        images = list(state["images"])
+        shift = self._base - state["base"]
+        if shift:
+            width = ffi.sizeof("void *")
+            relocated = [bytearray(image) for image in images]
+            for region, offset in self._pointers:
+                image = relocated[region]
+                value = int.from_bytes(image[offset : offset + width], sys.byteorder)
+                if value:
+                    image[offset : offset + width] = ((value + shift) % (1 << (8 * width))).to_bytes(width, sys.byteorder)
+            images = [bytes(image) for image in relocated]
+
+        self._images = images
+        return self.restore()
+
+
+class DatFileSnapshot:
+    """Copy of the NVM ``.dat`` files in a directory, restorable in place.
+
+    The NVM initialisation writes the ``.dat`` files the library reads and writes its NVM regions from. They are part of
+    the state after setup as much as the globals are, and ``setup_parameters`` deletes them after every test, so they
+    are recorded next to a :class:`LibrarySnapshot` and written back with it.
+
+    Args:
+        path: Directory holding the ``.dat`` files.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._files: Dict[str, bytes] = {}
+        self.capture()
+
+    def _dat_files(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.path) if name.endswith(".dat"))
+
+    def capture(self) -> None:
+        """Records the current ``.dat`` files, replacing the previous ones."""
+
+        files = {}
+        for name in self._dat_files():
+            with open(os.path.join(self.path, name), "rb") as file:
+                files[name] = file.read()
+        self._files = files
+
+    def state(self) -> Dict[str, bytes]:
+        """Returns the recorded files as a picklable dict of file name to content, for :meth:`load_state`."""
+
+        return dict(self._files)
+
+    def load_state(self, state: Dict[str, bytes]) -> int:
+        """Makes files returned by :meth:`state` the recorded ones and writes them back.
+
+        Args:
+            state: Files returned by :meth:`state`, in this or an earlier process.
+
+        Returns:
+            int: Number of files written.
+        """
+
+        self._files = dict(state)
+        return self.restore()
+
+    def restore(self) -> int:
+        """Writes the recorded ``.dat`` files back and deletes ``.dat`` files created since.
+
+        Returns:
+            int: Number of files written.
+        """
+
+        for name in set(self._dat_files()).difference(self._files):
+            os.remove(os.path.join(self.path, name))
+        for name, data in self._files.items():
+            with open(os.path.join(self.path, name), "wb") as file:
+                file.write(data)
+        return len(self._files)
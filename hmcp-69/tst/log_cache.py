@@ -0,0 +1,270 @@
+"""Binary columnar cache for time-based replay input logs.
+
+The time-based tests replay multi-MB vehicle logs (192 cell columns plus 18 temperature columns per row). Parsing those
+files row by row into Python ints is paid on every test session. This module decodes a log once into typed NumPy
+arrays and stores them as a bundle of ``.npy`` files next to the input log. The bundle is keyed by the content hash of
+the log and the version of the decoder that produced it, so later runs memory-map the arrays instead of re-parsing.
+
+:class:`LogDataset` does the same for a whole folder of logs, decoding the files in a process pool.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from os.path import basename, dirname, exists, join, splitext
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .log_decode import column_group_positions
+
+LOG_CACHE_DIR = "_log_cache"
+LOG_CACHE_VERSION = 1  # Bump when the bundle layout itself changes.
+LOG_CACHE_DISABLE_ENV = "AFC_LOG_CACHE_DISABLE"
+
+_META_FILE = "meta.json"
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_content_hash(file_path: str) -> str:
+    """Calculates the BLAKE2b hash of a file's content.
+
+    Args:
+        file_path: Path to the file to hash.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_csv_columns(
+    file_path: str,
+    columns: Dict[str, type],
+    groups: Optional[Dict[str, str]] = None,
+    group_dtype: type = np.int32,
+) -> Dict[str, np.ndarray]:
+    """Reads selected columns of a CSV log into typed NumPy arrays.
+
+    Header positions are resolved once. Wide layouts such as ``cell_1 .. cell_192`` are gathered into a single
+    ``(N, n)`` array per group, ordered by the numeric suffix of the column name.
+
+    Args:
+        file_path: Path to the CSV log.
+        columns: Mapping of scalar column name to the dtype it is stored as. Values are parsed as float first, so
+                 integer dtypes truncate toward zero like ``int(float(value))``.
+        groups: Mapping of output name to column prefix, e.g. ``{"cell": "cell_"}``.
+        group_dtype: Dtype of the grouped arrays.
+
+    Returns:
+        dict: Column name (or group name) to array.
+
+    Raises:
+        KeyError: If a requested column or group is not present in the header.
+    """
+
+    groups = groups or {}
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = [row for row in reader if row]
+
+    table = np.asarray(rows, dtype=object) if rows else np.empty((0, len(header)), dtype=object)
+    arrays = {}
+
+    for name, dtype in columns.items():
+        index = header.index(name)
+        arrays[name] = table[:, index].astype(np.float64).astype(dtype)
+
+    for name, prefix in groups.items():
+        positions = column_group_positions(header, prefix)
+        arrays[name] = table[:, positions].astype(np.float64).astype(group_dtype)
+
+    return arrays
+
+
+def _bundle_dir(file_path: str, decoder_name: str, decoder_version: int, cache_dir: Optional[str]) -> str:
+    cache_root = cache_dir or join(dirname(file_path), LOG_CACHE_DIR)
+    stem = splitext(basename(file_path))[0]
+    content_hash = file_content_hash(file_path)
+    return join(
+        cache_root,
+        f"{stem}-{content_hash}-{decoder_name}-v{LOG_CACHE_VERSION}.{decoder_version}",
+    )
+
+
+def _write_bundle(bundle_dir: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Writes the arrays to a temporary directory and moves it into place, so readers never see a partial bundle."""
+
+    os.makedirs(dirname(bundle_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=dirname(bundle_dir), prefix=".tmp-")
+    try:
+        files: List[Dict[str, str]] = []
+        for i, (name, array) in enumerate(arrays.items()):
+            file_name = f"col_{i}.npy"
+            np.save(join(tmp_dir, file_name), np.ascontiguousarray(array))
+            files.append({"name": name, "file": file_name})
+
+        with open(join(tmp_dir, _META_FILE), "w", encoding="utf-8") as file:
+            json.dump({"columns": files}, file, indent=2)
+
+        os.replace(tmp_dir, bundle_dir)
+    except OSError:
+        # Another process finished the same bundle first.
+        if not exists(join(bundle_dir, _META_FILE)):
+            raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_bundle(bundle_dir: str, mmap: bool) -> Dict[str, np.ndarray]:
+    with open(join(bundle_dir, _META_FILE), "r", encoding="utf-8") as file:
+        meta = json.load(file)
+
+    mmap_mode = "r" if mmap else None
+    return {
+        col["name"]: np.load(join(bundle_dir, col["file"]), mmap_mode=mmap_mode)
+        for col in meta["columns"]
+    }
+
+
+def load_log_arrays(
+    file_path: str,
+    decoder: Callable[[str], Dict[str, np.ndarray]],
+    decoder_version: int = 1,
+    cache_dir: Optional[str] = None,
+    mmap: bool = True,
+) -> Dict[str, np.ndarray]:
+    """Returns the decoded arrays of a log, decoding and caching it on first use.
+
+    The cache bundle is keyed by the log's content hash, the decoder name and ``decoder_version``. Editing the log or
+    bumping the decoder version creates a new bundle, stale bundles are left in place and can be removed with
+    :func:`clear_log_cache`. Set the ``AFC_LOG_CACHE_DISABLE`` environment variable to always decode from source.
+
+    Args:
+        file_path: Path to the input log.
+        decoder: Callable that turns the log into a dict of column name to array.
+        decoder_version: Version of the decoder output; bump it whenever the decoder changes what it returns.
+        cache_dir: Directory that holds the bundles. Defaults to ``_log_cache`` next to the input log.
+        mmap: Memory-map the cached arrays (read-only) instead of loading them into memory.
+
+    Returns:
+        dict: Column name to array, in the order returned by the decoder.
+    """
+
+    if os.environ.get(LOG_CACHE_DISABLE_ENV):
+        return decoder(file_path)
+
+    bundle_dir = _prepare_bundle(file_path, decoder, decoder_version, cache_dir)
+    return _read_bundle(bundle_dir, mmap)
+
+
+def _prepare_bundle(
+    file_path: str,
+    decoder: Callable[[str], Dict[str, np.ndarray]],
+    decoder_version: int,
+    cache_dir: Optional[str],
+) -> str:
+    """Decodes the log into its cache bundle unless the bundle already exists and returns the bundle directory."""
+
+    bundle_dir = _bundle_dir(file_path, decoder.__name__, decoder_version, cache_dir)
+    if not exists(join(bundle_dir, _META_FILE)):
+        _write_bundle(bundle_dir, decoder(file_path))
+    return bundle_dir
+
+
+def clear_log_cache(path: str) -> None:
+    """Deletes the ``_log_cache`` directory next to a log file or inside a data directory.
+
+    Args:
+        path: Path to a log file or to the directory holding the logs.
+    """
+
+    root = path if os.path.isdir(path) else dirname(path)
+    shutil.rmtree(join(root, LOG_CACHE_DIR), ignore_errors=True)
+
+
+class LogDataset:
+    """Decodes every log of a dataset in a process pool.
+
+    All files are submitted to the pool on construction. Each worker decodes one log into its cache bundle and only
+    returns the bundle directory, the arrays are then memory-mapped in the calling process, so nothing large is
+    pickled between processes. Looking up a log waits for that log alone, so the replay of the first file can start
+    while the remaining files are still being decoded.
+
+    With ``AFC_LOG_CACHE_DISABLE`` set the workers return the decoded arrays instead.
+
+    Args:
+        file_paths: Paths of the logs, in the order they are iterated.
+        decoder: Module-level callable that turns a log into a dict of column name to array. It is pickled by name, so
+                 it cannot be a lambda or a nested function.
+        decoder_version: Version of the decoder output, see :func:`load_log_arrays`.
+        cache_dir: Directory that holds the bundles. Defaults to ``_log_cache`` next to each log.
+        max_workers: Number of worker processes. Defaults to the number of CPUs.
+        mmap: Memory-map the cached arrays (read-only) instead of loading them into memory.
+    """
+
+    def __init__(
+        self,
+        file_paths: Iterable[str],
+        decoder: Callable[[str], Dict[str, np.ndarray]],
+        decoder_version: int = 1,
+        cache_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        mmap: bool = True,
+    ) -> None:
+        self._mmap = mmap
+        self._cache_disabled = bool(os.environ.get(LOG_CACHE_DISABLE_ENV))
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._futures: Dict[str, Future] = {}
+
+        for file_path in file_paths:
+            key = os.path.abspath(file_path)
+            if self._cache_disabled:
+                future = self._executor.submit(decoder, key)
+            else:
+                future = self._executor.submit(_prepare_bundle, key, decoder, decoder_version, cache_dir)
+            self._futures[key] = future
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def __contains__(self, file_path: str) -> bool:
+        return os.path.abspath(file_path) in self._futures
+
+    def __getitem__(self, file_path: str) -> Dict[str, np.ndarray]:
+        """Returns the decoded arrays of one log, waiting for its worker if needed.
+
+        Raises:
+            KeyError: If the log is not part of the dataset.
+            Exception: Any exception raised by the decoder for this log.
+        """
+
+        result = self._futures[os.path.abspath(file_path)].result()
+        return result if self._cache_disabled else _read_bundle(result, self._mmap)
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+        """Yields ``(file_path, arrays)`` in dataset order, each as soon as that log is ready."""
+
+        for file_path in self._futures:
+            yield file_path, self[file_path]
+
+    def close(self) -> None:
+        """Cancels the logs that have not started decoding and shuts the pool down."""
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "LogDataset":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
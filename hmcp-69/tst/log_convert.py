@@ -0,0 +1,112 @@
+"""Converts replay logs to compressed or columnar storage.
+
+The time-based test data is mostly plain CSV. :func:`convert_log_file` rewrites a CSV log as ``.csv.gz``,
+``.csv.zst`` or ``.parquet`` (zstd compressed), which every loader built on ``open_table`` reads transparently.
+Parquet files also allow column projection and row filters when reading.
+
+Usage::
+
+    python -m tst.log_convert <file or folder> [--format parquet|csv.gz|csv.zst] [--remove-source]
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+from os.path import isdir, join
+from typing import List
+
+from .log_decode import NULL_TOKEN
+
+CONVERT_FORMATS = ("parquet", "csv.gz", "csv.zst")
+
+
+def convert_log_file(file_path: str, fmt: str = "parquet", remove_source: bool = False) -> str:
+    """Rewrites one CSV log in a compressed or columnar format next to the source.
+
+    Compressed CSV keeps the file byte for byte. Parquet stores numeric columns as numbers, bracketed list columns as
+    text and ``null`` / empty values as missing, which the decoders treat the same as the CSV tokens.
+
+    Args:
+        file_path: Path to the ``.csv`` log.
+        fmt: Target format, one of ``parquet``, ``csv.gz`` or ``csv.zst``.
+        remove_source: Delete the CSV once the converted file is written.
+
+    Returns:
+        str: Path of the converted file.
+
+    Raises:
+        ValueError: If the source is not a CSV file or the format is unknown.
+        ImportError: If the package needed for the target format is not installed.
+    """
+
+    file_path = str(file_path)
+    if not file_path.endswith(".csv"):
+        raise ValueError(f"Only .csv logs can be converted: {file_path}")
+    if fmt not in CONVERT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {CONVERT_FORMATS}")
+
+    target = f"{file_path[:-len('.csv')]}.{fmt}"
+    tmp_target = f"{target}.tmp"
+
+    if fmt == "csv.gz":
+        with open(file_path, "rb") as source, gzip.open(tmp_target, "wb", compresslevel=9) as sink:
+            shutil.copyfileobj(source, sink)
+    elif fmt == "csv.zst":
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError("Writing .csv.zst files needs the 'zstandard' package") from error
+        with open(file_path, "rb") as source, open(tmp_target, "wb") as sink:
+            zstandard.ZstdCompressor(level=19).copy_stream(source, sink)
+    else:
+        try:
+            import pyarrow.csv
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError("Writing .parquet files needs the 'pyarrow' package") from error
+        table = pyarrow.csv.read_csv(
+            file_path,
+            convert_options=pyarrow.csv.ConvertOptions(null_values=[NULL_TOKEN, ""], strings_can_be_null=True),
+        )
+        pyarrow.parquet.write_table(table, tmp_target, compression="zstd")
+
+    os.replace(tmp_target, target)
+    if remove_source:
+        os.remove(file_path)
+    return target
+
+
+def convert_log_dataset(folder_path: str, fmt: str = "parquet", remove_source: bool = False) -> List[str]:
+    """Converts every CSV log in a folder, see :func:`convert_log_file`.
+
+    Args:
+        folder_path: Folder holding the ``.csv`` logs. Sub-folders are not visited.
+        fmt: Target format, one of ``parquet``, ``csv.gz`` or ``csv.zst``.
+        remove_source: Delete each CSV once its converted file is written.
+
+    Returns:
+        list: Paths of the converted files, in file name order.
+    """
+
+    names = sorted(name for name in os.listdir(folder_path) if name.endswith(".csv"))
+    return [convert_log_file(join(folder_path, name), fmt, remove_source) for name in names]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", help="CSV log or folder of CSV logs")
+    parser.add_argument("--format", default="parquet", choices=CONVERT_FORMATS)
+    parser.add_argument("--remove-source", action="store_true", help="delete the CSV files after conversion")
+    args = parser.parse_args()
+
+    if isdir(args.path):
+        converted = convert_log_dataset(args.path, args.format, args.remove_source)
+    else:
+        converted = [convert_log_file(args.path, args.format, args.remove_source)]
+    for path in converted:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
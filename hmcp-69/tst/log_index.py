@@ -0,0 +1,225 @@
+"""Charge-session index for time-based replay logs.
+
+Most time-based logs hold one or more charging sessions, i.e. runs of rows where the charging status column
+(``battery_state``, ``EVSEChgStatus``, ``cte_input_params.charging_now``) is non-zero. The index built here records the
+row range, byte range and SOC range of every session, so a test that only cares about one charge can seek straight to
+it instead of replaying the log from row 0. The index is stored as JSON in the ``_log_cache`` directory next to the log
+and keyed by the log's content hash, like the array bundles of :mod:`log_cache`.
+
+Session records are plain dicts::
+
+    {"session": 0, "start_row": 28, "end_row": 2585, "start_offset": 51234, "end_offset": 4410023,
+     "soc_start": 9.0, "soc_end": 100.0}
+
+Row numbers count data rows from 0 (the header is not a row) and ``end_row`` is exclusive. Byte offsets point at the
+start of the line in the CSV file and are None for Excel files.
+"""
+
+import csv
+import json
+import os
+from itertools import islice
+from os.path import basename, dirname, exists, join, splitext
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .log_cache import LOG_CACHE_DIR, file_content_hash
+from .log_decode import iter_column_blocks, open_table
+
+SESSION_INDEX_VERSION = 1
+
+
+def find_sessions(state: Sequence, soc: Optional[Sequence] = None) -> List[Dict]:
+    """Finds the charging sessions in a charging status column.
+
+    Args:
+        state: Charging status per row. Non-zero values mark a charging row.
+        soc: Optional SOC per row, used to fill ``soc_start`` and ``soc_end``.
+
+    Returns:
+        list: One session record per run of charging rows, without byte offsets.
+    """
+
+    charging = np.asarray(state, dtype=np.float64) != 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], charging, [False])).astype(np.int8)))
+    soc = None if soc is None else np.asarray(soc, dtype=np.float64)
+
+    sessions = []
+    for number, (start, end) in enumerate(zip(edges[::2], edges[1::2])):
+        sessions.append(
+            {
+                "session": number,
+                "start_row": int(start),
+                "end_row": int(end),
+                "start_offset": None,
+                "end_offset": None,
+                "soc_start": None if soc is None else float(soc[start]),
+                "soc_end": None if soc is None else float(soc[end - 1]),
+            }
+        )
+    return sessions
+
+
+def _scan_csv(file_path: str, columns: Sequence[str]):
+    """Reads the given columns of a CSV log together with the byte offset of every data row.
+
+    The log is assumed to hold one record per line, which is true for all time-based logs (list columns are quoted but
+    never span lines).
+    """
+
+    offsets = []
+    values = {column: [] for column in columns}
+    with open(file_path, "rb") as file:
+        header = next(csv.reader([file.readline().decode("utf-8-sig")]))
+        positions = [header.index(column) for column in columns]
+        offset = file.tell()
+        for line in iter(file.readline, b""):
+            if line.strip():
+                row = next(csv.reader([line.decode("utf-8")]))
+                offsets.append(offset)
+                for column, position in zip(columns, positions):
+                    values[column].append(row[position])
+            offset = file.tell()
+    offsets.append(offset)
+    return values, offsets
+
+
+def build_session_index(file_path: str, state_column: str, soc_column: Optional[str] = None) -> Dict:
+    """Scans a log once and builds its charge-session index.
+
+    Args:
+        file_path: Path to the .csv or Excel log.
+        state_column: Charging status column, non-zero while charging.
+        soc_column: Optional SOC column recorded at the session boundaries.
+
+    Returns:
+        dict: ``{"file", "state_column", "soc_column", "rows", "sessions"}``.
+
+    Raises:
+        ValueError: If a column is missing or holds a non-numeric value.
+    """
+
+    columns = [state_column] + ([soc_column] if soc_column else [])
+    file_path = str(file_path)
+
+    if file_path.endswith(".csv"):
+        values, offsets = _scan_csv(file_path, columns)
+    else:
+        # Excel rows have no byte offsets, the index only holds row numbers.
+        values = {column: [] for column in columns}
+        with open_table(file_path) as (header, rows):
+            for block in iter_column_blocks(header, rows, columns):
+                for column in columns:
+                    values[column].extend(block[column].tolist())
+        offsets = None
+
+    sessions = find_sessions(values[state_column], values[soc_column] if soc_column else None)
+    if offsets is not None:
+        for session in sessions:
+            session["start_offset"] = offsets[session["start_row"]]
+            session["end_offset"] = offsets[session["end_row"]]
+
+    return {
+        "file": basename(file_path),
+        "state_column": state_column,
+        "soc_column": soc_column,
+        "rows": len(values[state_column]),
+        "sessions": sessions,
+    }
+
+
+def load_session_index(
+    file_path: str,
+    state_column: str,
+    soc_column: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> Dict:
+    """Returns the charge-session index of a log, building and storing it on first use.
+
+    Args:
+        file_path: Path to the .csv or Excel log.
+        state_column: Charging status column, non-zero while charging.
+        soc_column: Optional SOC column recorded at the session boundaries.
+        cache_dir: Directory that holds the index. Defaults to ``_log_cache`` next to the log.
+
+    Returns:
+        dict: The index, see :func:`build_session_index`.
+    """
+
+    file_path = str(file_path)
+    cache_root = cache_dir or join(dirname(file_path), LOG_CACHE_DIR)
+    key = "-".join(column.replace(" ", "_") for column in (state_column, soc_column) if column)
+    index_path = join(
+        cache_root,
+        f"{splitext(basename(file_path))[0]}-{file_content_hash(file_path)}-sessions-{key}-v{SESSION_INDEX_VERSION}.json",
+    )
+
+    if exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    index = build_session_index(file_path, state_column, soc_column)
+    os.makedirs(cache_root, exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=2)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def select_session(index: Dict, session: int) -> Dict:
+    """Returns one session record of an index.
+
+    Args:
+        index: Index returned by :func:`load_session_index`.
+        session: Session number, negative numbers count from the last session.
+
+    Returns:
+        dict: The session record.
+
+    Raises:
+        IndexError: If the log has no such session.
+    """
+
+    sessions = index["sessions"]
+    if not -len(sessions) <= session < len(sessions):
+        raise IndexError(f"Session {session} not found in {index['file']}, it has {len(sessions)} sessions")
+    return sessions[session]
+
+
+def session_rows(index: Dict, session: Optional[int]) -> range:
+    """Returns the row numbers to replay, all rows when ``session`` is None.
+
+    Use this to slice the arrays of a columnar cache bundle.
+    """
+
+    if session is None:
+        return range(index["rows"])
+    record = select_session(index, session)
+    return range(record["start_row"], record["end_row"])
+
+
+def iter_session_rows(file_path: str, record: Dict) -> Iterator[Dict[str, str]]:
+    """Seeks to a session in a CSV log and yields its rows as dicts.
+
+    Args:
+        file_path: Path to the CSV log the index was built from.
+        record: Session record with byte offsets.
+
+    Yields:
+        dict: Column name to value, like ``csv.DictReader``.
+
+    Raises:
+        ValueError: If the record has no byte offsets, i.e. it was built from an Excel file.
+    """
+
+    if record["start_offset"] is None:
+        raise ValueError(f"Session {record['session']} has no byte offsets, seeking needs a CSV log")
+
+    with open(file_path, "rb") as file:
+        header = next(csv.reader([file.readline().decode("utf-8-sig")]))
+        file.seek(record["start_offset"])
+        lines = (line.decode("utf-8") for line in iter(file.readline, b"") if line.strip())
+        for row in islice(csv.reader(lines), record["end_row"] - record["start_row"]):
+            yield dict(zip(header, row))
@@ -0,0 +1,317 @@
+"""Typed input schema registry for the time-based replay logs.
+
+Each replay log format is described once as a schema: a mapping of output name to a field spec that gives the source
+column, how the column is stored (scalar, bracketed list, wide column group, boolean or text), the dtype, an optional
+scale factor (``1000`` for V to mV, ``-100`` for the HMC current sign flip) and what to do with missing values.
+:func:`compile_log_decoder` turns a schema into a decoder that parses the whole log at array speed and plugs into
+:func:`log_cache.load_log_arrays` and :class:`log_cache.LogDataset`.
+
+Scaled values are computed as ``trunc(float(value) * scale)`` for integer dtypes, matching the ``int(float(...))``
+conversions of the hand-written parsers.
+
+Adding a new vehicle log format is a :func:`register_log_schema` call instead of another per-row loop.
+"""
+
+import hashlib
+import re
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from .log_decode import column_group_positions, decode_list_column, decode_nullable_column, open_table
+
+SCALAR = "scalar"
+LIST = "list"
+GROUP = "group"
+BOOL = "bool"
+TEXT = "text"
+
+SKIP = "skip"  # Drop rows where the value is missing.
+PREVIOUS = "previous"  # Carry the last logged value forward.
+
+_TRUE_TOKENS = {"true", "1", "1.0"}
+_FALSE_TOKENS = {"false", "0", "0.0"}
+
+
+def log_field(
+    column: str,
+    dtype: type = np.int32,
+    kind: str = SCALAR,
+    scale: Optional[float] = None,
+    nullable: bool = False,
+    fill: Union[None, str, float] = None,
+) -> Dict:
+    """Describes one output array of a log schema.
+
+    Args:
+        column: Source column name, or the column prefix for a ``GROUP`` field (e.g. ``"cell_"``).
+        dtype: Dtype of the output array.
+        kind: How the column is stored: ``SCALAR``, ``LIST`` (``"[a, b, ...]"``), ``GROUP`` (``cell_1 .. cell_N``),
+              ``BOOL`` (``true``/``false``) or ``TEXT``.
+        scale: Optional factor applied before the cast, negative to flip the sign.
+        nullable: Whether the column can hold ``null`` or empty values.
+        fill: How missing values of a nullable field are handled. None keeps them and adds a ``<name>_null`` mask to
+              the output, ``SKIP`` drops the row, ``PREVIOUS`` carries the last value forward and a number replaces
+              them with that number.
+
+    Returns:
+        dict: The field spec.
+    """
+
+    return {
+        "column": column,
+        "dtype": np.dtype(dtype).str,
+        "kind": kind,
+        "scale": scale,
+        "nullable": nullable,
+        "fill": fill,
+    }
+
+
+# Logging / tuning workbooks sent to HMC: SEVolts lists, rows without a cell voltage sample are skipped.
+LOGGING_SEVOLTS_FIELDS = {
+    "PackSOC": log_field("PackSOC", nullable=True, fill=SKIP),
+    "PackSOC_DR": log_field("PackSOC_DR", nullable=True, fill=SKIP),
+    "PackCurr": log_field("PackCurr", nullable=True, fill=SKIP),
+    "PackCurr_DR": log_field("PackCurr_DR", nullable=True, fill=SKIP),
+    "CellVolts": log_field("SEVolts", kind=LIST, nullable=True, fill=SKIP),
+    "CellVolts_DR": log_field("SEVolts_DR", kind=LIST, nullable=True, fill=SKIP),
+    "MinTempSnsr": log_field("MinTempSnsr", nullable=True, fill=PREVIOUS),
+    "MinTempSnsr_DR": log_field("MinTempSnsr_DR", nullable=True, fill=SKIP),
+    "MaxTempSnsr": log_field("MaxTempSnsr", nullable=True, fill=PREVIOUS),
+    "MaxTempSnsr_DR": log_field("MaxTempSnsr_DR", nullable=True, fill=SKIP),
+    "ChgPackCapcty": log_field("ChgPackCapcty", nullable=True, fill=0),
+    "ChgPackCapcty_DR": log_field("ChgPackCapcty_DR", nullable=True, fill=SKIP),
+    "battery_state": log_field("Battery_State", kind=TEXT),
+    "EVSEChgStatus": log_field("EVSEChgStatus", nullable=True, fill=SKIP),
+}
+
+LOG_SCHEMAS: Dict[str, Dict[str, Dict]] = {
+    # HMC wide CSVs: one column per cell and temperature sensor.
+    "hmc_wide": {
+        "Time": log_field("Time"),
+        "PackSOC": log_field("Real soc", scale=10),
+        "PackCurr": log_field("Current", scale=-100),
+        "battery_state": log_field("battery_state"),
+        "CellVolts": log_field("cell_", kind=GROUP),
+        "TempSnsrs": log_field("temp_", kind=GROUP),
+    },
+    # Behavioral / HTD-dynamics CSVs: API signals with bracketed list columns.
+    "behavioral_list": {
+        "Time": log_field("Time"),
+        "PackSOC": log_field("PackSOC"),
+        "PackSOC_DR": log_field("PackSOC_DR"),
+        "PackCurr": log_field("PackCurr"),
+        "PackCurr_DR": log_field("PackCurr_DR"),
+        "CellVolts": log_field("CellVolts", kind=LIST),
+        "CellVolts_DR": log_field("CellVolts_DR", kind=LIST),
+        "TempSnsrs": log_field("TempSnsrs", kind=LIST),
+        "TempSnsrs_DR": log_field("TempSnsrs_DR", kind=LIST),
+        "MinTempSnsr": log_field("MinTempSnsr"),
+        "MinTempSnsr_DR": log_field("MinTempSnsr_DR"),
+        "MaxTempSnsr": log_field("MaxTempSnsr"),
+        "MaxTempSnsr_DR": log_field("MaxTempSnsr_DR"),
+        "ChgPackCapcty": log_field("ChgPackCapcty"),
+        "ChgPackCapcty_DR": log_field("ChgPackCapcty_DR"),
+        "battery_state": log_field("battery_state", kind=TEXT),
+        "EVSEChgStatus": log_field("EVSEChgStatus"),
+    },
+    # Logging workbooks sent to HMC.
+    "logging_sevolts": LOGGING_SEVOLTS_FIELDS,
+    # Tuning workbooks: the logging layout plus the tuning request and the expected alpha.
+    "tuning_sevolts": {
+        **LOGGING_SEVOLTS_FIELDS,
+        "Apply_Tuning": log_field("ApplyTuning", nullable=True, fill=SKIP),
+        "Tuning_Type": log_field("TuningType", nullable=True, fill=SKIP),
+        "Applied_Alpha": log_field("AppliedAlpha", nullable=True, fill=SKIP),
+        "Expected_Alpha": log_field("ExpectedAlpha", nullable=True, fill=SKIP),
+    },
+    # Voltage-imbalance fleet logs: SE voltages in V, expected results may be null.
+    "fleet_voltage_imbalance": {
+        "time_s": log_field("time_s"),
+        "se_voltages_V": log_field("se_voltages_V", kind=LIST, scale=1000),
+        "is_charging": log_field("is_charging", dtype=np.bool_, kind=BOOL),
+        "new_se_voltage_z_scores": log_field("new_se_voltage_z_scores", np.float64, LIST, nullable=True),
+        "raw_z_scores__": log_field("raw_z_scores__", np.float64, LIST, nullable=True),
+        "noise_floor_threshold": log_field("noise_floor_threshold", np.float64, nullable=True),
+    },
+    # CTE input logs: estimator inputs and the logged charging time.
+    "cte_inputs": {
+        name: log_field(name)
+        for name in (
+            "cte_input_params.soc_start",
+            "cte_input_params.soc_end",
+            "cte_input_params.battcap_mah",
+            "cte_input_params.ambient_temp",
+            "cte_input_params.pwr_chg",
+            "cte_input_params.charging_now",
+            "cte_input_params.tb_min",
+            "cte_input_params.tb_max",
+            "cte_result.charging.time_80",
+        )
+    },
+}
+
+
+def register_log_schema(name: str, fields: Dict[str, Dict]) -> None:
+    """Adds a log format to the registry.
+
+    Args:
+        name: Schema name, used in the decoder name and therefore in the cache key.
+        fields: Mapping of output name to :func:`log_field` spec.
+
+    Raises:
+        ValueError: If a schema with the same name is already registered.
+    """
+
+    if name in LOG_SCHEMAS:
+        raise ValueError(f"Log schema '{name}' is already registered")
+    LOG_SCHEMAS[name] = fields
+
+
+def _fill_previous(array: np.ndarray, mask: np.ndarray, name: str) -> np.ndarray:
+    index = np.where(mask, -1, np.arange(len(mask)))
+    np.maximum.accumulate(index, out=index)
+    if len(index) and index[0] < 0:
+        raise ValueError(f"Field '{name}' is missing in the first row, there is no previous value to carry forward")
+    return array[index]
+
+
+def _decode_scalar(values: List, spec: Dict) -> tuple:
+    if spec["nullable"]:
+        array, mask = decode_nullable_column(values)
+    else:
+        array, mask = np.array(values, dtype=np.float64), np.zeros(len(values), dtype=bool)
+    if spec["scale"] is not None:
+        array = array * spec["scale"]
+    return array.astype(spec["dtype"]), mask
+
+
+def _decode_bool(values: List, name: str) -> np.ndarray:
+    tokens = [str(value).strip().lower() for value in values]
+    unknown = set(tokens) - _TRUE_TOKENS - _FALSE_TOKENS
+    if unknown:
+        raise ValueError(f"Cannot determine boolean for field '{name}': {sorted(unknown)[:5]}")
+    return np.fromiter((token in _TRUE_TOKENS for token in tokens), dtype=bool, count=len(tokens))
+
+
+def decode_with_schema(file_path, fields: Dict[str, Dict], sheet_name: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Decodes a log into typed arrays as described by a schema.
+
+    Args:
+        file_path: Path to the .csv or Excel log.
+        fields: Mapping of output name to :func:`log_field` spec.
+        sheet_name: Excel sheet to read. Defaults to the first sheet.
+
+    Returns:
+        dict: Output name to array, plus a ``<name>_null`` mask for each nullable field kept with ``fill=None``.
+
+    Raises:
+        KeyError: If a column of the schema is not in the log.
+        ValueError: If a value cannot be converted to its field's dtype.
+    """
+
+    # Parquet reads only the schema's columns, group fields need the full header to resolve their prefix.
+    columns = None
+    if str(file_path).endswith(".parquet") and all(spec["kind"] != GROUP for spec in fields.values()):
+        columns = list(dict.fromkeys(spec["column"] for spec in fields.values()))
+
+    with open_table(file_path, sheet_name, columns) as (header, rows):
+        header = [str(column) for column in header]
+        rows = list(rows)
+
+    def column_values(column):
+        if column not in header:
+            raise KeyError(f"Column '{column}' not found in {file_path}")
+        position = header.index(column)
+        return [row[position] if position < len(row) else "" for row in rows]
+
+    arrays = {}
+    skip = np.zeros(len(rows), dtype=bool)
+
+    for name, spec in fields.items():
+        kind = spec["kind"]
+        if kind == GROUP:
+            positions = column_group_positions(header, spec["column"])
+            array = np.array([[row[i] for i in positions] for row in rows], dtype=np.float64).reshape(len(rows), -1)
+            if spec["scale"] is not None:
+                array = array * spec["scale"]
+            array, mask = array.astype(spec["dtype"]), np.zeros(len(rows), dtype=bool)
+        elif kind == LIST:
+            array, mask = decode_list_column(column_values(spec["column"]), dtype=spec["dtype"], scale=spec["scale"])
+        elif kind == BOOL:
+            array, mask = _decode_bool(column_values(spec["column"]), name), np.zeros(len(rows), dtype=bool)
+        elif kind == TEXT:
+            array = np.array([str(value) for value in column_values(spec["column"])], dtype=str)
+            mask = np.zeros(len(rows), dtype=bool)
+        else:
+            array, mask = _decode_scalar(column_values(spec["column"]), spec)
+
+        if kind == LIST and mask.any() and not spec["nullable"]:
+            raise ValueError(f"Field '{name}' has null values but is not nullable")
+
+        fill = spec["fill"]
+        if fill is None:
+            if spec["nullable"]:
+                arrays[f"{name}_null"] = mask
+        elif fill == SKIP:
+            skip |= mask
+        elif fill == PREVIOUS:
+            # Resolved after the skipped rows are dropped, so a value is only carried over kept rows.
+            arrays[f"{name}_null"] = mask
+        else:
+            array[mask] = fill
+        arrays[name] = array
+
+    keep = ~skip
+    arrays = {name: array[keep] for name, array in arrays.items()}
+    for name, spec in fields.items():
+        if spec["fill"] == PREVIOUS:
+            arrays[name] = _fill_previous(arrays[name], arrays.pop(f"{name}_null"), name)
+    return arrays
+
+
+class LogSchemaDecoder:
+    """Decoder compiled from a registered schema.
+
+    Instances are picklable, so they can be passed to :class:`log_cache.LogDataset`. The decoder name includes the sheet
+    and a hash of the schema, so editing a schema invalidates the cache bundles it produced.
+
+    Args:
+        schema_name: Name of a schema in :data:`LOG_SCHEMAS`.
+        sheet_name: Excel sheet to read. Defaults to the first sheet.
+    """
+
+    def __init__(self, schema_name: str, sheet_name: Optional[str] = None) -> None:
+        self.schema_name = schema_name
+        self.sheet_name = sheet_name
+        self.fields = LOG_SCHEMAS[schema_name]
+        # The sheet is part of the name as well, decoders of different sheets of one workbook get separate bundles.
+        digest = hashlib.blake2b(repr((sorted(self.fields.items()), sheet_name)).encode(), digest_size=4).hexdigest()
+        sheet = "" if sheet_name is None else "_" + re.sub(r"\W+", "_", sheet_name)
+        self.__name__ = f"decode_{schema_name}{sheet}_{digest}"
+
+    def __call__(self, file_path) -> Dict[str, np.ndarray]:
+        return decode_with_schema(file_path, self.fields, self.sheet_name)
+
+    def __repr__(self) -> str:
+        return f"LogSchemaDecoder({self.schema_name!r}, sheet_name={self.sheet_name!r})"
+
+
+def compile_log_decoder(schema_name: str, sheet_name: Optional[str] = None) -> Callable[[str], Dict[str, np.ndarray]]:
+    """Returns the vectorized decoder of a registered log format.
+
+    Args:
+        schema_name: Name of a schema in :data:`LOG_SCHEMAS`.
+        sheet_name: Excel sheet to read. Defaults to the first sheet.
+
+    Returns:
+        LogSchemaDecoder: Callable that turns a log path into a dict of output name to array.
+
+    Raises:
+        KeyError: If no schema with that name is registered.
+    """
+
+    if schema_name not in LOG_SCHEMAS:
+        raise KeyError(f"Unknown log schema '{schema_name}', registered: {sorted(LOG_SCHEMAS)}")
+    return LogSchemaDecoder(schema_name, sheet_name)
@@ -0,0 +1,428 @@
+"""Batched replay of the 1000 ms AFC task.
+
+The time-based tests call ``Qnovo_AFC`` once per log row from Python, assigning about 16 input globals before the call
+and reading the outputs back after it. :func:`replay_block` hands a whole block of rows to ``test_replay_block`` in
+``config/test_config.c`` instead, which copies the inputs of each step into the library globals, runs ``Qnovo_AFC`` and
+copies the chosen globals into caller-provided NumPy buffers, all without returning to Python between steps.
+
+Inputs and outputs are keyed by the name of a library global, so anything the library exposes can be fed or recorded,
+e.g. ``{"VeAPI_I_PackCurr": ..., "VaAPI_U_CellVolts": ...}`` in and ``{"VeAFC_I_ChgPackCurr": ...}`` out. The data
+ready flags are not touched, set them once before the first block.
+
+:func:`lib_array_view` and :func:`global_view` expose library arrays as NumPy views for the per-step loops that stay in
+Python, so inputs are loaded and outputs read without converting 192 boxed ints per step. :func:`idle_runs` finds the
+parked stretches of a log whose rows can be replayed as repeated ticks without reloading inputs or recording results.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cffi
+import numpy as np
+
+ffi = cffi.FFI()
+
+REPLAY_FAST_FORWARD_ENV = "AFC_REPLAY_FAST_FORWARD"
+
+_FLOAT_DTYPES = {"float": np.float32, "double": np.float64}
+
+
+def ctype_dtype(ctype) -> np.dtype:
+    """Returns the NumPy dtype matching a primitive or enum cffi type.
+
+    Args:
+        ctype: cffi type object, e.g. ``ffi.typeof("int16_t")``.
+
+    Returns:
+        np.dtype: Dtype with the same size, signedness and kind.
+
+    Raises:
+        TypeError: If the type is not a primitive or enum type.
+    """
+
+    if ctype.kind not in ("primitive", "enum"):
+        raise TypeError(f"No NumPy dtype for {ctype.cname}")
+    if ctype.cname in _FLOAT_DTYPES:
+        return np.dtype(_FLOAT_DTYPES[ctype.cname])
+
+    size = ffi.sizeof(ctype)
+    unsigned = int(ffi.cast(ctype, -1)) > 0
+    return np.dtype(f"{'u' if unsigned else 'i'}{size}")
+
+
+def _ctype_layout(ctype) -> Tuple[np.dtype, Tuple[int, ...]]:
+    shape = []
+    while ctype.kind == "array":
+        shape.append(ctype.length)
+        ctype = ctype.item
+    return ctype_dtype(ctype), tuple(shape)
+
+
+def _global_pointer(lib, path: str):
+    """Returns the address of a library global or struct member and the cffi type stored there."""
+
+    name, *members = path.split(".")
+    if not members:
+        value = getattr(lib, name)
+        # Array globals are returned as cdata arrays, while addressof() only points at their first item.
+        if isinstance(value, ffi.CData):
+            return value, ffi.typeof(value)
+        pointer = ffi.addressof(lib, name)
+        return pointer, ffi.typeof(pointer).item
+
+    parent = getattr(lib, name)
+    for member in members[:-1]:
+        parent = getattr(parent, member)
+    pointer = ffi.addressof(parent, members[-1])
+    return pointer, ffi.typeof(pointer).item
+
+
+def global_layout(lib, name: str) -> Tuple[np.dtype, Tuple[int, ...]]:
+    """Returns the item dtype and shape of a library global.
+
+    Args:
+        lib: The loaded shared library.
+        name: Name of the global, e.g. ``"VaAPI_U_CellVolts"``, or a ``struct.member`` path.
+
+    Returns:
+        tuple: ``(dtype, shape)``, the shape is ``()`` for scalars and ``(192,)`` for ``t_U_millivolt_cell[192]``.
+    """
+
+    return _ctype_layout(_global_pointer(lib, name)[1])
+
+
+def lib_array_view(array) -> np.ndarray:
+    """Returns a writable NumPy view of a cffi array, sharing its memory.
+
+    Works for array globals (``lib.VaAPI_U_CellVolts``) and array struct members
+    (``lib.s_AFC_Track.NtAFC_Cnt_CPVCorrIdx``). Create the view once and reuse it: writing to it changes the library
+    variable directly, and reading it always shows the current value without converting item by item.
+
+    Args:
+        array: cffi array cdata, nested arrays give a multi-dimensional view.
+
+    Returns:
+        np.ndarray: View with the array's shape and item dtype.
+    """
+
+    dtype, shape = _ctype_layout(ffi.typeof(array))
+    return np.frombuffer(ffi.buffer(array), dtype=dtype).reshape(shape)
+
+
+def global_view(lib, name: str) -> np.ndarray:
+    """Returns a writable NumPy view of a library global, a 0-d view for scalar globals.
+
+    Args:
+        lib: The loaded shared library.
+        name: Name of the global.
+
+    Returns:
+        np.ndarray: View sharing the global's memory.
+    """
+
+    value = getattr(lib, name)
+    if isinstance(value, ffi.CData):
+        return lib_array_view(value)
+    pointer = ffi.addressof(lib, name)
+    dtype = ctype_dtype(ffi.typeof(pointer).item)
+    return np.frombuffer(ffi.buffer(pointer, dtype.itemsize), dtype=dtype).reshape(())
+
+
+def alloc_replay_outputs(lib, names: List[str], steps: int) -> Dict[str, np.ndarray]:
+    """Allocates zeroed output buffers for :func:`replay_block`.
+
+    Args:
+        lib: The loaded shared library.
+        names: Names of the globals to record after every step.
+        steps: Number of steps of the block.
+
+    Returns:
+        dict: Global name to an array of shape ``(steps, *global shape)`` with the global's dtype.
+    """
+
+    outputs = {}
+    for name in names:
+        dtype, shape = global_layout(lib, name)
+        outputs[name] = np.zeros((steps,) + shape, dtype=dtype)
+    return outputs
+
+
+def _block_steps(lib, inputs: Dict, outputs: Dict[str, np.ndarray]) -> Optional[int]:
+    """Returns the number of steps implied by the per-step inputs and the output buffers."""
+
+    counts = set()
+    for name, values in inputs.items():
+        _, shape = global_layout(lib, name)
+        if np.ndim(values) == len(shape) + 1:
+            counts.add(len(values))
+    counts.update(len(buffer) for buffer in outputs.values())
+
+    if len(counts) > 1:
+        raise ValueError(f"Inputs and outputs disagree on the number of steps: {sorted(counts)}")
+    return counts.pop() if counts else None
+
+
+def replay_block(
+    lib,
+    inputs: Dict,
+    outputs: Dict[str, np.ndarray],
+    steps: Optional[int] = None,
+    deobfuscate: Optional[Dict[str, int]] = None,
+) -> int:
+    """Runs ``Qnovo_AFC`` once per step of a block of inputs on the C side.
+
+    Args:
+        lib: The loaded shared library, built with ``config/test_config.c``.
+        inputs: Global name or ``struct.member`` path to the value of every step, shape ``(steps, *global shape)``. A value with the global's own
+                shape (e.g. a scalar for ``VeAPI_Cap_ChgPackCapcty``) is used for every step. Values are cast to the
+                global's dtype, so float values are truncated toward zero.
+        outputs: Global name or ``struct.member`` path to a C-contiguous buffer of shape ``(steps, *global shape)`` and the global's dtype, see
+                 :func:`alloc_replay_outputs`. Row ``i`` receives the global's value after step ``i``.
+        steps: Number of steps, only needed when no input or output has a step axis.
+        deobfuscate: Array global or ``struct.member`` path to the key it is passed to ``LIB_Deobfuscate`` with after
+                     every step, before the outputs are copied.
+
+    Returns:
+        int: Number of steps replayed.
+
+    Raises:
+        ValueError: If the number of steps cannot be determined or the inputs and outputs disagree on it, or if an
+                    output buffer does not match its global.
+    """
+
+    block_steps = _block_steps(lib, inputs, outputs)
+    if steps is None:
+        steps = block_steps
+    elif block_steps is not None and block_steps != steps:
+        raise ValueError(f"steps={steps} but the inputs and outputs hold {block_steps} steps")
+    if steps is None:
+        raise ValueError("Cannot determine the number of steps, pass steps= or a per-step input")
+
+    # The converted arrays must outlive the call, the C side only holds pointers into them.
+    keep_alive = []
+    input_dst, input_src, input_size = [], [], []
+    for name, values in inputs.items():
+        dtype, shape = global_layout(lib, name)
+        block = np.ascontiguousarray(np.broadcast_to(np.asarray(values).astype(dtype, copy=False), (steps,) + shape))
+        keep_alive.append(block)
+        input_dst.append(_global_pointer(lib, name)[0])
+        input_src.append(ffi.from_buffer(block))
+        input_size.append(block.itemsize * int(np.prod(shape, dtype=np.int64)))
+
+    output_src, output_dst, output_size = [], [], []
+    for name, buffer in outputs.items():
+        dtype, shape = global_layout(lib, name)
+        if buffer.dtype != dtype or buffer.shape != (steps,) + shape or not buffer.flags.c_contiguous:
+            raise ValueError(
+                f"Output buffer for {name} must be C-contiguous {dtype} of shape {(steps,) + shape}, "
+                f"got {buffer.dtype} of shape {buffer.shape}"
+            )
+        output_src.append(_global_pointer(lib, name)[0])
+        output_dst.append(ffi.from_buffer(buffer, require_writable=True))
+        output_size.append(buffer.itemsize * int(np.prod(shape, dtype=np.int64)))
+
+    deobfuscate_dst, deobfuscate_count, deobfuscate_key = [], [], []
+    for path, key in (deobfuscate or {}).items():
+        pointer, ctype = _global_pointer(lib, path)
+        deobfuscate_dst.append(pointer)
+        deobfuscate_count.append(int(np.prod(_ctype_layout(ctype)[1], dtype=np.int64)))
+        deobfuscate_key.append(key)
+
+    return lib.test_replay_block(
+        steps,
+        ffi.new("void *[]", input_dst),
+        ffi.new("void *[]", input_src),
+        ffi.new("uint32_t[]", input_size),
+        len(input_dst),
+        ffi.new("void *[]", output_src),
+        ffi.new("void *[]", output_dst),
+        ffi.new("uint32_t[]", output_size),
+        len(output_src),
+        ffi.new("void *[]", deobfuscate_dst),
+        ffi.new("uint32_t[]", deobfuscate_count),
+        ffi.new("uint8_t[]", deobfuscate_key),
+        len(deobfuscate_dst),
+    )
+
+
+def fast_forward_enabled(enabled: Optional[bool] = None) -> bool:
+    """Returns whether replays collapse idle rows, ``enabled`` if given, else whether ``AFC_REPLAY_FAST_FORWARD`` is set."""
+
+    return bool(os.environ.get(REPLAY_FAST_FORWARD_ENV)) if enabled is None else enabled
+
+
+def idle_runs(log: Dict[str, np.ndarray], columns: Sequence[str], idle: np.ndarray, rows: Sequence[int]) -> np.ndarray:
+    """Finds runs of idle rows that feed the library the same inputs, so a replay can apply them in one go.
+
+    Parked stretches of a log repeat the same inputs for thousands of rows. Each row of such a run is still one tick of
+    the task, so the run has to be replayed as often as it is long, but the inputs need to be loaded and the results
+    recorded only once.
+
+    Args:
+        log: Decoded log arrays by column.
+        columns: Columns that go into the library. Columns like the time stamp, which change on every row without
+                 affecting the library, are left out.
+        idle: Boolean array over all rows of the log, True where the pack is idle (not charging, no current).
+        rows: Rows to replay, consecutive and ascending, e.g. ``range(len(log["Time"]))``.
+
+    Returns:
+        np.ndarray: For each of ``rows``, the number of ticks to replay with its inputs: the length of the run it starts,
+        1 for rows outside of runs and 0 for rows absorbed by a run that started earlier.
+    """
+
+    index = np.asarray(rows, dtype=np.int64)
+    if len(index) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    idle_rows = np.asarray(idle)[index]
+    same = idle_rows[1:] & idle_rows[:-1]
+    for column in columns:
+        values = np.asarray(log[column])[index]
+        equal = values[1:] == values[:-1]
+        if equal.ndim > 1:
+            equal = equal.reshape(len(equal), -1).all(axis=1)
+        same &= equal
+
+    run_start = np.concatenate(([True], ~same))
+    run_id = np.cumsum(run_start) - 1
+    run_length = np.bincount(run_id)
+    return np.where(run_start, run_length[run_id], 0)
+
+
+# Scalar inputs of Qnovo_AFC in argument order, interleaved with the array inputs at the positions below.
+_AFC_SCALAR_INPUTS = (
+    "VeAPI_I_PackCurr",
+    "VeAPI_b_PackCurr_DR",
+    "VeAPI_T_MinTempSnsr",
+    "VeAPI_b_MinTempSnsr_DR",
+    "VeAPI_T_MaxTempSnsr",
+    "VeAPI_b_MaxTempSnsr_DR",
+    "VeAPI_Cap_ChgPackCapcty",
+    "VeAPI_b_ChgPackCapcty_DR",
+    "VeAPI_Pct_PackSOC",
+    "VeAPI_b_PackSOC_DR",
+    "VeAPI_b_EVSEChgStatus",
+    "VeAPI_e_EVSEChgLevel",
+)
+_AFC_ARRAY_INPUTS = (
+    "VaAPI_Cmp_NVMRegion",
+    "VaAPI_Cmp_NVMLoggingRegion",
+    "VaAPI_U_CellVolts",
+    "VaAPI_b_CellVolts_DR",
+    "VaAPI_T_TempSnsrs",
+    "VaAPI_b_TempSnsrs_DR",
+)
+_AFC_OUTPUTS = (
+    "VaAFC_Cmp_CTE_Info",
+    "VeAFC_e_ErrorFlags",
+    "VeAFC_I_ChgPackCurr",
+    "VeAFC_I_MaxReferenceCurr",
+    "VeAFC_I_MitigatedCurr",
+    "VeAFC_U_ChgPackVolt",
+    "VeAFC_b_ChgCompletionFlag",
+    "VeAFC_b_ExtremeAgingFlag",
+    "VeAFC_b_AbnormalAgingFlag",
+    "VeAFC_b_EarlyWarningAgingFlag",
+    "VeAFC_b_EOLFlag",
+    "VeAFC_b_SOCImbalanceFlag",
+)
+_AFC_INPUT_ORDER = (
+    "VaAPI_Cmp_NVMRegion",
+    "VaAPI_Cmp_NVMLoggingRegion",
+    "VeAPI_I_PackCurr",
+    "VeAPI_b_PackCurr_DR",
+    "VaAPI_U_CellVolts",
+    "VaAPI_b_CellVolts_DR",
+    "VaAPI_T_TempSnsrs",
+    "VaAPI_b_TempSnsrs_DR",
+) + _AFC_SCALAR_INPUTS[2:]
+
+_CONTEXTS: Dict[int, "AfcCallContext"] = {}
+
+
+class AfcCallContext:
+    """Prebuilt argument lists for ``Qnovo_AFC`` and ``fs_API_SetInputsAFC``.
+
+    The array inputs and the output pointers never change for a loaded library, so they are resolved once here. Scalar
+    inputs are passed by value and cached on the Python side: assign them through :meth:`update`, which writes the
+    library global as well, or call :meth:`sync` after assigning ``lib.VeAPI_*`` directly. Array inputs are written
+    through NumPy views of the globals, so a row of a decoded log is copied in with a single ``memmove``.
+
+    Args:
+        lib: The loaded shared library.
+    """
+
+    def __init__(self, lib) -> None:
+        self._lib = lib
+        self._qnovo_afc = lib.Qnovo_AFC
+        self._set_inputs_afc = lib.fs_API_SetInputsAFC
+        self._arrays = {name: getattr(lib, name) for name in _AFC_ARRAY_INPUTS}
+        self._views = {name: lib_array_view(array) for name, array in self._arrays.items()}
+        self._outputs = tuple(ffi.addressof(lib, name) for name in _AFC_OUTPUTS)
+        self._scalars: Dict[str, int] = {}
+        self._args: Optional[tuple] = None
+        self.sync()
+
+    def sync(self) -> None:
+        """Re-reads the scalar inputs from the library globals."""
+
+        self._scalars = {name: getattr(self._lib, name) for name in _AFC_SCALAR_INPUTS}
+        self._args = None
+
+    def update(self, **inputs) -> None:
+        """Assigns input globals, e.g. ``update(VeAPI_I_PackCurr=500, VaAPI_U_CellVolts=log["CellVolts"][i])``.
+
+        Array inputs accept NumPy arrays and lists, values are cast to the global's dtype.
+
+        Raises:
+            AttributeError: If the library has no such global.
+        """
+
+        for name, value in inputs.items():
+            if name in self._views:
+                # Like a cffi list assignment, a shorter value only fills the leading items.
+                self._views[name][: len(value)] = value
+                continue
+            setattr(self._lib, name, value)
+            if name in self._scalars:
+                self._scalars[name] = getattr(self._lib, name)
+                self._args = None
+
+    def _afc_args(self) -> tuple:
+        if self._args is None:
+            values = {**self._arrays, **self._scalars}
+            self._args = tuple(values[name] for name in _AFC_INPUT_ORDER) + self._outputs
+        return self._args
+
+    def step(self, repeat: int = 1) -> None:
+        """Calls ``Qnovo_AFC`` with the current inputs.
+
+        Args:
+            repeat: Number of consecutive calls with the same inputs.
+        """
+
+        args = self._afc_args()
+        for _ in range(repeat):
+            self._qnovo_afc(*args)
+
+    def set_inputs(self) -> None:
+        """Calls ``fs_API_SetInputsAFC`` with the current inputs."""
+
+        # Same arguments as Qnovo_AFC without the EVSE charge level.
+        args = self._afc_args()
+        level = _AFC_INPUT_ORDER.index("VeAPI_e_EVSEChgLevel")
+        self._set_inputs_afc(*args[:level], *args[level + 1 :])
+
+
+def afc_call_context(lib) -> AfcCallContext:
+    """Returns the call context of a loaded library, synced with its current scalar inputs.
+
+    The context is built on the first call for a library and reused afterwards.
+    """
+
+    context = _CONTEXTS.get(id(lib))
+    if context is None or context._lib is not lib:
+        context = _CONTEXTS[id(lib)] = AfcCallContext(lib)
+    else:
+        context.sync()
+    return context
@@ -0,0 +1,212 @@
+"""Checkpoints of long time-based replays.
+
+A replay that diverges late in a log had to be rerun from its first row to reproduce the failure. A
+:class:`ReplayCheckpoints` saves the library state every few rows and/or at the start of each charge session: all
+exported globals, including the NVM regions and the logging circular buffer, through a
+:class:`lib_snapshot.LibrarySnapshot`, and the NVM ``.dat`` files, through a
+:class:`lib_snapshot.DatFileSnapshot`, together with a dict of harness-side bookkeeping chosen by the test. A replay
+resumes from a checkpoint by loading it and skipping the rows before it.
+
+Checkpoints are kept in memory for rewinding within a run and, if a directory is configured, pickled to
+``<directory>/<name>.<step>.ckpt`` so that a later run can resume from them:
+
+- ``AFC_CHECKPOINT_DIR``: directory for checkpoint files, unset keeps checkpoints in memory only.
+- ``AFC_CHECKPOINT_EVERY``: number of rows between checkpoints, unset or 0 disables periodic checkpoints.
+- ``AFC_CHECKPOINT_SESSIONS``: set to also checkpoint at the start of every charge session.
+- ``AFC_RESUME_CHECKPOINT``: checkpoint file to resume from. Replays with another name ignore it.
+
+A checkpoint file can only be loaded by the library build that wrote it.
+"""
+
+import os
+import pickle
+from os.path import basename, join
+from typing import Dict, List, Optional, Tuple
+
+from .lib_snapshot import DatFileSnapshot, LibrarySnapshot
+
+CHECKPOINT_DIR_ENV = "AFC_CHECKPOINT_DIR"
+CHECKPOINT_EVERY_ENV = "AFC_CHECKPOINT_EVERY"
+CHECKPOINT_SESSIONS_ENV = "AFC_CHECKPOINT_SESSIONS"
+RESUME_CHECKPOINT_ENV = "AFC_RESUME_CHECKPOINT"
+
+_CHECKPOINT_VERSION = 2
+
+
+def checkpoint_path(directory: str, name: str, step: int) -> str:
+    """Returns the file a checkpoint of replay ``name`` at ``step`` is saved to."""
+
+    return join(directory, f"{name}.{step:08d}.ckpt")
+
+
+def load_checkpoint(file_path: str) -> Dict:
+    """Reads a checkpoint file.
+
+    Returns:
+        dict: ``name``, ``step`` and harness ``state`` of the checkpoint, the ``library`` state for
+        :meth:`lib_snapshot.LibrarySnapshot.load_state` and the ``dat_files`` for
+        :meth:`lib_snapshot.DatFileSnapshot.load_state`.
+
+    Raises:
+        ValueError: If the file was written by an incompatible version of this module.
+    """
+
+    with open(file_path, "rb") as file:
+        checkpoint = pickle.load(file)
+    if checkpoint.get("version") != _CHECKPOINT_VERSION:
+        raise ValueError(f"{file_path} is not a checkpoint of version {_CHECKPOINT_VERSION}")
+    return checkpoint
+
+
+class ReplayCheckpoints:
+    """Saves and restores the state of one replay.
+
+    Args:
+        lib: The loaded shared library.
+        name: Name of the replay, e.g. the test and log file. Checkpoint files are matched to replays by it.
+        every: Rows between checkpoints. Defaults to ``AFC_CHECKPOINT_EVERY``, 0 disables periodic checkpoints.
+        sessions: Also checkpoint at session starts. Defaults to on when ``AFC_CHECKPOINT_SESSIONS`` is set.
+        directory: Directory for checkpoint files. Defaults to ``AFC_CHECKPOINT_DIR``, None keeps them in memory only.
+        dat_path: Directory of the NVM ``.dat`` files saved with each checkpoint. Defaults to the working directory.
+    """
+
+    def __init__(
+        self,
+        lib,
+        name: str,
+        every: Optional[int] = None,
+        sessions: Optional[bool] = None,
+        directory: Optional[str] = None,
+        dat_path: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.every = int(os.environ.get(CHECKPOINT_EVERY_ENV) or 0) if every is None else every
+        self.sessions = bool(os.environ.get(CHECKPOINT_SESSIONS_ENV)) if sessions is None else sessions
+        self.directory = os.environ.get(CHECKPOINT_DIR_ENV) if directory is None else directory
+        self.dat_path = os.getcwd() if dat_path is None else dat_path
+        self._snapshot: Optional[LibrarySnapshot] = None
+        self._dat_snapshot: Optional[DatFileSnapshot] = None
+        self._lib = lib
+        self._checkpoints: Dict[int, Tuple[Dict, Dict[str, bytes], Dict]] = {}
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        """True if periodic or session checkpoints are requested."""
+
+        return self.every > 0 or self.sessions
+
+    @property
+    def steps(self) -> List[int]:
+        """Steps of the checkpoints saved in this run, in order."""
+
+        return sorted(self._checkpoints)
+
+    def _library_snapshot(self) -> LibrarySnapshot:
+        if self._snapshot is None:
+            self._snapshot = LibrarySnapshot(self._lib)
+        return self._snapshot
+
+    def _dat_file_snapshot(self) -> DatFileSnapshot:
+        if self._dat_snapshot is None:
+            self._dat_snapshot = DatFileSnapshot(self.dat_path)
+        return self._dat_snapshot
+
+    def due(self, step: int, session_start: bool = False, repeat: int = 1) -> bool:
+        """Returns True if a checkpoint should be saved before replaying ``step``.
+
+        Args:
+            step: Index of the row about to be replayed.
+            session_start: The row starts a new charge session.
+            repeat: Number of rows replayed in one go from ``step``, e.g. a fast-forwarded idle run. The checkpoint is
+                    due if a periodic one falls on any of them, and is then saved at the start of the run.
+        """
+
+        if self.every > 0:
+            first, last = max(step, 1), step + repeat - 1
+            if first <= last and last // self.every > (first - 1) // self.every:
+                return True
+        return self.sessions and session_start
+
+    def save(self, step: int, state: Optional[Dict] = None) -> Optional[str]:
+        """Saves a checkpoint of the current library state and ``.dat`` files before replaying ``step``.
+
+        Args:
+            step: Index of the next row to replay.
+            state: Picklable harness-side bookkeeping to restore along with the library, e.g. counters of the test.
+
+        Returns:
+            str: Path of the checkpoint file, None if checkpoints are kept in memory only.
+        """
+
+        snapshot = self._library_snapshot()
+        snapshot.capture()
+        library_state = snapshot.state()
+        dat_snapshot = self._dat_file_snapshot()
+        dat_snapshot.capture()
+        dat_files = dat_snapshot.state()
+        state = dict(state or {})
+        self._checkpoints[step] = (library_state, dat_files, state)
+
+        if not self.directory:
+            return None
+        file_path = checkpoint_path(self.directory, self.name, step)
+        checkpoint = {
+            "version": _CHECKPOINT_VERSION,
+            "name": self.name,
+            "step": step,
+            "state": state,
+            "library": library_state,
+            "dat_files": dat_files,
+        }
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def restore(self, step: int) -> Dict:
+        """Rewinds the library and the ``.dat`` files to a checkpoint saved in this run.
+
+        Args:
+            step: Step of the checkpoint, one of :attr:`steps`.
+
+        Returns:
+            dict: The harness state saved with it.
+
+        Raises:
+            KeyError: If there is no checkpoint at ``step``.
+        """
+
+        library_state, dat_files, state = self._checkpoints[step]
+        self._library_snapshot().load_state(library_state)
+        self._dat_file_snapshot().load_state(dat_files)
+        return dict(state)
+
+    def resume(self, file_path: Optional[str] = None) -> Optional[Tuple[int, Dict]]:
+        """Loads a checkpoint file into the library and writes its ``.dat`` files back.
+
+        Args:
+            file_path: Checkpoint to resume from. Defaults to ``AFC_RESUME_CHECKPOINT``.
+
+        Returns:
+            tuple: ``(step, state)``, the row to continue with and the harness state. None if no checkpoint is given or
+            it belongs to another replay.
+
+        Raises:
+            ValueError: If the checkpoint was written by a different library build.
+        """
+
+        file_path = file_path or os.environ.get(RESUME_CHECKPOINT_ENV)
+        if not file_path or not basename(file_path).startswith(f"{self.name}."):
+            return None
+
+        checkpoint = load_checkpoint(file_path)
+        if checkpoint["name"] != self.name:
+            return None
+        self._library_snapshot().load_state(checkpoint["library"])
+        self._dat_file_snapshot().load_state(checkpoint["dat_files"])
+        self._checkpoints[checkpoint["step"]] = (checkpoint["library"], checkpoint["dat_files"], checkpoint["state"])
+        return checkpoint["step"], dict(checkpoint["state"])
@@ -0,0 +1,580 @@
+"""Declarative replay of time-based logs.
+
+Every time-based suite used to carry its own loop: assign each input global from the decoded log row, call the task
+entry point, append each recorded global to a list. A replay spec describes the same thing as data:
+
+- ``entry``: the library function driven once per tick, e.g. ``"Qnovo_AFC"``.
+- ``args``: its arguments as names of library globals, passed by value (scalars) or as arrays, ``"&name"`` passes the
+  address of the global.
+- ``inputs``: log column to the global it is loaded into before each row, ``"struct.member"`` paths are allowed.
+- ``constants``: values assigned once before the replay, e.g. the data ready flags.
+- ``outputs``: result name to the global recorded after each row, or ``(path, reduce)`` to record ``reduce(view)``.
+- ``ticks``: calls of the entry point per log row.
+- ``deobfuscate``: array global or ``struct.member`` path to the key it is passed to ``LIB_Deobfuscate`` with after the
+  calls of each row and before recording.
+- ``after_row``: optional ``fn(lib)`` run after the calls of each row and before recording.
+
+:class:`ReplayEngine` compiles a spec against a loaded library once: inputs and outputs are bound to NumPy views of the
+globals, so loading a row is one copy per input and recording is one copy per output into preallocated arrays, and the
+entry point's argument list is built once with only the by-value scalars refreshed per tick. Specs that drive
+``Qnovo_AFC`` once per row with its full argument list and have no ``after_row`` hook run on the C-side block driver of
+:func:`replay.replay_block` instead when the library provides it; :func:`compare_replay_paths` checks that both paths
+record the same results, and :func:`compare_fast_forward` that collapsing idle runs does not change them.
+
+Adding a suite is a :func:`register_replay_spec` call instead of another copy of the loop.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .lib_snapshot import LibrarySnapshot
+from .replay import (
+    _AFC_INPUT_ORDER,
+    _AFC_OUTPUTS,
+    _global_pointer,
+    alloc_replay_outputs,
+    ctype_dtype,
+    ffi,
+    global_layout,
+    global_view,
+    lib_array_view,
+    replay_block,
+)
+
+# Arguments of Qnovo_AFC as driven by test_replay_block in config/test_config.c.
+QNOVO_AFC_ARGS = tuple(_AFC_INPUT_ORDER) + tuple(f"&{name}" for name in _AFC_OUTPUTS)
+
+# Arguments of Qnovo_AFC_1000ms, the 1 s task of the HMC builds: no logging region and five outputs.
+QNOVO_AFC_1000MS_ARGS = tuple(name for name in _AFC_INPUT_ORDER if name != "VaAPI_Cmp_NVMLoggingRegion") + (
+    "&VaAFC_Cmp_CTE_Info",
+    "&VeAFC_e_ErrorFlags",
+    "&VeAFC_I_ChgPackCurr",
+    "&VeAFC_U_ChgPackVolt",
+    "&VeAFC_b_ChgCompletionFlag",
+)
+
+REPLAY_SPECS: Dict[str, Dict] = {}
+
+
+def replay_spec(
+    entry: str,
+    args: Sequence[str],
+    inputs: Dict[str, str],
+    outputs: Dict[str, Union[str, Tuple[str, Callable]]],
+    constants: Optional[Dict[str, object]] = None,
+    ticks: int = 1,
+    after_row: Optional[Callable] = None,
+    deobfuscate: Optional[Dict[str, int]] = None,
+) -> Dict:
+    """Describes one replay, see the module docstring for the fields.
+
+    Returns:
+        dict: The replay spec.
+    """
+
+    return {
+        "entry": entry,
+        "args": tuple(args),
+        "inputs": dict(inputs),
+        "outputs": dict(outputs),
+        "constants": dict(constants or {}),
+        "ticks": ticks,
+        "after_row": after_row,
+        "deobfuscate": dict(deobfuscate or {}),
+    }
+
+
+def register_replay_spec(name: str, spec: Dict) -> None:
+    """Adds or replaces a named replay spec.
+
+    Args:
+        name: Name to compile the spec by, see :func:`compile_replay`.
+        spec: Spec returned by :func:`replay_spec`.
+    """
+
+    REPLAY_SPECS[name] = spec
+
+
+def global_path_view(lib, path: str) -> np.ndarray:
+    """Returns a writable NumPy view of a library global or struct member.
+
+    Args:
+        lib: The loaded shared library.
+        path: Global name, optionally followed by member names, e.g. ``"s_AFC_Track.NtAFC_Cnt_CPVCorrIdx"``.
+
+    Returns:
+        np.ndarray: View sharing the variable's memory, 0-d for scalars.
+    """
+
+    name, *members = path.split(".")
+    if not members:
+        return global_view(lib, name)
+
+    parent = getattr(lib, name)
+    for member in members[:-1]:
+        parent = getattr(parent, member)
+    value = getattr(parent, members[-1])
+    if isinstance(value, ffi.CData):
+        return lib_array_view(value)
+
+    pointer = ffi.addressof(parent, members[-1])
+    dtype = ctype_dtype(ffi.typeof(pointer).item)
+    return np.frombuffer(ffi.buffer(pointer, dtype.itemsize), dtype=dtype).reshape(())
+
+
+def _row_setter(view: np.ndarray, column: np.ndarray) -> Callable[[int], None]:
+    """Returns a function loading row ``i`` of a log column into a view."""
+
+    if view.ndim == 0:
+
+        def set_scalar(i: int) -> None:
+            view[()] = column[i]
+
+        return set_scalar
+
+    width = column.shape[1] if column.ndim > 1 else None
+    if width is None or column.shape[1:] == view.shape:
+
+        def set_array(i: int) -> None:
+            view[...] = column[i]
+
+        return set_array
+
+    # Like a cffi list assignment, a shorter row only fills the leading items.
+    target = view[:width]
+
+    def set_leading(i: int) -> None:
+        target[...] = column[i]
+
+    return set_leading
+
+
+class ReplayEngine:
+    """A replay spec compiled against a loaded library.
+
+    Args:
+        lib: The loaded shared library.
+        spec: Spec returned by :func:`replay_spec`.
+
+    Raises:
+        AttributeError: If the spec names a global or member the library does not have.
+    """
+
+    def __init__(self, lib, spec: Dict) -> None:
+        self._lib = lib
+        self.spec = spec
+        self._entry = getattr(lib, spec["entry"])
+        self._input_views = {column: global_path_view(lib, path) for column, path in spec["inputs"].items()}
+
+        self._outputs: Dict[str, Tuple[np.ndarray, Optional[Callable]]] = {}
+        for name, output in spec["outputs"].items():
+            path, reduce = output if isinstance(output, tuple) else (output, None)
+            self._outputs[name] = (global_path_view(lib, path), reduce)
+
+        # Arguments that never change are resolved once, by-value scalars are refreshed from their views per tick.
+        self._args: List = []
+        self._scalar_args: List[Tuple[int, np.ndarray]] = []
+        for index, arg in enumerate(spec["args"]):
+            if arg.startswith("&"):
+                self._args.append(ffi.addressof(lib, arg[1:]))
+                continue
+            value = getattr(lib, arg)
+            self._args.append(value)
+            if not isinstance(value, ffi.CData):
+                self._scalar_args.append((index, global_view(lib, arg)))
+
+        self._deobfuscate = []
+        for path, key in spec["deobfuscate"].items():
+            _, shape = global_layout(lib, path)
+            pointer = ffi.cast("void *", _global_pointer(lib, path)[0])
+            self._deobfuscate.append((pointer, int(np.prod(shape, dtype=np.int64)), key))
+
+        self.native = (
+            spec["entry"] == "Qnovo_AFC"
+            and spec["args"] == QNOVO_AFC_ARGS
+            and spec["ticks"] == 1
+            and spec["after_row"] is None
+            and hasattr(lib, "test_replay_block")
+        )
+
+    def apply_constants(self) -> None:
+        """Assigns the spec's constant inputs."""
+
+        for path, value in self.spec["constants"].items():
+            view = global_path_view(self._lib, path)
+            if view.ndim:
+                view[: len(np.atleast_1d(value))] = value
+            else:
+                view[()] = value
+
+    def tick(self, count: int = 1) -> None:
+        """Calls the entry point ``count`` times with the current values of its arguments."""
+
+        args = self._args
+        for index, view in self._scalar_args:
+            args[index] = view.item()
+        entry = self._entry
+        for _ in range(count):
+            entry(*args)
+
+    def run(
+        self,
+        log: Dict[str, np.ndarray],
+        rows: Optional[Sequence[int]] = None,
+        repeats: Optional[np.ndarray] = None,
+        native: Optional[bool] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Replays rows of a decoded log.
+
+        Args:
+            log: Decoded log arrays by column, e.g. from :func:`log_cache.load_log_arrays`.
+            rows: Rows to replay, all rows by default.
+            repeats: Optional ticks multiplier per row, see :func:`replay.idle_runs`. Rows with 0 are skipped, a row with
+                     ``n`` runs ``n * ticks`` calls and is recorded once.
+            native: Run on the C-side block driver. Defaults to :attr:`native` when ``repeats`` is not given.
+
+        Returns:
+            dict: Output name to an array with one row per replayed log row, plus ``"Row"`` with the log row indices.
+
+        Raises:
+            KeyError: If the log has no column for one of the spec's inputs.
+            ValueError: If ``native`` is requested for a spec or call the block driver cannot run.
+        """
+
+        if rows is None:
+            rows = range(len(next(iter(log.values()))))
+        index = np.asarray(rows, dtype=np.int64)
+        if repeats is not None:
+            repeats = np.asarray(repeats)
+            index = index[repeats > 0]
+            repeats = repeats[repeats > 0]
+
+        if native is None:
+            native = self.native and repeats is None
+        elif native and not (self.native and repeats is None):
+            raise ValueError("This replay cannot run on the block driver, it needs a Python loop")
+
+        self.apply_constants()
+        if native:
+            return self._run_native(log, index)
+
+        setters = [_row_setter(view, np.asarray(log[column])) for column, view in self._input_views.items()]
+        recorded = {}
+        for name, (view, reduce) in self._outputs.items():
+            sample = np.asarray(view if reduce is None else reduce(view))
+            recorded[name] = np.zeros((len(index),) + sample.shape, dtype=sample.dtype)
+        outputs = [(recorded[name], view, reduce) for name, (view, reduce) in self._outputs.items()]
+
+        ticks = self.spec["ticks"]
+        after_row = self.spec["after_row"]
+        deobfuscate = self._lib.LIB_Deobfuscate if self._deobfuscate else None
+        # A collapsed row stands for ``repeat`` rows, each deobfuscated and finished on its own as in a full replay.
+        per_row = bool(self._deobfuscate) or after_row is not None
+        for k, i in enumerate(index.tolist()):
+            for set_row in setters:
+                set_row(i)
+            repeat = 1 if repeats is None else int(repeats[k])
+            if not per_row:
+                self.tick(ticks * repeat)
+            else:
+                for _ in range(repeat):
+                    self.tick(ticks)
+                    for pointer, count, key in self._deobfuscate:
+                        deobfuscate(pointer, count, key)
+                    if after_row is not None:
+                        after_row(self._lib)
+            for buffer, view, reduce in outputs:
+                buffer[k] = view if reduce is None else reduce(view)
+
+        recorded["Row"] = index
+        return recorded
+
+    def _run_native(self, log: Dict[str, np.ndarray], index: np.ndarray) -> Dict[str, np.ndarray]:
+        inputs = {}
+        for column, path in self.spec["inputs"].items():
+            values = np.asarray(log[column])[index]
+            view = self._input_views[column]
+            if view.ndim and values.shape[1:] != view.shape:
+                # Items past the end of a shorter row keep the global's current value, as in the Python loop.
+                padded = np.broadcast_to(view, (len(index),) + view.shape).copy()
+                padded[:, : values.shape[1]] = values
+                values = padded
+            inputs[path] = values
+        # Reduced outputs record the whole variable on the C side and are reduced row by row afterwards.
+        paths = {output[0] if isinstance(output, tuple) else output for output in self.spec["outputs"].values()}
+        buffers = alloc_replay_outputs(self._lib, sorted(paths), len(index))
+        replay_block(self._lib, inputs, buffers, steps=len(index), deobfuscate=self.spec["deobfuscate"])
+
+        recorded = {}
+        for name, (view, reduce) in self._outputs.items():
+            output = self.spec["outputs"][name]
+            if reduce is None:
+                recorded[name] = buffers[output]
+                continue
+            sample = np.asarray(reduce(view))
+            reduced = recorded[name] = np.zeros((len(index),) + sample.shape, dtype=sample.dtype)
+            for k, row in enumerate(buffers[output[0]]):
+                reduced[k] = reduce(row)
+        recorded["Row"] = index
+        return recorded
+
+
+def compile_replay(lib, spec_name: str) -> ReplayEngine:
+    """Returns an engine for a registered replay spec, see :func:`register_replay_spec`.
+
+    Raises:
+        KeyError: If no spec of that name is registered.
+    """
+
+    return ReplayEngine(lib, REPLAY_SPECS[spec_name])
+
+
+def compare_replay_paths(
+    lib, spec_name: str, log: Dict[str, np.ndarray], rows: Optional[Sequence[int]] = None
+) -> List[str]:
+    """Replays the same rows on the Python loop and on the block driver, from the same library state.
+
+    The library is left in the state after the block driver run.
+
+    Args:
+        lib: The loaded shared library, built with ``config/test_config.c``.
+        spec_name: Name of a registered spec that can run on the block driver.
+        log: Decoded log arrays by column.
+        rows: Rows to replay, all rows by default.
+
+    Returns:
+        list: Names of the outputs the two paths recorded differently, empty if they agree.
+
+    Raises:
+        ValueError: If the spec cannot run on the block driver.
+    """
+
+    engine = compile_replay(lib, spec_name)
+    if not engine.native:
+        raise ValueError(f"Replay spec '{spec_name}' cannot run on the block driver")
+
+    snapshot = LibrarySnapshot(lib)
+    python = engine.run(log, rows, native=False)
+    snapshot.restore()
+    native = engine.run(log, rows, native=True)
+    return [name for name in python if not np.array_equal(python[name], native[name])]
+
+
+def compare_fast_forward(
+    lib, spec_name: str, log: Dict[str, np.ndarray], rows: Sequence[int], repeats: Sequence[int]
+) -> List[str]:
+    """Replays the same rows with and without collapsing idle runs, from the same library state.
+
+    A collapsed run is recorded once after all its calls, so it is compared with the full replay's record of the last
+    row of the run. The ``"Row"`` output differs by design and is not compared. The library is left in the state after
+    the collapsed run.
+
+    Args:
+        lib: The loaded shared library, built with ``config/test_config.c``.
+        spec_name: Name of a registered spec.
+        log: Decoded log arrays by column.
+        rows: Rows to replay.
+        repeats: Ticks multiplier per row, see :func:`replay.idle_runs`.
+
+    Returns:
+        list: Names of the outputs the two replays recorded differently, empty if they agree.
+    """
+
+    engine = compile_replay(lib, spec_name)
+    repeats = np.asarray(repeats, dtype=np.int64)
+    starts = np.flatnonzero(repeats)
+    ends = starts + repeats[starts] - 1
+
+    snapshot = LibrarySnapshot(lib)
+    full = engine.run(log, rows, native=False)
+    snapshot.restore()
+    collapsed = engine.run(log, rows, repeats)
+    return [name for name in collapsed if name != "Row" and not np.array_equal(full[name][ends], collapsed[name])]
+
+
+def _highest_cpv_corr_idx(view: np.ndarray) -> np.ndarray:
+    # Highest correction index of each of the 15 stages over all 192 cells.
+    return view[:192, :15].max(axis=0)
+
+
+# Log column to input global of the behavioral logs (Behavioral_Test_*, HTD dynamics).
+BEHAVIORAL_INPUTS = {
+    "PackCurr": "VeAPI_I_PackCurr",
+    "PackCurr_DR": "VeAPI_b_PackCurr_DR",
+    "CellVolts": "VaAPI_U_CellVolts",
+    "CellVolts_DR": "VaAPI_b_CellVolts_DR",
+    "TempSnsrs": "VaAPI_T_TempSnsrs",
+    "TempSnsrs_DR": "VaAPI_b_TempSnsrs_DR",
+    "MinTempSnsr": "VeAPI_T_MinTempSnsr",
+    "MinTempSnsr_DR": "VeAPI_b_MinTempSnsr_DR",
+    "MaxTempSnsr": "VeAPI_T_MaxTempSnsr",
+    "MaxTempSnsr_DR": "VeAPI_b_MaxTempSnsr_DR",
+    "ChgPackCapcty": "VeAPI_Cap_ChgPackCapcty",
+    "ChgPackCapcty_DR": "VeAPI_b_ChgPackCapcty_DR",
+    "PackSOC": "VeAPI_Pct_PackSOC",
+    "PackSOC_DR": "VeAPI_b_PackSOC_DR",
+    "EVSEChgStatus": "VeAPI_b_EVSEChgStatus",
+}
+
+# Outputs recorded by the behavioral and HMC replays, formatted by behavioral_results.
+BEHAVIORAL_OUTPUTS = {
+    # The inputs as the library holds them after the call
+    **{column: path for column, path in BEHAVIORAL_INPUTS.items()},
+    "ErrorFlags": "VeAFC_e_ErrorFlags",
+    "ChgPackCurr": "VeAFC_I_ChgPackCurr",
+    "ChgPackVolt": "VeAFC_U_ChgPackVolt",
+    "ChgCompletionFlag": "VeAFC_b_ChgCompletionFlag",
+    "AFC_NVM_MagicNumber": "s_AFC_Track.NeAFC_b_InitNVMStatus",
+    "AFC_CTE_MagicNumber": "s_AFC_CTE_Data.VeAFC_b_InitNVMStatusCTE",
+    "AFC_CTE_HighestIndex": "s_AFC_CTE_Data.VaAFC_Cnt_CPVCorrIdx",
+    "NVM_HighestIndex": ("s_AFC_Track.NtAFC_Cnt_CPVCorrIdx", _highest_cpv_corr_idx),
+    "NVM_HighestIndex2": "s_AFC_Track.NaAFC_Cnt_HighestCPVCorrIdx",
+    **{
+        f"QnovoAFC_LogVar{number}": f"QnovoAFC_LogVar{number}"
+        for number in (1, 2, 3, 4, 5, 6, 9, 10, 11, 13, 14, 15, 16)
+    },
+}
+
+register_replay_spec(
+    "behavioral",
+    replay_spec(
+        entry="Qnovo_AFC",
+        args=QNOVO_AFC_ARGS,
+        inputs=BEHAVIORAL_INPUTS,
+        outputs=BEHAVIORAL_OUTPUTS,
+        deobfuscate={"s_AFC_CTE_Data.VaAFC_Cnt_CPVCorrIdx": 0xBD},
+    ),
+)
+
+# HMC logs (hmc_wide) carry the measurements only, MinTempSnsr and MaxTempSnsr are added from the sensor rows by the
+# suite and the data ready flags and pack capacity are fixed.
+register_replay_spec(
+    "hmc",
+    replay_spec(
+        entry="Qnovo_AFC_1000ms",
+        args=QNOVO_AFC_1000MS_ARGS,
+        inputs={
+            "PackCurr": "VeAPI_I_PackCurr",
+            "CellVolts": "VaAPI_U_CellVolts",
+            "TempSnsrs": "VaAPI_T_TempSnsrs",
+            "MinTempSnsr": "VeAPI_T_MinTempSnsr",
+            "MaxTempSnsr": "VeAPI_T_MaxTempSnsr",
+            "PackSOC": "VeAPI_Pct_PackSOC",
+            "battery_state": "VeAPI_b_EVSEChgStatus",
+        },
+        constants={
+            "VeAPI_b_PackCurr_DR": 1,
+            "VaAPI_b_CellVolts_DR": [1] * 192,
+            "VaAPI_b_TempSnsrs_DR": [1] * 18,
+            "VeAPI_b_MinTempSnsr_DR": 1,
+            "VeAPI_b_MaxTempSnsr_DR": 1,
+            "VeAPI_Cap_ChgPackCapcty": 125800,
+            "VeAPI_b_ChgPackCapcty_DR": 1,
+            "VeAPI_b_PackSOC_DR": 1,
+        },
+        outputs=BEHAVIORAL_OUTPUTS,
+        deobfuscate={"s_AFC_CTE_Data.VaAFC_Cnt_CPVCorrIdx": 0xBD},
+    ),
+)
+
+# Fleet logs (fleet_voltage_imbalance) carry the cell voltages and the charging state, everything else is fixed. Each
+# row is a 10 s sample and replayed as ten calls.
+register_replay_spec(
+    "voltage_imbalance",
+    replay_spec(
+        entry="Qnovo_AFC",
+        args=QNOVO_AFC_ARGS,
+        inputs={
+            "se_voltages_V": "VaAPI_U_CellVolts",
+            "is_charging": "VeAPI_b_EVSEChgStatus",
+        },
+        constants={
+            "VeAPI_I_PackCurr": 3316,
+            "VeAPI_b_PackCurr_DR": 1,
+            "VaAPI_b_CellVolts_DR": [1] * 192,
+            "VaAPI_T_TempSnsrs": [250] * 18,
+            "VaAPI_b_TempSnsrs_DR": [1] * 18,
+            "VeAPI_T_MinTempSnsr": 250,
+            "VeAPI_b_MinTempSnsr_DR": 1,
+            "VeAPI_T_MaxTempSnsr": 250,
+            "VeAPI_b_MaxTempSnsr_DR": 1,
+            "VeAPI_Cap_ChgPackCapcty": 125800,
+            "VeAPI_b_ChgPackCapcty_DR": 1,
+            "VeAPI_Pct_PackSOC": 5000,
+            "VeAPI_b_PackSOC_DR": 1,
+        },
+        outputs={
+            "PackCurr": "VeAPI_I_PackCurr",
+            "SEVolts": "VaAPI_U_CellVolts",
+            "EVSEChgStatus": "VeAPI_b_EVSEChgStatus",
+            "Output_VoltageImbalance": "AFC_VM_VoltageImbalance.Va_b_VoltageImbalanceFlags",
+            "QnovoAFC_Log_VoltageImbalance_ZScore": "QnovoAFC_Log_VoltageImbalance_ZScore",
+            "QnovoAFC_Log_VoltageImbalance_Threshold": "QnovoAFC_Log_VoltageImbalance_Threshold",
+            "ChargeVoltageSums": "AFC_VM_VoltageImbalance.Va_U_SE_ChargeVoltageSums",
+            "ChargeVoltageSums_Sort": "AFC_VM_VoltageImbalance.Va_U_SE_ChargeVoltageSums_Sort",
+            "ExecutionCounter": "AFC_VM_VoltageImbalance.Ve_Cnt_ExecutionCounter",
+            "SamplingTime": "AFC_VM_VoltageImbalance.Ve_t_SamplingTime",
+            "AbsoluteVoltageSumDeviations": "AFC_VM_VoltageImbalance.Va_U_SE_AbsoluteVoltageSumDeviations",
+            "ReadyForAnalysis": "AFC_VM_VoltageImbalance.Ve_b_ReadyForAnalysis",
+        },
+        ticks=10,
+    ),
+)
+
+# Result columns of the processed_*.csv files, by recorded output.
+_BEHAVIORAL_LOG_VAR_COLUMNS = {
+    "QnovoAFC_LogVar2": "QnovoAFC_LogVar2\nl_InitializedFlag",
+    "QnovoAFC_LogVar3": "QnovoAFC_LogVar3\nl_ValidSampleFlag",
+    "QnovoAFC_LogVar4": "QnovoAFC_LogVar4\nl_QNS_State",
+    "QnovoAFC_LogVar5": "QnovoAFC_LogVar5\nl_PresentStageNum",
+    "QnovoAFC_LogVar6": "QnovoAFC_LogVar6\nl_HighestIndex",
+    "QnovoAFC_LogVar9": "QnovoAFC_LogVar9\nl_CPVCorrIdx",
+    "QnovoAFC_LogVar10": "QnovoAFC_LogVar10\nl_CV_Curr",
+    "QnovoAFC_LogVar11": "QnovoAFC_LogVar11\nl_ProtocolStgCurr",
+    "QnovoAFC_LogVar13": "QnovoAFC_LogVar13\nl_ColdCompensatedCurr",
+    "QnovoAFC_LogVar14": "QnovoAFC_LogVar14\nl_CompensatedVolt",
+    "QnovoAFC_LogVar15": "QnovoAFC_LogVar15\nl_SampleCellVolt",
+    "QnovoAFC_LogVar16": "QnovoAFC_LogVar16\nl_RefCellVolt",
+}
+
+
+def behavioral_results(log: Dict[str, np.ndarray], recorded: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Formats a ``"behavioral"`` or ``"hmc"`` replay as the columns of its ``processed_*.csv`` file.
+
+    Args:
+        log: The replayed log, for the battery state text.
+        recorded: Output of :meth:`ReplayEngine.run`.
+
+    Returns:
+        dict: Column name to one value per replayed row, from ``PackCurr`` on, as the recorded arrays where possible, see
+        :func:`result_recorder.write_results_csv`. The callers put their file name and time stamp columns in front.
+    """
+
+    rows = recorded["Row"]
+    results = {column: recorded[column] for column in list(BEHAVIORAL_INPUTS)[:-1]}
+    results["Battery_State"] = np.asarray(log["battery_state"])[rows]
+    results["EVSEChgStatus"] = recorded["EVSEChgStatus"]
+    results[" "] = [""] * len(rows)  # Divider between input and output
+
+    error_flags = recorded["ErrorFlags"]
+    results["ErrorFlags (dec)"] = error_flags
+    results["ErrorFlags (bin)"] = [format(value, "032b") for value in error_flags.tolist()]
+    for column in (
+        "ChgPackCurr",
+        "ChgPackVolt",
+        "ChgCompletionFlag",
+        "AFC_NVM_MagicNumber",
+        "AFC_CTE_MagicNumber",
+        "AFC_CTE_HighestIndex",
+        "NVM_HighestIndex",
+        "NVM_HighestIndex2",
+    ):
+        results[column] = recorded[column]
+
+    logging_path = recorded["QnovoAFC_LogVar1"]
+    results["QnovoAFC_LogVar1\nl_LoggingPath (dec)"] = logging_path
+    results["QnovoAFC_LogVar1\nl_LoggingPath (bin)"] = [format(value, "032b") for value in logging_path.tolist()]
+    for output, column in _BEHAVIORAL_LOG_VAR_COLUMNS.items():
+        results[column] = recorded[output]
+    return results
@@ -0,0 +1,141 @@
+"""Preallocated recording of replay results.
+
+The time-based suites collect their results in a dict of Python lists, appending every output after every row, and
+``zip`` the lists into CSV rows at the end. A 192-cell log variable becomes a list of 192 boxed ints per row, so a
+replay of a few thousand rows holds millions of Python objects. :class:`ResultRecorder` preallocates one NumPy
+structured array instead, a field per output with a fixed-width sub-array for array globals, and records a row by
+copying the bytes of each global into it.
+
+Outputs are given as in a replay spec (:func:`replay_engine.replay_spec`): result name to a global or ``struct.member``
+path, or ``(path, reduce)`` to record ``reduce(view)``. Values that do not come from the library, like the log's time
+stamp, are declared as ``fields`` and passed to :meth:`ResultRecorder.record`.
+
+:func:`write_results_csv` writes such columns, or any mix of arrays and lists, to the ``processed_*.csv`` files row by
+row, in the same text format as the lists did.
+"""
+
+import csv
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .replay_engine import global_path_view
+
+
+class ResultRecorder:
+    """Records library outputs after every replay row into one structured array.
+
+    Args:
+        lib: The loaded shared library.
+        outputs: Result name to a global or ``struct.member`` path, or ``(path, reduce)``.
+        steps: Expected number of rows, the array grows if more are recorded.
+        fields: Result name to dtype of values passed to :meth:`record`, e.g. ``{"Time": np.int64}``.
+
+    Raises:
+        AttributeError: If an output names a global or member the library does not have.
+    """
+
+    def __init__(
+        self,
+        lib,
+        outputs: Dict[str, Union[str, Tuple[str, Callable]]],
+        steps: int,
+        fields: Optional[Dict[str, object]] = None,
+    ) -> None:
+        self.steps = 0
+        self.fields = dict(fields or {})
+
+        layout = [(name, np.dtype(dtype)) for name, dtype in self.fields.items()]
+        self._reduced = []
+        copied = []
+        for name, output in outputs.items():
+            path, reduce = output if isinstance(output, tuple) else (output, None)
+            view = global_path_view(lib, path)
+            if reduce is None:
+                layout.append((name, view.dtype, view.shape))
+                copied.append((name, view))
+            else:
+                sample = np.asarray(reduce(view))
+                layout.append((name, sample.dtype, sample.shape))
+                self._reduced.append((name, view, reduce))
+
+        self._rows = np.zeros(max(steps, 1), dtype=np.dtype(layout))
+        # Globals are copied byte for byte into their slot of the row, one memcpy per output.
+        self._copies = []
+        for name, view in copied:
+            offset = self._rows.dtype.fields[name][1]
+            source = view.reshape(-1).view(np.uint8)
+            self._copies.append((offset, offset + source.nbytes, source))
+        self._row_bytes = self._rows.view(np.uint8).reshape(len(self._rows), -1)
+
+    def record(self, **values) -> None:
+        """Appends the current outputs as the next row.
+
+        Args:
+            **values: Value of each of the ``fields``, missing ones stay 0.
+        """
+
+        if self.steps == len(self._rows):
+            self._rows = np.concatenate([self._rows, np.zeros_like(self._rows)])
+            self._row_bytes = self._rows.view(np.uint8).reshape(len(self._rows), -1)
+
+        row_bytes = self._row_bytes[self.steps]
+        for start, end, source in self._copies:
+            row_bytes[start:end] = source
+        row = self._rows[self.steps]
+        for name, view, reduce in self._reduced:
+            row[name] = reduce(view)
+        for name, value in values.items():
+            row[name] = value
+        self.steps += 1
+
+    def __len__(self) -> int:
+        return self.steps
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The recorded rows, a structured array with one field per output and field."""
+
+        return self._rows[: self.steps]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Returns the recorded rows as result name to array, with the rows along the first axis."""
+
+        rows = self.rows
+        return {name: rows[name] for name in rows.dtype.names}
+
+
+def _format_cell(value) -> object:
+    # Array cells are written as the list they used to be, e.g. "[3650, 3651]".
+    if isinstance(value, np.ndarray):
+        return str(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_results_csv(file_path: str, columns: Mapping[str, Union[np.ndarray, Sequence]]) -> None:
+    """Writes result columns to a CSV file, one line per row.
+
+    Args:
+        file_path: Output file.
+        columns: Column name to one value per row: a NumPy array with the rows along the first axis, e.g. from
+                 :meth:`ResultRecorder.columns`, or a list. Rows of multi-dimensional arrays are written as lists.
+
+    Raises:
+        ValueError: If the columns have different lengths.
+    """
+
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Result columns have different lengths: {sorted(lengths)}")
+
+    # Arrays of one value per row are converted in one go, array rows are formatted as they are written.
+    cells = [
+        values.tolist() if isinstance(values, np.ndarray) and values.ndim == 1 else values
+        for values in columns.values()
+    ]
+    with open(file_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns.keys())
+        writer.writerows([_format_cell(value) for value in row] for row in zip(*cells))
@@ -25,58 +25,34 @@ if not SKIP_TEST:
     _DIR_PATH_OUTPUT_DATA = _BASE_DIR / "output_data"
     _DIR_PATH_REFERENCE_DATA = _BASE_DIR / "reference_data"
 
+    decode_AFC_logging_data = compile_log_decoder("logging_sevolts")
+
     def parse_AFC_logging_test_data(file_path):
-        test_cases = []
-        i = 0
-        for row in iter_file(file_path):
-            try:
-                PackSOC = int(float(row["PackSOC"]))
-                PackSOC_DR = int(row["PackSOC_DR"])
-                PackCurr = int(float(row["PackCurr"]))
-                PackCurr_DR = int(row["PackCurr_DR"])
-                try:
-                    CellVolts = [
-                        int(float(item)) for item in ast.literal_eval(row["SEVolts"])
-                    ]
-                except TypeError:
-                    CellVolts = [int(row["SEVolts"])]
-
-                try:
-                    CellVolts_DR = [
-                        int(item) for item in ast.literal_eval(row["SEVolts_DR"])
-                    ]
-                except TypeError:
-                    CellVolts_DR = [int(row["SEVolts_DR"])]
-                try:
-                    MinTempSnsr = int(float(row["MinTempSnsr"]))
-                    MaxTempSnsr = int(float(row["MaxTempSnsr"]))
-                except ValueError:
-                    MinTempSnsr = p_MinTempSnsr
-                    MaxTempSnsr = p_MaxTempSnsr
-                p_MinTempSnsr = MinTempSnsr
-                p_MaxTempSnsr = MaxTempSnsr
-
-                MinTempSnsr_DR = int(row["MinTempSnsr_DR"])
-
-                MaxTempSnsr_DR = int(row["MaxTempSnsr_DR"])
-
-                TempSnsrs = [MaxTempSnsr for _ in range(18)]
-                TempSnsrs_DR = [1 for _ in range(18)]
-
-                try:
-                    ChgPackCapcty = int(float(row["ChgPackCapcty"]))
-                except ValueError:
-                    ChgPackCapcty = 0
-                ChgPackCapcty_DR = int(row["ChgPackCapcty_DR"])
-
-                battery_state = row["Battery_State"]
-                EVSEChgStatus = int(row["EVSEChgStatus"])
-                i += 1
-
-            except KeyError:
-                print("Key not found in input data")
-            except ValueError:
-                continue
+        # Rows without a SEVolts sample are dropped by the decoder, missing temperatures are carried forward
+        log = load_log_arrays(str(file_path), decode_AFC_logging_data)
+
+        for i in range(len(log["PackSOC"])):
+            PackSOC = int(log["PackSOC"][i])
+            PackSOC_DR = int(log["PackSOC_DR"][i])
+            PackCurr = int(log["PackCurr"][i])
+            PackCurr_DR = int(log["PackCurr_DR"][i])
+            CellVolts = log["CellVolts"][i].tolist()
+            CellVolts_DR = log["CellVolts_DR"][i].tolist()
+
+            MinTempSnsr = int(log["MinTempSnsr"][i])
+            MinTempSnsr_DR = int(log["MinTempSnsr_DR"][i])
+
+            MaxTempSnsr = int(log["MaxTempSnsr"][i])
+            MaxTempSnsr_DR = int(log["MaxTempSnsr_DR"][i])
+
+            TempSnsrs = [MaxTempSnsr for _ in range(18)]
+            TempSnsrs_DR = [1 for _ in range(18)]
+
+            ChgPackCapcty = int(log["ChgPackCapcty"][i])
+            ChgPackCapcty_DR = int(log["ChgPackCapcty_DR"][i])
+
+            battery_state = str(log["battery_state"][i])
+            EVSEChgStatus = int(log["EVSEChgStatus"][i])
 
             # Format data for parametrized test
             test_case = {
@@ -101,12 +77,7 @@ if not SKIP_TEST:
                 "Expected": {},
             }
 
-            test_cases.append(test_case)
-            i += 1
-            # if i > 1000:
-            #    break
-
-        return test_cases
+            yield test_case
 
     def test_AFC_logging_behavioral(lib: Any, setup_parameters):
         """
@@ -117,7 +88,6 @@ if not SKIP_TEST:
         output_file_path = dirname(input_file_name.replace("input", "output"))
         makedirs(output_file_path, exist_ok=True)
 
-        all_time_steps = parse_AFC_logging_test_data(input_file_name)
         # Initialize results
         results = {
             "PackCurr": [],
@@ -167,7 +137,8 @@ if not SKIP_TEST:
         final_output = []
 
         for i in range(5):
-            for each_time_step in all_time_steps:
+            # Every pass replays the whole log again, from the cached arrays loaded by load_log_arrays
+            for each_time_step in parse_AFC_logging_test_data(input_file_name):
                 # save current Na_Cnt_HighestCPVCorrIdx to compare later if this is changed.
                 previous_Na_Cnt_HighestCPVCorrIdx = list(
                     lib.s_AFC_Track.NaAFC_Cnt_HighestCPVCorrIdx
@@ -29,232 +29,130 @@ if not _SKIP_TEST:
 
     def get_files_from_folder(folder_path):
         """
-        Get all CSV or XLSX files from a folder (not mixed).
+        Get all log files from a folder (not mixed).
+        Converted logs (.parquet, .csv.zst, .csv.gz) are preferred over the plain CSV they were made from.
         """
         folder = Path(folder_path)
 
         if not folder.exists():
             raise FileNotFoundError(f"Folder does not exist: {folder_path}")
 
-        csv_files = list(folder.glob("*.csv"))
-        xlsx_files = list(folder.glob("*.xlsx"))
+        found = {suffix: [f for f in folder.iterdir() if f.name.endswith(suffix)]
+                 for suffix in (".parquet", ".csv.zst", ".csv.gz", ".csv", ".xlsx")}
 
-        if csv_files and xlsx_files:
+        if any(found[suffix] for suffix in (".parquet", ".csv.zst", ".csv.gz", ".csv")) and found[".xlsx"]:
             raise ValueError(f"Folder contains both CSV and XLSX files. Cannot mix types.")
 
         def natural_sort_key(path):
             return [int(text) if text.isdigit() else text.lower()
                     for text in re.split(r'(\d+)', path.name)]
 
-        if csv_files:
-            csv_files.sort(key=natural_sort_key)
-            return [f.name for f in csv_files]
-        elif xlsx_files:
-            xlsx_files.sort(key=natural_sort_key)
-            return [f.name for f in xlsx_files]
-        else:
-            raise ValueError(f"No CSV or XLSX files found in: {folder_path}")
-
-    def parse_AFC_test_data(file_name, file_path):
-        test_cases = []
-        for row in iter_file(file_path):
-
-            # Parse Inputs
-            Time = int(ast.literal_eval(row["time_s"]))
-            PackSOC = 5000
-            PackSOC_DR = 1
-            PackCurr = 3316
-            PackCurr_DR = 1
-
-            try:
-                SEVolts = [int(item * 1000) for item in ast.literal_eval(row["se_voltages_V"])]
-            except TypeError:
-                SEVolts = [int(row["se_voltages_V"])]
-
-            SEVolts_DR = [1] * _NUM_SE
-
-            TempSnsrs = [250] * _NUM_TEMP
-            TempSnsrs_DR = [1] * _NUM_TEMP
-
-            MinTempSnsr = 250
-            MinTempSnsr_DR = 1
-
-            MaxTempSnsr = 250
-            MaxTempSnsr_DR = 1
-
-            ChgPackCapcty = 125800
-            ChgPackCapcty_DR = 1
-
-            EVSEChgStatus = row["is_charging"]
-            if EVSEChgStatus.lower() == 'true':
-                EVSEChgStatus = 1
-            elif EVSEChgStatus.lower() == 'false':
-                EVSEChgStatus = 0
-            else:
-                raise ValueError(f"Cannot determine boolean")
-
-            # Parse Expected
-            if row["new_se_voltage_z_scores"] == 'null':
-                expected_z_score = row["new_se_voltage_z_scores"]
-            else:
-                expected_z_score = [item for item in ast.literal_eval(row["new_se_voltage_z_scores"])]
-
-            if expected_z_score == 'null':
-                expected_voltage_imbalance = 'null'
-            else:
-                expected_voltage_imbalance = [int(item < -4.0) for item in expected_z_score]
-
-            if row["raw_z_scores__"] == 'null':
-                expected_raw_z_score = row["raw_z_scores__"]
-            else:
-                expected_raw_z_score = [item for item in ast.literal_eval(row["raw_z_scores__"])]
-
-            if row["noise_floor_threshold"] == 'null':
-                expected_noise_floor_threshold = row["noise_floor_threshold"]
-            else:
-                expected_noise_floor_threshold = ast.literal_eval(row["noise_floor_threshold"])
-
-            # Format data for parametrized test
-            test_case = {
-                "Inputs": {
-                    "Filename": file_name,
-                    "Time": Time,
-                    "PackSOC": PackSOC,
-                    "PackSOC_DR": PackSOC_DR,
-                    "PackCurr": PackCurr,
-                    "PackCurr_DR": PackCurr_DR,
-                    "SEVolts": SEVolts,
-                    "SEVolts_DR": SEVolts_DR,
-                    "TempSnsrs": TempSnsrs,
-                    "TempSnsrs_DR": TempSnsrs_DR,
-                    "MinTempSnsr": MinTempSnsr,
-                    "MinTempSnsr_DR": MinTempSnsr_DR,
-                    "MaxTempSnsr": MaxTempSnsr,
-                    "MaxTempSnsr_DR": MaxTempSnsr_DR,
-                    "ChgPackCapcty": ChgPackCapcty,
-                    "ChgPackCapcty_DR": ChgPackCapcty_DR,
-                    "EVSEChgStatus": EVSEChgStatus,
-                },
-                "Expected": {
-                    "VoltageImbalance": expected_voltage_imbalance,
-                    "Z_Score": expected_raw_z_score,
-                    "Noise_Floor_Threshold": expected_noise_floor_threshold,
-                },
-            }
-
-            test_cases.append(test_case)
-        return test_cases
-
-    def record_result(results, lib, input_time, each_time_step):
-        """Record a single timestep result. Also initializes results dict if empty."""
-
-        # Define the data to record
-        data = {
-            "Time": input_time,
-            "PackCurr": lib.VeAPI_I_PackCurr,
-            "SEVolts": list(lib.VaAPI_U_CellVolts),
-            "EVSEChgStatus": lib.VeAPI_b_EVSEChgStatus,
-            "Expected_VoltageImbalance": each_time_step["Expected"]["VoltageImbalance"],
-            "Expected_Z_Score": each_time_step["Expected"]["Z_Score"],
-            "Expected_Noise_Floor_Threshold": each_time_step["Expected"]["Noise_Floor_Threshold"],
-            " ": "",  # Divider between input and output
-            "Output_VoltageImbalance": list(lib.AFC_VM_VoltageImbalance.Va_b_VoltageImbalanceFlags),
-            "QnovoAFC_Log_VoltageImbalance_ZScore": list(lib.QnovoAFC_Log_VoltageImbalance_ZScore),
-            "QnovoAFC_Log_VoltageImbalance_Threshold": lib.QnovoAFC_Log_VoltageImbalance_Threshold,
-            "ChargeVoltageSums": list(lib.AFC_VM_VoltageImbalance.Va_U_SE_ChargeVoltageSums),
-            "ChargeVoltageSums_Sort": list(lib.AFC_VM_VoltageImbalance.Va_U_SE_ChargeVoltageSums_Sort),
-            "ExecutionCounter": lib.AFC_VM_VoltageImbalance.Ve_Cnt_ExecutionCounter,
-            "SamplingTime": lib.AFC_VM_VoltageImbalance.Ve_t_SamplingTime,
-            "AbsoluteVoltageSumDeviations": list(lib.AFC_VM_VoltageImbalance.Va_U_SE_AbsoluteVoltageSumDeviations),
-            "ReadyForAnalysis": lib.AFC_VM_VoltageImbalance.Ve_b_ReadyForAnalysis,
+        for files in found.values():
+            if files:
+                files.sort(key=natural_sort_key)
+                return [f.name for f in files]
+        raise ValueError(f"No CSV or XLSX files found in: {folder_path}")
+
+    decode_AFC_test_data = compile_log_decoder("fleet_voltage_imbalance")
+
+    def expected_values(log, column):
+        """Returns the expected value of each row of a log column, 'null' where the log has none."""
+        values = np.asarray(log[column])
+        null = np.asarray(log[f"{column}_null"])
+        if values.ndim > 1:
+            return ['null' if null[i] else values[i].tolist() for i in range(len(values))]
+        return ['null' if null[i] else float(values[i]) for i in range(len(values))]
+
+    # Recorded outputs that go in front of the expected values, "Row" is not a result column
+    _FLEET_INPUT_OUTPUTS = ("Row", "PackCurr", "SEVolts", "EVSEChgStatus")
+
+    def fleet_results(log, recorded):
+        """Formats a "voltage_imbalance" replay as the result columns, inputs and expected values first."""
+        rows = recorded["Row"]
+        flags = (np.asarray(log["new_se_voltage_z_scores"]) < -4.0).astype(int)
+        flags_null = np.asarray(log["new_se_voltage_z_scores_null"])
+        expected_z_score = expected_values(log, "raw_z_scores__")
+        expected_threshold = expected_values(log, "noise_floor_threshold")
+        return {
+            "Time": np.asarray(log["time_s"])[rows],
+            "PackCurr": recorded["PackCurr"],
+            "SEVolts": recorded["SEVolts"],
+            "EVSEChgStatus": recorded["EVSEChgStatus"],
+            "Expected_VoltageImbalance": ['null' if flags_null[i] else flags[i].tolist() for i in rows.tolist()],
+            "Expected_Z_Score": [expected_z_score[i] for i in rows.tolist()],
+            "Expected_Noise_Floor_Threshold": [expected_threshold[i] for i in rows.tolist()],
+            " ": [""] * len(rows),  # Divider between input and output
+            **{name: values for name, values in recorded.items() if name not in _FLEET_INPUT_OUTPUTS},
         }
 
-        # Append to results
-        for key, value in data.items():
-            if key not in results:
-                results[key] = []  # Initialize if first call
-            results[key].append(value)
-
     _CSV_FILES = get_files_from_folder(_DIR_PATH_INPUT_DATA)
 
+    @fixture(scope="module")
+    def fleet_logs():
+        """Decodes all fleet logs in parallel, each test waits only for its own file."""
+        file_paths = [join(_DIR_PATH_INPUT_DATA, csv_filename) for csv_filename in _CSV_FILES]
+        with LogDataset(file_paths, decode_AFC_test_data) as dataset:
+            yield dataset
+
+    def replay_fleet_file(lib, csv_filename, log=None, setup=None):
+        """Replays one fleet log and returns its results and the (expected, actual) imbalance flags to compare.
+
+        Module-level so :class:`LibraryPool` workers can run it on their own library instance. Every file starts from
+        the initialized library: the serial test resets the shared library through setup_parameters, pool tasks pass
+        ``setup=initialize_parameters`` to initialize their fresh copy.
+        """
+        file_path_input = join(_DIR_PATH_INPUT_DATA, csv_filename)
+        if setup is not None:
+            setup(lib)
+
+        # Load test data
+        if log is None:
+            log = load_log_arrays(str(file_path_input), decode_AFC_test_data)
+
+        # Run Function, ten Qnovo_AFC calls per 10 s sample, see the "voltage_imbalance" spec in replay_engine
+        recorded = compile_replay(lib, "voltage_imbalance").run(log)
+        results = fleet_results(log, recorded)
+
+        # Collect results to compare
+        comparisons = [
+            (expected, actual.tolist())
+            for expected, actual in zip(results["Expected_VoltageImbalance"], recorded["Output_VoltageImbalance"])
+            if expected != 'null'
+        ]
+
+        return results, comparisons
+
+    @fixture(scope="module")
+    def fleet_replays():
+        """Replays all fleet logs on independent, initialized library instances when AFC_LIB_WORKERS is set, None
+        otherwise."""
+        if not lib_workers():
+            yield None
+            return
+        with LibraryPool() as pool:
+            yield {
+                csv_filename: pool.submit(replay_fleet_file, csv_filename, setup=initialize_parameters)
+                for csv_filename in _CSV_FILES
+            }
+
     @pytest.mark.parametrize("csv_filename", _CSV_FILES)
-    def test_AFC_time_based_VoltageImbalance(lib: Any, csv_filename: str):
+    def test_AFC_time_based_VoltageImbalance(lib: Any, request: pytest.FixtureRequest, fleet_replays, csv_filename: str):
 
         # Build paths for this specific CSV file
         file_path_input = join(_DIR_PATH_INPUT_DATA, csv_filename)
         file_path_output = join(_DIR_PATH_OUTPUT_DATA, f"processed_{csv_filename}")
         file_path_reference = join(_DIR_PATH_REFERENCE_DATA, f"reference_{csv_filename}")
 
-        # Parse test data
-        all_time_steps = parse_AFC_test_data(file_name=csv_filename, file_path=file_path_input)
-
-        # Initialize results
-        results = {}
-
-        for each_time_step in all_time_steps:
-            # Setup Variables
-            # ------------------------------------------------
-            input_time = each_time_step["Inputs"]["Time"]
-            lib.VeAPI_I_PackCurr = each_time_step["Inputs"]["PackCurr"]
-            lib.VeAPI_b_PackCurr_DR = each_time_step["Inputs"]["PackCurr_DR"]
-            lib.VaAPI_U_CellVolts = each_time_step["Inputs"]["SEVolts"]
-            lib.VaAPI_b_CellVolts_DR = each_time_step["Inputs"]["SEVolts_DR"]
-            lib.VaAPI_T_TempSnsrs = each_time_step["Inputs"]["TempSnsrs"]
-            lib.VaAPI_b_TempSnsrs_DR = each_time_step["Inputs"]["TempSnsrs_DR"]
-            lib.VeAPI_T_MinTempSnsr = each_time_step["Inputs"]["MinTempSnsr"]
-            lib.VeAPI_b_MinTempSnsr_DR = each_time_step["Inputs"]["MinTempSnsr_DR"]
-            lib.VeAPI_T_MaxTempSnsr = each_time_step["Inputs"]["MaxTempSnsr"]
-            lib.VeAPI_b_MaxTempSnsr_DR = each_time_step["Inputs"]["MaxTempSnsr_DR"]
-            lib.VeAPI_Cap_ChgPackCapcty = each_time_step["Inputs"]["ChgPackCapcty"]
-            lib.VeAPI_b_ChgPackCapcty_DR = each_time_step["Inputs"]["ChgPackCapcty_DR"]
-            lib.VeAPI_Pct_PackSOC = each_time_step["Inputs"]["PackSOC"]
-            lib.VeAPI_b_PackSOC_DR = each_time_step["Inputs"]["PackSOC_DR"]
-            lib.VeAPI_b_EVSEChgStatus = each_time_step["Inputs"]["EVSEChgStatus"]
-
-            # Run Function
-            # ------------------------------------------------
-            for i in range(10):
-                lib.Qnovo_AFC(
-                    lib.VaAPI_Cmp_NVMRegion,
-                    lib.VaAPI_Cmp_NVMLoggingRegion,
-                    lib.VeAPI_I_PackCurr,
-                    lib.VeAPI_b_PackCurr_DR,
-                    lib.VaAPI_U_CellVolts,
-                    lib.VaAPI_b_CellVolts_DR,
-                    lib.VaAPI_T_TempSnsrs,
-                    lib.VaAPI_b_TempSnsrs_DR,
-                    lib.VeAPI_T_MinTempSnsr,
-                    lib.VeAPI_b_MinTempSnsr_DR,
-                    lib.VeAPI_T_MaxTempSnsr,
-                    lib.VeAPI_b_MaxTempSnsr_DR,
-                    lib.VeAPI_Cap_ChgPackCapcty,
-                    lib.VeAPI_b_ChgPackCapcty_DR,
-                    lib.VeAPI_Pct_PackSOC,
-                    lib.VeAPI_b_PackSOC_DR,
-                    lib.VeAPI_b_EVSEChgStatus,
-                    lib.VeAPI_e_EVSEChgLevel,
-                    ffi.addressof(lib, "VaAFC_Cmp_CTE_Info"),
-                    ffi.addressof(lib, "VeAFC_e_ErrorFlags"),
-                    ffi.addressof(lib, "VeAFC_I_ChgPackCurr"),
-                    ffi.addressof(lib, "VeAFC_I_MaxReferenceCurr"),
-                    ffi.addressof(lib, "VeAFC_I_MitigatedCurr"),
-                    ffi.addressof(lib, "VeAFC_U_ChgPackVolt"),
-                    ffi.addressof(lib, "VeAFC_b_ChgCompletionFlag"),
-                    ffi.addressof(lib, "VeAFC_b_ExtremeAgingFlag"),
-                    ffi.addressof(lib, "VeAFC_b_AbnormalAgingFlag"),
-                    ffi.addressof(lib, "VeAFC_b_EarlyWarningAgingFlag"),
-                    ffi.addressof(lib, "VeAFC_b_EOLFlag"),
-                    ffi.addressof(lib, "VeAFC_b_SOCImbalanceFlag"),
-                )
-
-            # Record results
-            record_result(results, lib, input_time, each_time_step)
+        if fleet_replays is None:
+            request.getfixturevalue("setup_parameters")
+            fleet_logs = request.getfixturevalue("fleet_logs")
+            results, comparisons = replay_fleet_file(lib, csv_filename, log=fleet_logs[file_path_input])
+        else:
+            results, comparisons = fleet_replays[csv_filename].result()
 
-            # Compare results
-            expected_voltage_imbalance = each_time_step["Expected"]["VoltageImbalance"]
-            if expected_voltage_imbalance != 'null':
-                actual_voltage_imbalance = list(lib.AFC_VM_VoltageImbalance.Va_b_VoltageImbalanceFlags)
-                compare_result(expected=expected_voltage_imbalance, actual=actual_voltage_imbalance)
+        # Compare results
+        for expected_voltage_imbalance, actual_voltage_imbalance in comparisons:
+            compare_result(expected=expected_voltage_imbalance, actual=actual_voltage_imbalance)
 
         #write_output_to_excel(results, file_path_output)
 
@@ -0,0 +1,147 @@
+"""Test Module Description:
+    Test module for the CTE estimate analysis in 'cte_analysis'.
+
+    The analysis runs on recorded estimate arrays, so these test cases build the arrays by hand and need no library
+    build.
+
+Requirements:
+    - [JIRA ticket or requirement reference]
+    - Python version >= 3.10.4
+    - Pytest version >= 7.4.3
+"""
+
+import numpy as np
+import pytest
+
+from .cte_analysis import CTE_ESTIMATES, analyze_cte_estimates, charge_sessions, cte_events
+
+
+def make_estimates(time_80, time_end_soc=None):
+    """Returns ``(steps, 1, 2)`` estimates of one charger class, ``time_end_soc`` defaults to ``time_80``."""
+
+    time_end_soc = time_80 if time_end_soc is None else time_end_soc
+    return np.stack([time_80, time_end_soc], axis=1).reshape(len(time_80), 1, 2)
+
+
+def test_charge_sessions_split_plugged_in_periods():
+    charging = np.array([0, 1, 1, 0, 0, 1, 1, 1, 0], dtype=bool)
+
+    assert charge_sessions(charging).tolist() == [[1, 3], [5, 8]]
+
+
+def test_charge_sessions_start_at_first_started_step():
+    charging = np.array([1, 1, 1, 1, 0, 1, 1], dtype=bool)
+    started = np.array([0, 0, 1, 1, 0, 0, 0], dtype=bool)
+
+    # The second period never has an estimate to start from.
+    assert charge_sessions(charging, started).tolist() == [[2, 4]]
+
+
+def test_rises_and_jumps():
+    analysis = analyze_cte_estimates(make_estimates([30, 29, 31, 20, 19]), charging=np.ones(5, dtype=bool))
+
+    assert np.flatnonzero(analysis["rises"][:, 0, 0]).tolist() == [2]
+    assert np.flatnonzero(analysis["jumps"][:, 0, 0]).tolist() == [3]
+
+
+def test_step_after_zero_estimate_is_not_compared():
+    analysis = analyze_cte_estimates(make_estimates([2, 1, 0, 40]), charging=np.ones(4, dtype=bool))
+
+    assert not analysis["rises"].any()
+    assert not analysis["jumps"].any()
+
+
+def test_estimates_are_gated_on_their_own_previous_value():
+    # time_80 is done while time_end_soc still runs, the time_end_soc rise is reported on its own.
+    estimates = make_estimates([1, 0, 0, 0], [12, 11, 13, 12])
+
+    analysis = analyze_cte_estimates(estimates, charging=np.ones(4, dtype=bool))
+
+    assert not analysis["rises"][:, 0, 0].any()
+    assert np.flatnonzero(analysis["rises"][:, 0, 1]).tolist() == [2]
+
+
+def test_steps_are_not_compared_across_sessions():
+    charging = np.array([1, 1, 0, 0, 1, 1], dtype=bool)
+    estimates = make_estimates([10, 9, 9, 9, 20, 19])
+
+    analysis = analyze_cte_estimates(estimates, charging=charging)
+
+    assert analysis["sessions"].tolist() == [[0, 2], [4, 6]]
+    assert not analysis["rises"].any()
+    assert not analysis["jumps"].any()
+
+
+def test_zero_step_and_actual_charge_time():
+    analysis = analyze_cte_estimates(
+        make_estimates([3, 2, 1, 0, 0]), charging=np.ones(5, dtype=bool), step_minutes=1
+    )
+
+    assert analysis["expected"][0, 0].tolist() == [3, 3]
+    assert analysis["zero_step"][0, 0].tolist() == [3, 3]
+    assert analysis["actual"][0, 0].tolist() == [3.0, 3.0]
+    assert analysis["deviation"][0, 0].tolist() == [0.0, 0.0]
+    assert not analysis["above_kpi"].any()
+
+
+@pytest.mark.parametrize(
+    "zero_step, deviation, above_kpi",
+    [
+        pytest.param(9, 100 / 9.5, False, id="within_kpi"),
+        pytest.param(5, 500 / 7.5, True, id="above_kpi"),
+    ],
+)
+def test_deviation_against_kpi(zero_step, deviation, above_kpi):
+    time_80 = np.maximum(10 - np.arange(12) * 10 // zero_step, 0)
+    time_80[zero_step:] = 0
+
+    analysis = analyze_cte_estimates(
+        make_estimates(time_80), charging=np.ones(12, dtype=bool), accepted_deviation=15, step_minutes=1
+    )
+
+    assert analysis["zero_step"][0, 0, 0] == zero_step
+    assert analysis["deviation"][0, 0, 0] == pytest.approx(deviation)
+    assert analysis["above_kpi"][0, 0, 0] == above_kpi
+
+
+def test_deviation_is_nan_without_zero_estimate():
+    analysis = analyze_cte_estimates(make_estimates([5, 4, 3]), charging=np.ones(3, dtype=bool))
+
+    assert analysis["zero_step"][0, 0].tolist() == [-1, -1]
+    assert analysis["actual"][0, 0].tolist() == [0.0, 0.0]
+    assert np.isnan(analysis["deviation"]).all()
+    assert not analysis["above_kpi"].any()
+
+
+def test_each_session_has_its_own_expected_charge_time():
+    charging = np.array([1, 1, 1, 0, 1, 1, 1, 1], dtype=bool)
+    estimates = make_estimates([2, 1, 0, 0, 6, 4, 2, 0])
+
+    analysis = analyze_cte_estimates(estimates, charging=charging, step_minutes=1)
+
+    assert analysis["expected"][:, 0, 0].tolist() == [2, 6]
+    assert analysis["zero_step"][:, 0, 0].tolist() == [2, 7]
+    assert analysis["actual"][:, 0, 0].tolist() == [2.0, 3.0]
+    assert analysis["above_kpi"][:, 0, 0].tolist() == [False, True]
+
+
+def test_cte_events():
+    estimates = make_estimates([10, 11, 3, 0], [20, 19, 18, 17])
+    analysis = analyze_cte_estimates(estimates, charging=np.ones(4, dtype=bool), step_minutes=1)
+
+    events = list(cte_events(analysis, estimates, chargers=("charging",)))
+
+    assert events == [
+        {"step": 1, "charger": "charging", "metric": CTE_ESTIMATES[0], "value": 11, "previous": 10, "rule": "rise"},
+        {"step": 2, "charger": "charging", "metric": CTE_ESTIMATES[0], "value": 3, "previous": 11, "rule": "jump"},
+        {
+            "step": 3,
+            "charger": "charging",
+            "metric": CTE_ESTIMATES[0],
+            "value": 3.0,
+            "previous": 10,
+            "rule": "above_kpi",
+            "session": 0,
+            "deviation": round(7 / 6.5 * 100, 2),
+        },
+    ]
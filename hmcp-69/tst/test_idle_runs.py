@@ -0,0 +1,64 @@
+"""Test Module Description:
+    Test module for 'idle_runs', which finds the idle rows a fast-forwarded replay collapses.
+
+    The runs are found on decoded log arrays, so these test cases build the arrays by hand and need no library build.
+
+Requirements:
+    - [JIRA ticket or requirement reference]
+    - Python version >= 3.10.4
+    - Pytest version >= 7.4.3
+"""
+
+import numpy as np
+
+from .replay import idle_runs
+
+
+def make_log(pack_curr, cell_volts):
+    return {"PackCurr": np.array(pack_curr), "CellVolts": np.array(cell_volts)}
+
+
+def test_idle_rows_with_same_inputs_form_one_run():
+    log = make_log([5, 0, 0, 0, 5], [[1, 2]] * 5)
+    idle = log["PackCurr"] == 0
+
+    assert idle_runs(log, ["PackCurr", "CellVolts"], idle, range(5)).tolist() == [1, 3, 0, 0, 1]
+
+
+def test_changed_input_starts_a_new_run():
+    log = make_log([0, 0, 0, 0], [[1, 2], [1, 2], [1, 3], [1, 3]])
+    idle = np.ones(4, dtype=bool)
+
+    assert idle_runs(log, ["PackCurr", "CellVolts"], idle, range(4)).tolist() == [2, 0, 2, 0]
+
+
+def test_rows_that_are_not_idle_are_never_collapsed():
+    log = make_log([7, 7, 7], [[1]] * 3)
+    idle = np.zeros(3, dtype=bool)
+
+    assert idle_runs(log, ["PackCurr", "CellVolts"], idle, range(3)).tolist() == [1, 1, 1]
+
+
+def test_columns_left_out_do_not_break_runs():
+    log = make_log([0, 0, 0], [[1]] * 3)
+    log["Time"] = np.arange(3)
+    idle = np.ones(3, dtype=bool)
+
+    assert idle_runs(log, ["PackCurr", "CellVolts"], idle, range(3)).tolist() == [3, 0, 0]
+
+
+def test_runs_within_selected_rows():
+    log = make_log([0] * 6, [[1]] * 6)
+    idle = np.ones(6, dtype=bool)
+
+    # The run is cut at the first selected row, e.g. a session or a resumed checkpoint.
+    repeats = idle_runs(log, ["PackCurr", "CellVolts"], idle, range(2, 6))
+
+    assert repeats.tolist() == [4, 0, 0, 0]
+    assert repeats.sum() == 4
+
+
+def test_no_rows():
+    log = make_log([0], [[1]])
+
+    assert idle_runs(log, ["PackCurr"], np.ones(1, dtype=bool), range(0)).tolist() == []
@@ -0,0 +1,75 @@
+"""Test Module Description:
+    Test module for the charge-session index in 'log_index'.
+
+    Sessions are found in a charging status column, so these test cases pass the columns by hand and need no library
+    build.
+
+Requirements:
+    - [JIRA ticket or requirement reference]
+    - Python version >= 3.10.4
+    - Pytest version >= 7.4.3
+"""
+
+import pytest
+
+from .log_index import find_sessions, select_session, session_rows
+
+
+def test_find_sessions():
+    sessions = find_sessions([0, 1, 1, 0, 0, 2, 2, 0], soc=[10, 11, 12, 13, 14, 15, 16, 17])
+
+    assert sessions == [
+        {
+            "session": 0,
+            "start_row": 1,
+            "end_row": 3,
+            "start_offset": None,
+            "end_offset": None,
+            "soc_start": 11.0,
+            "soc_end": 12.0,
+        },
+        {
+            "session": 1,
+            "start_row": 5,
+            "end_row": 7,
+            "start_offset": None,
+            "end_offset": None,
+            "soc_start": 15.0,
+            "soc_end": 16.0,
+        },
+    ]
+
+
+def test_find_sessions_at_log_edges():
+    sessions = find_sessions([1, 1, 0, 1])
+
+    assert [(session["start_row"], session["end_row"]) for session in sessions] == [(0, 2), (3, 4)]
+    assert sessions[0]["soc_start"] is None
+
+
+def test_find_sessions_from_csv_text():
+    # CSV columns are read as text.
+    sessions = find_sessions(["0", "1", "1.0", "0"], soc=["9.5", "10", "11", "12"])
+
+    assert [(session["start_row"], session["end_row"]) for session in sessions] == [(1, 3)]
+    assert (sessions[0]["soc_start"], sessions[0]["soc_end"]) == (10.0, 11.0)
+
+
+def test_find_sessions_without_charging():
+    assert find_sessions([0, 0, 0]) == []
+    assert find_sessions([]) == []
+
+
+def test_session_rows():
+    index = {"file": "log.csv", "rows": 8, "sessions": find_sessions([0, 1, 1, 0, 0, 1, 1, 0])}
+
+    assert session_rows(index, None) == range(8)
+    assert session_rows(index, 0) == range(1, 3)
+    assert session_rows(index, -1) == range(5, 7)
+
+
+def test_select_missing_session():
+    index = {"file": "log.csv", "rows": 3, "sessions": find_sessions([0, 1, 0])}
+
+    with pytest.raises(IndexError):
+        select_session(index, 1)
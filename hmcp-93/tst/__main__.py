@@ -33,6 +33,10 @@ from python_calamine import CalamineWorkbook
 import csv
 import xlsxwriter
 
+from .log_decode import LOG_CHUNK_ROWS, iter_column_blocks, iter_wide_rows, open_table
+from .sim_clock import AFC_TICK_MS, CTE_TICK_MS, VirtualClock
+from .xdist_worker import dat_files_dir, worker_id, worker_path
+
 MAKE_HTML = True  # Set true to allow html report generation.
 
 ffi = cffi.FFI()
@@ -463,7 +467,7 @@ def setup_parameters(lib) -> None:
 
     yield
 
-    clean_dat_files(PROJECT_PATH)
+    clean_dat_files(dat_files_dir(PROJECT_PATH))
 
 
 def write_output_to_excel(results, file_path):
@@ -528,28 +532,50 @@ def write_output_to_csv(results, file_path, ap=False):
                 index += 1
             writer.writerow(data_row)
 
-def iter_file(file_path, sheet_name=None):
-    """Works for .csv and Excel files (.xlsx, .xls, .xlsb, .ods)"""
-
-    if file_path.endswith(".csv"):
-        with open(file_path, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                yield row
-    elif file_path.endswith((".xlsx", ".xls", ".xlsb", ".ods")):
-        workbook = CalamineWorkbook.from_path(file_path)
-        if sheet_name:
-            rows = iter(workbook.get_sheet_by_name(sheet_name).to_python())
+def iter_file(file_path, sheet_name=None, groups=None, columns=None, filters=None):
+    """Works for .csv, .csv.gz, .csv.zst, .parquet and Excel files (.xlsx, .xls, .xlsb, .ods)
+
+    Pass ``groups`` for wide-layout logs, e.g. ``{"CellVolts": "cell_", "TempSnsrs": "temp_"}``. The group column
+    positions are then resolved once and each row carries one int32 array per group instead of the separate columns.
+
+    ``columns`` keeps only the listed columns. For Parquet files only those columns are read from disk, and
+    ``filters`` (``pyarrow.parquet`` DNF form, e.g. ``[("EVSEChgStatus", "==", 1)]``) skips rows while reading.
+    """
+
+    with open_table(file_path, sheet_name, columns, filters) as (headers, rows):
+        if groups:
+            yield from iter_wide_rows(headers, rows, groups)
         else:
-            rows = iter(workbook.get_sheet_by_index(0).to_python())
-        headers = list(map(str, next(rows)))
-        for row in rows:
-            yield dict(zip(headers, row))
-        workbook.close()
-    else:
-        raise ValueError(
-            f"Unsupported file format: {file_path}. Supported formats: .csv, .xlsx, .xls, .xlsb, .ods"
-        )
+            for row in rows:
+                yield dict(zip(headers, row))
+
+
+def iter_file_blocks(
+    file_path, columns=None, dtypes=None, sheet_name=None, block_size=LOG_CHUNK_ROWS, filters=None
+):
+    """Reads a log file in fixed-size blocks of column arrays.
+
+    Only ``block_size`` rows are held at a time, and only the requested columns are kept, so large input and reference
+    workbooks are read at roughly constant memory.
+
+    Args:
+        file_path: Path to the .csv, .csv.gz, .csv.zst, .parquet or Excel file.
+        columns: Columns to keep, in output order. Defaults to all columns. Parquet only reads these from disk.
+        dtypes: Mapping of column name to dtype, e.g. ``{"PackCurr": np.int32}``. Other columns are object arrays.
+        sheet_name: Excel sheet to read. Defaults to the first sheet.
+        block_size: Number of rows per block.
+        filters: Parquet row filter in ``pyarrow.parquet`` DNF form.
+
+    Yields:
+        dict: Column name to 1-D array of the block's values.
+
+    Raises:
+        KeyError: If a requested column is not in the header.
+        ValueError: If the file format is not supported.
+    """
+
+    with open_table(file_path, sheet_name, columns, filters) as (headers, rows):
+        yield from iter_column_blocks(headers, rows, columns, dtypes, block_size)
 
 if __name__ == "__main__":
     current_dir = Path(__file__).resolve().parent
@@ -3,6 +3,9 @@
 This module customizes the pytest-html report by adding additional columns
 for descriptions and JIRA links. It utilizes pytest hooks to modify the HTML
 results table and to set report attributes based on custom markers.
+
+Under pytest-xdist each worker runs in its own working directory and the modules that record stack-parametrized
+results are kept on one worker each, see :mod:`xdist_worker`.
 """
 import logging
 import os
@@ -14,6 +17,8 @@ from _pytest.nodes import Item
 from _pytest.reports import TestReport
 from src.common.paths import BUILDOUTPUTS_REPORTS_PATH
 
+from .xdist_worker import collect_worker_files, worker_dir
+
 JIRA_LINK = "https://qnovo.atlassian.net/browse/"
 
 
@@ -34,6 +39,7 @@ def pytest_configure(config: Config) -> None:
     config.addinivalue_line(
         "markers", "run_exclusively: mark a test to run exclusively"
     )
+    config.addinivalue_line("markers", "xdist_group(name): run all tests of a group on the same xdist worker")
 
     # Configure root logger to capture all INFO level messages
     logging.basicConfig(level=logging.INFO)
@@ -46,15 +52,27 @@ def pytest_configure(config: Config) -> None:
     # Replace existing handlers with the console handler
     logger.handlers = [console_handler]
 
+    if hasattr(config, "workerinput"):
+        # pytest-xdist worker: the NVM .dat files and relative output files go to a directory of its own
+        os.chdir(worker_dir(os.getcwd(), config.workerinput["workerid"]))
+    elif getattr(config.option, "dist", "no") == "load":
+        # pytest-xdist controller: honour the xdist_group markers set in pytest_collection_modifyitems
+        config.option.dist = "loadgroup"
+        config.option.loadgroup = True
+
 
+@pytest.hookimpl(tryfirst=True)
 def pytest_collection_modifyitems(config: Config, items: List[Item]) -> None:
     """Modifies the collection of items to run by simplifying test identifiers and optionally skipping tests.
 
-    This hook is invoked after the collection phase to alter the list of collected test items. It performs two main
+    This hook is invoked after the collection phase to alter the list of collected test items. It performs three main
     functions:
     1. Simplifies test identifiers to only include the test function names, making the output more readable.
     2. Skips all tests not marked with @pytest.mark.run_exclusively if at least one test has that marker. This allows
        for selective test execution, focusing on tests deemed critical or under active development.
+    3. Groups the tests of modules with WRITE_STACK_PARAM_RESULTS set, so that pytest-xdist runs each of them on a
+       single worker and its JSON results file is written by one process only. It runs before the xdist hook that
+       reads the groups.
 
     Args:
         config (_pytest.config.Config): The pytest configuration object, providing access to command line options and
@@ -67,6 +85,10 @@ def pytest_collection_modifyitems(config: Config, items: List[Item]) -> None:
         simplified_id = item.nodeid.split("::")[-1]
         item._nodeid = simplified_id
 
+        module = getattr(item, "module", None)
+        if getattr(module, "WRITE_STACK_PARAM_RESULTS", False):
+            item.add_marker(pytest.mark.xdist_group(module.__name__))
+
     # Skips all tests not marked with @pytest.mark.run_exclusively
     run_exclusive_test = [
         item for item in items if item.get_closest_marker("run_exclusively")
@@ -131,8 +153,12 @@ def pytest_runtest_makereport(item: Item, call: pytest.CallInfo) -> None:
 def pytest_sessionstart(session):
     """Hook executed at the beginning of the pytest session.
 
-    Deletes the test log JSON file to start fresh for the session.
+    Deletes the test log JSON file to start fresh for the session. Under pytest-xdist only the controller does, workers
+    start while others may already be writing results.
     """
+    if hasattr(session.config, "workerinput"):
+        return
+
     file_name = "test_results.json"  # The name of your log file
     file_path = os.path.join(BUILDOUTPUTS_REPORTS_PATH, file_name)
 
@@ -140,6 +166,16 @@ def pytest_sessionstart(session):
         os.remove(file_path)
 
 
+def pytest_sessionfinish(session):
+    """Hook executed at the end of the pytest session.
+
+    Under pytest-xdist the controller moves the output files the workers wrote to their working directories back to
+    the directory the session was started in.
+    """
+    if not hasattr(session.config, "workerinput"):
+        collect_worker_files(os.getcwd())
+
+
 def set_report_attributes_from_markers(
     item: Item, report: TestReport, marker_names: List[str]
 ) -> None:
@@ -0,0 +1,401 @@
+"""Vectorized decoders for replay log columns.
+
+Several replay logs store per-cell data as bracketed lists inside a single cell, e.g. ``"[3.405,3.408,...]"``, or
+``null`` when no value was logged. Decoding those with ``ast.literal_eval`` per row and per column dominates parse time
+on large logs. The helpers in this module decode a whole column in one pass into a 2-D NumPy array plus a null mask.
+:func:`iter_list_columns` does the same chunk by chunk, so a parser can stream a log of any length in bounded memory.
+
+Other logs store the same data in a wide layout, one column per element (``cell_1 .. cell_192``, ``temp_0 .. temp_17``).
+:func:`iter_wide_rows` resolves those header positions once and gathers each group into an integer array per row.
+
+:func:`open_table` is the single entry point for reading a log: plain, gzip or zstd compressed CSV, Parquet and Excel.
+"""
+
+import csv
+import gzip
+import io
+import re
+from contextlib import contextmanager
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NULL_TOKEN = "null"
+LOG_CHUNK_ROWS = 1024
+CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+EXCEL_SUFFIXES = (".xlsx", ".xls", ".xlsb", ".ods")
+LOG_FILE_SUFFIXES = CSV_SUFFIXES + (".parquet",) + EXCEL_SUFFIXES
+
+
+def _iter_sheet_rows(sheet) -> Iterator[list]:
+    """Yields the rows of a Calamine sheet one at a time instead of building the whole list with ``to_python()``."""
+
+    # iter_rows() is only available from python-calamine 0.2
+    if hasattr(sheet, "iter_rows"):
+        return iter(sheet.iter_rows())
+    return iter(sheet.to_python())
+
+
+def _open_text(file_path: str):
+    """Opens a plain, gzip or zstd compressed CSV file as text."""
+
+    if file_path.endswith(".csv.gz"):
+        return gzip.open(file_path, "rt", encoding="utf-8-sig", newline="")
+    if file_path.endswith(".csv.zst"):
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError(f"Reading {file_path} needs the 'zstandard' package") from error
+        stream = zstandard.ZstdDecompressor().stream_reader(open(file_path, "rb"), closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    return open(file_path, "r", encoding="utf-8-sig", newline="")
+
+
+@contextmanager
+def _open_parquet(file_path: str, columns: Optional[Sequence[str]], filters: Optional[list]):
+    try:
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(f"Reading {file_path} needs the 'pyarrow' package") from error
+
+    dataset = pyarrow.dataset.dataset(file_path, format="parquet")
+    header = list(columns) if columns is not None else dataset.schema.names
+    expression = pyarrow.parquet.filters_to_expression(filters) if filters else None
+
+    def rows():
+        for batch in dataset.to_batches(columns=header, filter=expression):
+            yield from zip(*(batch.column(name).to_pylist() for name in header))
+
+    yield header, rows()
+
+
+def _project(header: List[str], rows: Iterator, columns: Optional[Sequence[str]]):
+    if columns is None:
+        return header, rows
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise KeyError(f"Columns not found in header: {missing}")
+    positions = [header.index(column) for column in columns]
+    return list(columns), ([row[i] for i in positions] for row in rows)
+
+
+@contextmanager
+def open_table(
+    file_path,
+    sheet_name: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[list] = None,
+) -> Iterator[Tuple[List[str], Iterator[list]]]:
+    """Opens a log as a header plus a lazy iterator of raw rows.
+
+    Supports plain and compressed CSV (``.csv``, ``.csv.gz``, ``.csv.zst``), Parquet and Excel files. Empty rows are
+    skipped. A UTF-8 byte order mark at the start of a CSV file is dropped from the first column name. CSV and Excel
+    values are returned as read; Parquet values keep the types stored in the file, missing values are None.
+
+    Args:
+        file_path: Path to the log.
+        sheet_name: Excel sheet to read. Defaults to the first sheet.
+        columns: Columns to keep, in output order. Parquet only reads these columns from disk.
+        filters: Parquet row filter in ``pyarrow.parquet`` DNF form, e.g. ``[("EVSEChgStatus", "==", 1)]``. Row groups
+                 that cannot match are skipped without being read.
+
+    Yields:
+        tuple: ``(header, rows)``, valid until the context exits.
+
+    Raises:
+        KeyError: If a requested column is not in the header.
+        ValueError: If the file format is not supported, or ``filters`` is given for a non-Parquet file.
+    """
+
+    file_path = str(file_path)
+    if filters and not file_path.endswith(".parquet"):
+        raise ValueError(f"Row filters need a Parquet file: {file_path}")
+
+    if file_path.endswith(CSV_SUFFIXES):
+        with _open_text(file_path) as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            yield _project(header, (row for row in reader if row), columns)
+    elif file_path.endswith(".parquet"):
+        with _open_parquet(file_path, columns, filters) as table:
+            yield table
+    elif file_path.endswith(EXCEL_SUFFIXES):
+        from python_calamine import CalamineWorkbook
+
+        workbook = CalamineWorkbook.from_path(file_path)
+        try:
+            if sheet_name:
+                sheet = workbook.get_sheet_by_name(sheet_name)
+            else:
+                sheet = workbook.get_sheet_by_index(0)
+            rows = _iter_sheet_rows(sheet)
+            header = list(map(str, next(rows)))
+            yield _project(header, (row for row in rows if len(row)), columns)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(
+            f"Unsupported file format: {file_path}. Supported formats: {', '.join(LOG_FILE_SUFFIXES)}"
+        )
+
+
+def decode_list_column(
+    values: Iterable,
+    dtype: type = np.float64,
+    scale: Optional[float] = None,
+    null: str = NULL_TOKEN,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Decodes a column of bracketed list strings into a 2-D array.
+
+    All non-null rows are joined and tokenized at once, so the cost is a single string split and a single float
+    conversion for the whole column. A bare scalar cell (e.g. a number read from an Excel cell) is treated as a
+    one-element list.
+
+    Args:
+        values: Column values, e.g. ``"[3.405, 3.408]"``, ``"null"``, ``None`` or a bare number.
+        dtype: Dtype of the returned array. Values are parsed as float64 first, so integer dtypes truncate toward
+               zero like ``int(item)``.
+        scale: Optional factor applied before the cast, e.g. ``1000`` for V to mV.
+        null: Token that marks a missing row.
+
+    Returns:
+        tuple: ``(array, mask)`` where ``array`` has shape ``(N, width)`` and ``mask`` has shape ``(N,)`` and is True
+               for null rows. Null rows are zero-filled.
+
+    Raises:
+        ValueError: If the non-null rows do not all have the same number of elements, or an element is not numeric.
+    """
+
+    values = list(values)
+    n_rows = len(values)
+    mask = np.fromiter(
+        (value is None or value == null or value == "" for value in values),
+        dtype=bool,
+        count=n_rows,
+    )
+
+    texts = [str(value).strip().strip("[]") for value, is_null in zip(values, mask) if not is_null]
+    widths = {text.count(",") + 1 if text.strip() else 0 for text in texts}
+
+    if len(widths) > 1:
+        raise ValueError(f"List column rows have different lengths: {sorted(widths)}")
+    width = widths.pop() if widths else 0
+
+    array = np.zeros((n_rows, width), dtype=dtype)
+    if texts and width:
+        flat = np.asarray(",".join(texts).split(","), dtype=np.float64)
+        if scale is not None:
+            flat *= scale
+        array[~mask] = flat.reshape(-1, width).astype(dtype)
+
+    return array, mask
+
+
+def decode_nullable_column(
+    values: Iterable,
+    dtype: type = np.float64,
+    null: str = NULL_TOKEN,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Decodes a column of scalars that may contain ``null`` into a 1-D array.
+
+    Args:
+        values: Column values.
+        dtype: Dtype of the returned array.
+        null: Token that marks a missing row.
+
+    Returns:
+        tuple: ``(array, mask)`` with ``mask`` True for null rows. Null rows are zero-filled.
+    """
+
+    array, mask = decode_list_column(values, dtype=dtype, null=null)
+    if array.shape[1] == 0:
+        return np.zeros(len(mask), dtype=dtype), mask
+    return array[:, 0], mask
+
+
+def iter_chunks(iterable: Iterable, size: int = LOG_CHUNK_ROWS) -> Iterator[List]:
+    """Splits an iterable into lists of at most ``size`` items.
+
+    Args:
+        iterable: Items to split, e.g. the rows yielded by ``iter_file``.
+        size: Maximum number of items per chunk.
+
+    Yields:
+        list: The next chunk of items.
+    """
+
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_list_columns(
+    rows: Iterable[dict],
+    columns: Sequence[str],
+    dtype: type = np.float64,
+    scale: Optional[float] = None,
+    chunk_size: int = LOG_CHUNK_ROWS,
+    null: str = NULL_TOKEN,
+) -> Iterator[Tuple[dict, Dict[str, Optional[np.ndarray]]]]:
+    """Streams rows together with their decoded list columns.
+
+    Rows are read ``chunk_size`` at a time and each list column of the chunk is decoded with
+    :func:`decode_list_column`, so only one chunk is held in memory regardless of the log length.
+
+    Args:
+        rows: Row dicts, e.g. from ``iter_file``.
+        columns: Names of the bracketed list columns to decode.
+        dtype: Dtype of the decoded arrays.
+        scale: Optional factor applied before the cast.
+        chunk_size: Number of rows decoded together.
+        null: Token that marks a missing value.
+
+    Yields:
+        tuple: ``(row, lists)`` where ``lists`` maps each column to its 1-D array, or None for a null value.
+
+    Raises:
+        ValueError: If a list column cannot be decoded.
+    """
+
+    for chunk in iter_chunks(rows, chunk_size):
+        decoded = {
+            column: decode_list_column((row[column] for row in chunk), dtype=dtype, scale=scale, null=null)
+            for column in columns
+        }
+        for i, row in enumerate(chunk):
+            yield row, {
+                column: None if mask[i] else array[i]
+                for column, (array, mask) in decoded.items()
+            }
+
+
+def column_group_positions(header: Sequence[str], prefix: str) -> List[int]:
+    """Finds the positions of a wide column group in a header.
+
+    Matches ``<prefix><N>`` and ``<prefix><N>_`` column names and orders them by ``N``, so ``cell_2`` comes before
+    ``cell_10`` whatever the column order in the file.
+
+    Args:
+        header: Column names of the log.
+        prefix: Column name prefix of the group, e.g. ``"cell_"``.
+
+    Returns:
+        list: Header positions ordered by the numeric suffix.
+
+    Raises:
+        KeyError: If no column matches the prefix.
+    """
+
+    pattern = re.compile(rf"^{re.escape(prefix)}(\d+)_?$")
+    indexed = sorted(
+        (int(match.group(1)), i)
+        for i, column in enumerate(header)
+        if (match := pattern.match(str(column)))
+    )
+    if not indexed:
+        raise KeyError(f"No columns with prefix '{prefix}'")
+    return [i for _, i in indexed]
+
+
+def iter_wide_rows(
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    groups: Dict[str, str],
+    dtype: type = np.int32,
+    chunk_size: int = LOG_CHUNK_ROWS,
+) -> Iterator[dict]:
+    """Streams rows of a wide-layout log with each column group gathered into an array.
+
+    Group positions are resolved once from the header. Each chunk of rows is converted to a single ``(chunk, n)``
+    array per group, so there is no per-element name formatting, dict lookup or ``int()`` call.
+
+    Args:
+        header: Column names of the log.
+        rows: Raw rows as sequences of values, e.g. from ``csv.reader``.
+        groups: Mapping of output name to column prefix, e.g. ``{"CellVolts": "cell_"}``.
+        dtype: Dtype of the grouped arrays. Values are parsed as float64 first, so integer dtypes truncate toward
+               zero like ``int(float(value))``.
+        chunk_size: Number of rows converted together.
+
+    Yields:
+        dict: The columns that are not part of a group, keyed by name, plus one 1-D array per group.
+
+    Raises:
+        KeyError: If a group prefix matches no column.
+        ValueError: If a group value is not numeric.
+    """
+
+    header = [str(column) for column in header]
+    group_positions = {name: column_group_positions(header, prefix) for name, prefix in groups.items()}
+    grouped = {i for positions in group_positions.values() for i in positions}
+    scalar_positions = [i for i in range(len(header)) if i not in grouped]
+    scalar_names = [header[i] for i in scalar_positions]
+
+    def getter(positions):
+        # itemgetter returns a bare value for a single position, keep it a tuple.
+        return itemgetter(*positions) if len(positions) > 1 else lambda row: (row[positions[0]],)
+
+    group_getters = {name: getter(positions) for name, positions in group_positions.items()}
+    scalar_getter = getter(scalar_positions) if scalar_positions else lambda row: ()
+
+    for chunk in iter_chunks((row for row in rows if len(row)), chunk_size):
+        blocks = {
+            name: np.array([get(row) for row in chunk], dtype=np.float64).astype(dtype)
+            for name, get in group_getters.items()
+        }
+        for i, row in enumerate(chunk):
+            record = dict(zip(scalar_names, scalar_getter(row)))
+            for name, block in blocks.items():
+                record[name] = block[i]
+            yield record
+
+
+def iter_column_blocks(
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    columns: Optional[Sequence[str]] = None,
+    dtypes: Optional[Dict[str, type]] = None,
+    block_size: int = LOG_CHUNK_ROWS,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Streams raw rows as fixed-size blocks of column arrays.
+
+    The header is resolved once and only the requested columns are gathered, so unused columns of a wide sheet are
+    never copied out of the row.
+
+    Args:
+        header: Column names of the log or sheet.
+        rows: Raw rows as sequences of values, e.g. from ``csv.reader`` or a Calamine sheet.
+        columns: Columns to keep, in output order. Defaults to every column of the header.
+        dtypes: Mapping of column name to dtype. Values are parsed as float64 first, so integer dtypes truncate toward
+                zero. Columns without a dtype are returned as object arrays of the raw values.
+        block_size: Number of rows per block, only the last block can be shorter.
+
+    Yields:
+        dict: Column name to 1-D array of the block's values.
+
+    Raises:
+        KeyError: If a requested column is not in the header.
+        ValueError: If a value cannot be converted to the column's dtype.
+    """
+
+    header = [str(column) for column in header]
+    columns = list(columns) if columns is not None else header
+    dtypes = dtypes or {}
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise KeyError(f"Columns not found in header: {missing}")
+    positions = [header.index(column) for column in columns]
+
+    for chunk in iter_chunks((row for row in rows if len(row)), block_size):
+        block = {}
+        for column, position in zip(columns, positions):
+            values = [row[position] for row in chunk]
+            dtype = dtypes.get(column)
+            if dtype is None:
+                block[column] = np.array(values, dtype=object)
+            else:
+                block[column] = np.array(values, dtype=np.float64).astype(dtype)
+        yield block
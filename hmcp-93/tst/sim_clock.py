@@ -0,0 +1,79 @@
+"""Simulated time for task-rate replays.
+
+On the target, CTE runs every 100 ms and AFC every 1000 ms. The replays used to pace the CTE calls with
+``time.sleep(0.1)``, which makes a long log spend most of its run time sleeping while the library never looks at the
+wall clock. :class:`VirtualClock` counts the ticks instead. If the library under test does read a time base from a
+global, the clock writes its time there on every tick. Real-time pacing is still available as an opt-in through the
+``AFC_REPLAY_REALTIME`` environment variable, e.g. when debugging against a live tool.
+"""
+
+import os
+import time
+from typing import Optional
+
+CTE_TICK_MS = 100
+AFC_TICK_MS = 1000
+REPLAY_REALTIME_ENV = "AFC_REPLAY_REALTIME"
+
+
+class VirtualClock:
+    """Millisecond clock that advances in fixed ticks without sleeping.
+
+    Args:
+        tick_ms: Length of one tick in milliseconds.
+        lib: Loaded shared library to inject the time into, only needed together with ``time_global``.
+        time_global: Name of a library global that receives the current time in milliseconds on every tick.
+        realtime: Sleep so that ticks follow the wall clock. Defaults to on when ``AFC_REPLAY_REALTIME`` is set.
+    """
+
+    def __init__(
+        self,
+        tick_ms: int = CTE_TICK_MS,
+        lib=None,
+        time_global: Optional[str] = None,
+        realtime: Optional[bool] = None,
+    ) -> None:
+        if time_global is not None and lib is None:
+            raise ValueError(f"time_global={time_global!r} needs the library to write it to")
+
+        self.tick_ms = tick_ms
+        self.now_ms = 0
+        self.ticks = 0
+        self._lib = lib
+        self._time_global = time_global
+        self._realtime = bool(os.environ.get(REPLAY_REALTIME_ENV)) if realtime is None else realtime
+        self._wall_start = time.perf_counter()
+        self._publish()
+
+    def _publish(self) -> None:
+        if self._time_global is not None:
+            setattr(self._lib, self._time_global, self.now_ms)
+
+    def advance(self, ticks: int = 1) -> int:
+        """Moves the clock forward and returns the new time in milliseconds.
+
+        In real-time mode this sleeps until the wall clock has caught up with the new time, so slow steps are not
+        paced twice.
+        """
+
+        self.ticks += ticks
+        self.now_ms += ticks * self.tick_ms
+        self._publish()
+
+        if self._realtime:
+            delay = self._wall_start + self.now_ms / 1000.0 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return self.now_ms
+
+    def advance_to(self, time_ms: int) -> int:
+        """Moves the clock forward to the first tick at or after ``time_ms`` and returns the new time.
+
+        Use it to align to the next period of a slower task, e.g. the next 1000 ms AFC step after a CTE burst that
+        finished early.
+        """
+
+        remaining = time_ms - self.now_ms
+        if remaining > 0:
+            self.advance(-(-remaining // self.tick_ms))
+        return self.now_ms
@@ -8,7 +8,6 @@ Requirements:
 """
 
 from .__main__ import *
-import time
 import os
 
 SKIP_TEST = False
@@ -18,12 +17,13 @@ if not SKIP_TEST:
     _SUBDIR_NAME = "test_data/time_based_data/input_data"
     _FILENAME = "4_260204_AFC+CTE_3646_MP1.1.8.0.0_AC_charger02.csv"
     #_FILENAME = "test_cte.csv"
+    _CTE_TIME_GLOBAL = None  # Library global holding the CTE time base in ms, None if CTE keeps no time of its own
     LOG_FILE = "cte_test_log_4.txt"
 
     module_path = abspath(__file__)
     _OUTPUT = "test_data/time_based_data/output_data"
     dir_path = join(dirname(module_path), _OUTPUT)
-    log_file = join(dir_path, f"processed_CTE_{LOG_FILE}")
+    log_file = worker_path(join(dir_path, f"processed_CTE_{LOG_FILE}"))
     if os.path.exists(log_file):
         os.remove(log_file)
 
@@ -259,6 +259,9 @@ if not SKIP_TEST:
         ele_addr = ffi.addressof(lib, "cte_status")
         status_ptr = ffi.cast("uint32_t*", ele_addr)
 
+        # CTE runs every 100 ms, the virtual clock replaces the wall-clock sleeps between calls
+        cte_clock = VirtualClock(tick_ms=CTE_TICK_MS, lib=lib, time_global=_CTE_TIME_GLOBAL)
+
         test_i = 0
         for each_time_step in all_time_steps:
             # Initialize lib values before AFC call.
@@ -283,7 +286,8 @@ if not SKIP_TEST:
                 #print(f"TestI : {test_i} and status {lib.cte_status}")
                 if lib.cte_status == 0:
                     break
-                time.sleep(0.1)
+                cte_clock.advance()
+            cte_clock.advance_to(test_i * AFC_TICK_MS)
 
             # Record results
             results["Filename"].append(test_filename)
@@ -1059,5 +1063,5 @@ if not SKIP_TEST:
         _OUTPUT = "test_data/time_based_data/output_data"
 
         dir_path = join(dirname(module_path), _OUTPUT)
-        csv_path = join(dir_path, f"processed_CTE_{_FILENAME}")
+        csv_path = worker_path(join(dir_path, f"processed_CTE_{_FILENAME}"))
         write_output_to_excel(results, csv_path)
@@ -9,8 +9,6 @@ Requirements:
 import math
 from typing import Any
 
-from python_calamine import CalamineWorkbook
-
 from .__main__ import *
 
 _MODULE_PATH = abspath(__file__)
@@ -23,17 +21,7 @@ _MAX_CURRENT = 331600
 
 def iter_excel_calamine(file_path, sheet_name=None):
     print(f"iter_excel_calamine {file_path}")
-    workbook = CalamineWorkbook.from_path(file_path)
-
-    if sheet_name:
-        rows = iter(workbook.get_sheet_by_name(sheet_name).to_python())
-    else:
-        rows = iter(workbook.get_sheet_by_index(0).to_python())
-
-    headers = list(map(str, next(rows)))
-    for row in rows:
-        yield dict(zip(headers, row))
-    workbook.close()
+    yield from iter_file(file_path, sheet_name=sheet_name)
 
 
 if not SKIP_TEST:
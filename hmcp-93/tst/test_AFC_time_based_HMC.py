@@ -22,83 +22,60 @@ if not SKIP_TEST:
 
         test_cases = []
 
-        # Open the CSV file
-        with open(csv_path, "r") as file:
-            reader = csv.DictReader(file)
-
-            # Iterate over each row in the CSV
-            for row in reader:
-                # Get inputs
-                test_filename = '251113_AFC+CTE_MP1.1.1.0.0._400kw_chg_90_Fresh'
-                Time = int(ast.literal_eval(row["Time"]))
-                PackSOC = int(row["Real soc"]) * 10
-                PackSOC_DR = 1
-                PackCurr = -int(row["Current"]) * 100
-                PackCurr_DR = 1
-
-                try:
-                    # CellVolts = [int(item) for item in ast.literal_eval(row["CellVolts"])]
-                    CellVolts = [int(row[f'cell_{i}']) for i in range(1, 193)]
-                except TypeError:
-                    CellVolts = [int(row["CellVolts"])]
-
-                try:
-                    # CellVolts_DR = [
-                    #     int(item) for item in ast.literal_eval(row["CellVolts_DR"])
-                    # ]
-                    CellVolts_DR = [1] * 192
-                except TypeError:
-                    CellVolts_DR = [int(row["CellVolts_DR"])]
-
-                try:
-                    # TempSnsrs = [int(item) for item in ast.literal_eval(row["TempSnsrs"])]
-                    TempSnsrs = [int(row[f'temp_{i}']) for i in range(0, 18)]
-                except TypeError:
-                    TempSnsrs = [int(row["TempSnsrs"])]
-
-                try:
-                    TempSnsrs_DR = [1] * 18
-                except TypeError:
-                    TempSnsrs_DR = [int(row["TempSnsrs_DR"])]
-
-                MinTempSnsr = int(min(TempSnsrs))
-                MinTempSnsr_DR = 1
-
-                MaxTempSnsr = int(max(TempSnsrs))
-                MaxTempSnsr_DR = 1
-
-                ChgPackCapcty = 125800
-                ChgPackCapcty_DR = 1
-
-                battery_state = row["battery_state"]
-                EVSEChgStatus = int(row["battery_state"])
-
-                # Format data for parametrized test
-                test_case = {
-                    "Inputs": {
-                        "filename": test_filename,
-                        "Time": Time,
-                        "PackSOC": PackSOC,
-                        "PackSOC_DR": PackSOC_DR,
-                        "PackCurr": PackCurr,
-                        "PackCurr_DR": PackCurr_DR,
-                        "CellVolts": CellVolts,
-                        "CellVolts_DR": CellVolts_DR,
-                        "TempSnsrs": TempSnsrs,
-                        "TempSnsrs_DR": TempSnsrs_DR,
-                        "MinTempSnsr": MinTempSnsr,
-                        "MinTempSnsr_DR": MinTempSnsr_DR,
-                        "MaxTempSnsr": MaxTempSnsr,
-                        "MaxTempSnsr_DR": MaxTempSnsr_DR,
-                        "ChgPackCapcty": ChgPackCapcty,
-                        "ChgPackCapcty_DR": ChgPackCapcty_DR,
-                        "battery_state": battery_state,
-                        "EVSEChgStatus": EVSEChgStatus,
-                    },
-                    "Expected": {},
-                }
-
-                test_cases.append(test_case)
+        # Iterate over each row in the CSV, the wide cell_N / temp_N columns come back as one array each
+        for row in iter_file(csv_path, groups={"CellVolts": "cell_", "TempSnsrs": "temp_"}):
+            # Get inputs
+            test_filename = '251113_AFC+CTE_MP1.1.1.0.0._400kw_chg_90_Fresh'
+            Time = int(ast.literal_eval(row["Time"]))
+            PackSOC = int(row["Real soc"]) * 10
+            PackSOC_DR = 1
+            PackCurr = -int(row["Current"]) * 100
+            PackCurr_DR = 1
+
+            CellVolts = row["CellVolts"].tolist()
+            CellVolts_DR = [1] * 192
+
+            TempSnsrs = row["TempSnsrs"].tolist()
+            TempSnsrs_DR = [1] * 18
+
+            MinTempSnsr = int(min(TempSnsrs))
+            MinTempSnsr_DR = 1
+
+            MaxTempSnsr = int(max(TempSnsrs))
+            MaxTempSnsr_DR = 1
+
+            ChgPackCapcty = 125800
+            ChgPackCapcty_DR = 1
+
+            battery_state = row["battery_state"]
+            EVSEChgStatus = int(row["battery_state"])
+
+            # Format data for parametrized test
+            test_case = {
+                "Inputs": {
+                    "filename": test_filename,
+                    "Time": Time,
+                    "PackSOC": PackSOC,
+                    "PackSOC_DR": PackSOC_DR,
+                    "PackCurr": PackCurr,
+                    "PackCurr_DR": PackCurr_DR,
+                    "CellVolts": CellVolts,
+                    "CellVolts_DR": CellVolts_DR,
+                    "TempSnsrs": TempSnsrs,
+                    "TempSnsrs_DR": TempSnsrs_DR,
+                    "MinTempSnsr": MinTempSnsr,
+                    "MinTempSnsr_DR": MinTempSnsr_DR,
+                    "MaxTempSnsr": MaxTempSnsr,
+                    "MaxTempSnsr_DR": MaxTempSnsr_DR,
+                    "ChgPackCapcty": ChgPackCapcty,
+                    "ChgPackCapcty_DR": ChgPackCapcty_DR,
+                    "battery_state": battery_state,
+                    "EVSEChgStatus": EVSEChgStatus,
+                },
+                "Expected": {},
+            }
+
+            test_cases.append(test_case)
 
         return test_cases
 
@@ -0,0 +1,104 @@
+"""Per-worker state for parallel runs with pytest-xdist (``pytest -n auto``).
+
+Every xdist worker is a separate process and loads its own instance of the library through the ``lib`` fixture, so
+library globals are never shared between workers. What is shared is the file system: the NVM emulation writes its
+``.dat`` files to the working directory, ``setup_parameters`` deletes all of them after each test, and the replays
+write their output artifacts under fixed names. The conftest therefore moves each worker into its own working
+directory, see :func:`worker_dir`, and the helpers here give files that live outside of it a per-worker name. At the
+end of the session the controller moves the workers' artifacts back, see :func:`collect_worker_files`.
+
+Outside of xdist all helpers are no-ops, a serial run writes exactly the files it always did.
+"""
+
+import os
+from os.path import join, splitext
+from typing import Optional
+
+XDIST_WORKER_ENV = "PYTEST_XDIST_WORKER"
+WORKER_DIR_NAME = "_xdist"
+
+
+def worker_id() -> Optional[str]:
+    """Returns the id of the xdist worker running this process (``gw0``, ``gw1``, ...), None outside of xdist."""
+
+    return os.environ.get(XDIST_WORKER_ENV) or None
+
+
+def worker_path(path: str) -> str:
+    """Makes an output path unique to the current xdist worker.
+
+    The worker id is inserted before the extension, ``processed_CTE_log.txt`` becomes ``processed_CTE_log.gw0.txt``.
+
+    Args:
+        path: Output file path.
+
+    Returns:
+        str: The path for this worker, ``path`` unchanged outside of xdist.
+    """
+
+    worker = worker_id()
+    if worker is None:
+        return path
+    stem, suffix = splitext(path)
+    return f"{stem}.{worker}{suffix}"
+
+
+def worker_dir(base_dir: str, worker: str) -> str:
+    """Returns the private working directory of an xdist worker below ``base_dir`` and creates it if needed."""
+
+    path = join(base_dir, WORKER_DIR_NAME, worker)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def dat_files_dir(default: str) -> str:
+    """Returns the directory holding this process's NVM ``.dat`` files.
+
+    Args:
+        default: Directory of a serial run, usually ``PROJECT_PATH``.
+
+    Returns:
+        str: The worker's working directory under xdist, ``default`` otherwise.
+    """
+
+    return os.getcwd() if worker_id() is not None else default
+
+
+def collect_worker_files(base_dir: str) -> int:
+    """Moves the artifacts the workers wrote to their working directories back to ``base_dir``.
+
+    Called by the controller at the end of the session, so the relative output files of a parallel run end up where a
+    serial run writes them. Leftover ``.dat`` files are deleted, emptied worker directories removed.
+
+    Args:
+        base_dir: Directory the worker directories were created in.
+
+    Returns:
+        int: The number of files moved.
+    """
+
+    root = join(base_dir, WORKER_DIR_NAME)
+    if not os.path.isdir(root):
+        return 0
+
+    moved = 0
+    for worker in sorted(os.listdir(root)):
+        path = join(root, worker)
+        for entry in os.scandir(path):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".dat"):
+                os.remove(entry.path)
+            else:
+                os.replace(entry.path, join(base_dir, entry.name))
+                moved += 1
+        try:
+            os.rmdir(path)
+        except OSError:
+            # Subdirectories written by a test stay where they are.
+            pass
+    try:
+        os.rmdir(root)
+    except OSError:
+        pass
+    return moved
@@ -56,6 +56,8 @@ from submodules.tool_test_automation.src.common.utils import (
     write_output_to_csv,
 )
 
+from .lib_snapshot import DatFileSnapshot, LibrarySnapshot, exported_globals, snapshots_enabled
+
 ffi = cffi.FFI()
 
 # for time based tests
@@ -422,12 +424,21 @@ class ParamDict:
             logger.error(f"*** Storing Initial values failed:*** {e}")
 
 
+# Library state after the first full setup_parameters run, by id of the library: (lib, snapshot, NVM .dat files).
+_SETUP_SNAPSHOTS = {}
+
+
 @pytest.fixture(scope="function")
 def setup_parameters(lib) -> None:
     """This fixture re-initializes the global variables in the specified library module at the beginning of each test
     function. These variables are reset to their initial values for every standard and parametrized test case, ensuring
     consistent test conditions.
 
+    The ParamDict assignments in initialize_parameters run once per loaded library. Later tests get the resulting memory
+    image of all library globals back from a LibrarySnapshot. The NVM .dat files written by the initialization are deleted
+    after every test, so their content is recorded in a DatFileSnapshot and written back before each test as well. Set
+    AFC_SETUP_SNAPSHOT_DISABLE to run the assignments for every test.
+
     Args:
         lib (module): The shared library module, either a .dll (Windows) or .so (Unix/Linux) file, containing the global
          variables to be initialized.
@@ -435,6 +446,26 @@ def setup_parameters(lib) -> None:
     logger.debug(
         "Set up parameters which is initialized at the beginning of test execution)"
     )
+    setup = _SETUP_SNAPSHOTS.get(id(lib)) if snapshots_enabled() else None
+    if setup is not None and setup[0] is lib:
+        setup[1].restore()
+        setup[2].restore()
+    else:
+        initialize_parameters(lib)
+        if snapshots_enabled():
+            _SETUP_SNAPSHOTS[id(lib)] = (lib, LibrarySnapshot(lib), DatFileSnapshot(PROJECT_PATH))
+
+    yield
+
+    clean_dat_files(PROJECT_PATH)
+
+
+def initialize_parameters(lib) -> None:
+    """Assigns the initial library values stored by ParamDict and runs the NVM initialization, see setup_parameters.
+
+    Args:
+        lib (module): The loaded shared library.
+    """
     ffi = FFI()
     pd = pytest.paramdict
 
@@ -549,11 +580,6 @@ def setup_parameters(lib) -> None:
     lib.s_AFC_Param.KeAFC_k_Coeff_h = pd["s_AFC_Param.KeAFC_k_Coeff_h"]
 
 
-    yield
-
-    clean_dat_files(PROJECT_PATH)
-
-
 def parametrize_args(
     params: Dict[str, List[Any]]
 ) -> Tuple[List[Dict[str, Any]], List[str]]: